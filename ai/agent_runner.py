@@ -1,19 +1,29 @@
 import os
 import inspect
-import re
-from ai.tools import TOOL_MAPPING
+from ai.tools import TOOL_MAPPING, BATCH_TOOLS
+from ai import context_budget, intent_parser, parsing
+from ai.response_cache import response_cache, make_key
+from ai.single_flight import agent_flights
+from db.backend import get_backend
 from logs.log_convo import add_message
-import dateparser
+from logs import metrics
+from logs.logger import get_logger
 import datetime
-from langchain.agents import Tool, initialize_agent, AgentType
-from langchain_google_genai import ChatGoogleGenerativeAI
+import threading
 from dotenv import load_dotenv
 
 # Load env vars
 load_dotenv()
 
+log = get_logger(__name__)
+
+# Tools run as a single calendar user (see make_tool)
+AGENT_USER = "user1"
+
+
+def make_tool(name, fn, description=None):
+    from langchain.agents import Tool
 
-def make_tool(name, fn):
     sig = inspect.signature(fn)
 
     def _wrapper(input_str: str):
@@ -26,44 +36,31 @@ def make_tool(name, fn):
                 if "=" in part:
                     k, v = part.split("=", 1)
                     kwargs[k.strip()] = v.strip().strip('"').strip("'")
-            kwargs["user"] = "user1"
+            kwargs["user"] = AGENT_USER
             kwargs_list.append(kwargs)
         else:
-            # Case 2: raw text fallback (heuristic)
-            events_texts = re.split(r"\band\b|,", input_str)
-
-            for event_text in events_texts:
-                event_text = event_text.strip('"').strip("'").strip()
-                kwargs = {}
-
-                # Parse title
-                kwargs["title"] = event_text
-
-                # Parse date using dateparser
-                parsed_date = dateparser.parse(event_text)
-                if parsed_date:
-                    kwargs["date"] = parsed_date.strftime("%Y-%m-%d")
-
-                # Parse times (start_time / end_time)
-                time_matches = [m[0] for m in re.findall(r"(\d{1,2}(:\d{2})?\s?(am|pm)?)", event_text, re.I)]
-                if len(time_matches) == 1:
-                    kwargs["start_time"] = time_matches[0]
-                elif len(time_matches) >= 2:
-                    kwargs["start_time"] = time_matches[0]
-                    kwargs["end_time"] = time_matches[1]
-
+            # Case 2: raw text fallback (heuristic, see ai/parsing.py)
+            today = datetime.date.today()
+            for event_text in parsing.split_fragments(input_str):
+                kwargs = parsing.parse_fragment(event_text, today)
                 # Force single-user
-                kwargs["user"] = "user1"
-
+                kwargs["user"] = AGENT_USER
                 kwargs_list.append(kwargs)
 
+        # Keep only valid args from the tool function signature
+        valid_list = [{k: v for k, v in kw.items() if k in sig.parameters and k != "user"}
+                      for kw in kwargs_list]
+
+        # Several items for a batch-capable tool: one call, one transaction. Items
+        # keep every parsed field: delete_event_tool resolves id-less ones by title
+        if name in BATCH_TOOLS and len(kwargs_list) > 1:
+            items = [{k: v for k, v in kw.items() if k != "user"} for kw in kwargs_list]
+            return fn(items, user=AGENT_USER)  # enforce single-user
+
         # Call the function for each set of kwargs
         results = []
-        for kw in kwargs_list:
-            # Keep only valid args from the tool function signature
-            valid_kwargs = {k: v for k, v in kw.items() if k in sig.parameters}
-            valid_kwargs["user"] = "user1"  # enforce single-user
-            results.append(fn(**valid_kwargs))
+        for valid_kwargs in valid_list:
+            results.append(fn(**valid_kwargs, user=AGENT_USER))  # enforce single-user
 
         return results if len(results) > 1 else results[0]
     # # Tool-specific example usage
@@ -96,6 +93,9 @@ def make_tool(name, fn):
         "set a meeting for discussing logistics after 2 hours"
     ]
 
+    if description:
+        return Tool(name=name, func=_wrapper, description=description)
+
     # Get current date/time
     today_str = datetime.date.today().isoformat()
     current_time_str = datetime.datetime.now().strftime("%H:%M")
@@ -123,44 +123,119 @@ def make_tool(name, fn):
 # ==============================
 # Run Agent Function
 # ==============================
+@metrics.timed("agent.run_agent")
 def run_agent(user_input: str, user: str = "user1") -> str:
     """
     Uses LangChain agent to process natural language commands.
-    Persists conversation to memory.json via log_convo.
+    Simple commands recognised by intent_parser are dispatched straight to
+    the tool without calling the LLM.
+    Responses are cached per (user, normalized input, calendar version); a
+    response is only cached if the calendar did not change while producing
+    it, so commands that write are never replayed from the cache. The
+    history summary is only built on a miss that reaches the LLM and is not
+    part of the key.
+    Identical requests arriving while one is being answered wait for it and
+    share its result (see single_flight).
+    Persists conversation to memory.jsonl via log_convo.
     """
     add_message("user", user_input)
 
+    version = get_backend().calendar_version(AGENT_USER)
+    cache_key = make_key(user, user_input, version)
+    result = response_cache.get(cache_key)
+    if result is None:
+        result = agent_flights.do(cache_key, lambda: _answer(user_input, version, cache_key))
+
+    add_message("assistant", result)
+    return result
+
+
+def _answer(user_input: str, version: int, cache_key) -> str:
     try:
-        result = agent.run(user_input)
+        intent = intent_parser.match_intent(user_input)
+        if intent:
+            with metrics.span("agent.fast_path"):
+                result = TOOL_MAPPING[intent.tool](**intent.kwargs, user=AGENT_USER)["message"]
+        else:
+            history = context_budget.history_summary(user_input)
+            context = context_budget.plan(user_input, TOOL_MAPPING, history)
+            agent = build_agent(context)
+            with metrics.span("agent.llm_chain"):
+                # times each Gemini round trip into the "agent.llm" histogram; passed
+                # per call because constructor callbacks never reach the inner LLMChain
+                result = agent.run(context.question,
+                                   callbacks=[metrics.langchain_handler()] if metrics.ENABLED else None)
     except Exception as e:
+        log.warning("agent failed", exc_info=True)
         result = f"❌ Agent failed: {e}"
-
-    add_message("assistant", result)
+    else:
+        if get_backend().calendar_version(AGENT_USER) == version:
+            response_cache.put(cache_key, result)
     return result
 
 
 # ==============================
-# Build LangChain Tools
+# LangChain agent
 # ==============================
-lc_tools = [make_tool(name, fn) for name, fn in TOOL_MAPPING.items()]
+# LangChain and the Gemini client are heavy to import, so the LLM is only
+# created on the first request that actually needs it. The agent around it is
+# cheap and built per request from a context_budget plan: only the selected
+# tools, with compact descriptions.
+_llm = None
+_llm_lock = threading.Lock()
+
+
+def get_llm():
+    """Thread-safe singleton: the Gemini chat model, created on first use."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                # Initialize Gemini LLM (LangChain wrapper)
+                _llm = ChatGoogleGenerativeAI(
+                    model="gemini-1.5-flash",  # switched from gemini-1.5-flash → assignment spec,
+                    google_api_key=os.getenv("GEMINI_API_KEY"),
+                    temperature=0,
+                )
+    return _llm
+
+
+def build_agent(context, llm=None):
+    """ZERO_SHOT_REACT agent over the tools in `context` (a context_budget.ContextPlan)."""
+    from langchain.agents import initialize_agent, AgentType
+
+    # Build LangChain Tools
+    lc_tools = [make_tool(name, TOOL_MAPPING[name], context.descriptions.get(name)) for name in context.tools]
+
+    # Create LangChain Agent
+    agent = initialize_agent(
+        tools=lc_tools,
+        llm=llm or get_llm(),
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        agent_kwargs={"prefix": context.prefix} if context.prefix else None,
+    )
 
+    # prompt size as sent vs. with every tool described in full (first step; later steps add the scratchpad)
+    if context_budget.measuring():
+        prompt = agent.agent.llm_chain.prompt.format(input=context.question, agent_scratchpad="")
+        context_budget.record(context, prompt, _full_prompt_chars() + len(context.question), len(TOOL_MAPPING))
+    return agent
 
-# ==============================
-# Initialize Gemini LLM (LangChain wrapper)
-# ==============================
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",  # switched from gemini-1.5-flash → assignment spec,
-    google_api_key=os.getenv("GEMINI_API_KEY"),
-    temperature=0,
-)
 
+_full_prompt_size = None
 
-# ==============================
-# Create LangChain Agent
-# ==============================
-agent = initialize_agent(
-    tools=lc_tools,
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True,
-)
+
+def _full_prompt_chars() -> int:
+    """
+    Length of the prompt with every tool described in full, without the
+    question. Rendered once: its length does not change while the process runs.
+    """
+    global _full_prompt_size
+    if _full_prompt_size is None:
+        from langchain.agents import ZeroShotAgent
+
+        full_prompt = ZeroShotAgent.create_prompt([make_tool(name, fn) for name, fn in TOOL_MAPPING.items()])
+        _full_prompt_size = len(full_prompt.format(input="", agent_scratchpad=""))
+    return _full_prompt_size
@@ -0,0 +1,202 @@
+# context_budget.py
+"""
+Prompt budget for the LangChain agent.
+
+The ZERO_SHOT_REACT prompt lists every tool with its description and is sent
+again on every reasoning step, so its size is paid per step. For each
+request that reaches the LLM, plan() decides what goes into it:
+
+  - tools: only those the input can need, picked by keyword rules
+    (TOOL_RULES), with every tool as the fallback when no rule matches;
+  - descriptions: one line per tool (purpose and argument names); the input
+    format and today's date are stated once in the prompt prefix instead of
+    in every tool description;
+  - history: with CONTEXT_HISTORY_MESSAGES > 0, a bounded summary of the
+    last messages in log_convo (its in-memory recent() buffer) is put in
+    front of the question.
+
+CONTEXT_BUDGET=0 sends every tool with make_tool's full descriptions, as
+before. Prompt sizes are estimated in tokens (estimate_tokens) for the sent
+prompt and for the full one, per request in the DEBUG log and in total under
+"agent_context" in /metrics; nothing is measured when neither is on.
+"""
+import inspect
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from logs import log_convo, metrics
+from logs.logger import get_logger, kv
+
+log = get_logger(__name__)
+
+CONTEXT_BUDGET = os.getenv("CONTEXT_BUDGET", "1").lower() in ("1", "true", "yes")
+CONTEXT_HISTORY_MESSAGES = int(os.getenv("CONTEXT_HISTORY_MESSAGES", "0"))   # 0: no history
+HISTORY_MESSAGE_CHARS = 160     # each message is cut to this
+HISTORY_MAX_CHARS = 800         # whole summary; oldest messages are dropped first
+CHARS_PER_TOKEN = 4             # rough average for English text and Gemini/GPT-style tokenizers
+
+
+class ContextPlan(NamedTuple):
+    tools: list                 # tool names, in TOOL_MAPPING order
+    descriptions: dict          # tool name -> compact description ({} for make_tool's full ones)
+    prefix: Optional[str]       # prompt prefix (None for LangChain's default)
+    question: str               # user input, with the history summary in front if any
+    history: str                # that summary ("" if none)
+
+
+# ============================
+# Tool selection
+# ============================
+_LOOKUP = ("list_events_by_title_tool", "list_events_by_keyword_tool", "list_events_on_date_tool")
+
+# (pattern, tools it calls for); an input gets the union over every matching rule
+TOOL_RULES = [
+    (r"\b(?:add|create|schedule|set|book|new|plan|put|arrange|organi[sz]e)\b",
+     ("add_event_tool", "find_conflicts_tool")),
+    (r"\b(?:show|list|display|view|what|whats|any|have|events?|calendar|agenda|meetings?)\b",
+     ("list_all_events_tool", "list_events_on_date_tool", "list_events_next_n_days_tool")),
+    (r"\b(?:today|tomorrow|yesterday|on|\d{4}-\d{2}-\d{2}|(?:mon|tues|wednes|thurs|fri|satur|sun)day)\b",
+     ("list_events_on_date_tool",)),
+    (r"\b(?:next|upcoming|coming|week|days|month)\b", ("list_events_next_n_days_tool",)),
+    (r"\b(?:titled|called|named|title)\b|[\"']", ("list_events_by_title_tool",)),
+    (r"\b(?:search|find|about|keyword|containing|mention\w*|related)\b", ("list_events_by_keyword_tool",)),
+    (r"\b(?:conflicts?|overlap\w*|clash\w*|busy|double[- ]booked)\b", ("find_conflicts_tool",)),
+    (r"\b(?:free|available|availability|slots?|open|gaps?)\b", ("find_free_slots_tool",)),
+    (r"\b(?:update|change|move|reschedule|rename|edit|shift|postpone|push)\b",
+     ("update_event_tool",) + _LOOKUP),
+    (r"\b(?:delete|remove|cancel|drop|erase)\b",
+     ("delete_event_tool", "delete_event_by_title_tool") + _LOOKUP),
+    (r"\b(?:delete|remove|cancel|clear|erase|wipe)\b.*\b(?:all|everything|every)\b|\b(?:clear|wipe)\b",
+     ("delete_all_events_tool",)),
+]
+_COMPILED_TOOL_RULES = [(re.compile(pattern, re.I), tools) for pattern, tools in TOOL_RULES]
+
+
+def select_tools(user_input: str, tool_names) -> list:
+    """Names from `tool_names` the input may need; all of them if no rule matches."""
+    wanted = set()
+    for pattern, tools in _COMPILED_TOOL_RULES:
+        if pattern.search(user_input):
+            wanted.update(tools)
+    selected = [name for name in tool_names if name in wanted]
+    return selected or list(tool_names)
+
+
+# ============================
+# Descriptions and prefix
+# ============================
+def describe(name: str, fn) -> str:
+    """One line: what the tool does and its arguments (optional ones marked '?')."""
+    args = [p.name + ("?" if p.default is not inspect.Parameter.empty else "")
+            for p in inspect.signature(fn).parameters.values() if p.name != "user"]
+    return f"{name[:-len('_tool')].replace('_', ' ')}. Args: {', '.join(args) or 'none'}"
+
+
+def prefix(now: datetime = None) -> str:
+    """Instructions every tool shares, stated once instead of in each description."""
+    now = now or datetime.now()
+    return (f"You manage a calendar. Now: {now:%Y-%m-%d %H:%M} ({now:%A}); resolve relative dates "
+            f"and times from it. Action Input is key='value' pairs separated by commas, dates "
+            f"YYYY-MM-DD, times HH:MM, e.g. title='Dentist', date='{now:%Y-%m-%d}', start_time='14:00'. "
+            f"Tools:")
+
+
+# ============================
+# History
+# ============================
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def history_summary(user_input: str, n: int = None) -> str:
+    """
+    The last `n` (CONTEXT_HISTORY_MESSAGES) logged messages as "User: ..." /
+    "Assistant: ..." lines, each cut to HISTORY_MESSAGE_CHARS and the whole
+    to HISTORY_MAX_CHARS; "" when disabled. The current input, which
+    run_agent has already logged, is left out.
+    """
+    n = CONTEXT_HISTORY_MESSAGES if n is None else n
+    if n <= 0:
+        return ""
+    messages = log_convo.recent(n + 1)
+    if messages and messages[-1].get("role") == "user" and messages[-1].get("message") == user_input:
+        messages = messages[:-1]
+    lines = [f"{m.get('role', '').capitalize()}: {_clip(m.get('message', ''), HISTORY_MESSAGE_CHARS)}"
+             for m in messages[-n:]]
+    while lines and sum(len(line) + 1 for line in lines) > HISTORY_MAX_CHARS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+# ============================
+# Planning
+# ============================
+def plan(user_input: str, tool_mapping: dict, history: str = "") -> ContextPlan:
+    if history:
+        question = f"Recent conversation:\n{history}\n\nRequest: {user_input}"
+    else:
+        question = user_input
+    if not CONTEXT_BUDGET:
+        return ContextPlan(list(tool_mapping), {}, None, question, history)
+    tools = select_tools(user_input, tool_mapping)
+    return ContextPlan(tools, {name: describe(name, tool_mapping[name]) for name in tools}, prefix(), question,
+                       history)
+
+
+# ============================
+# Token accounting
+# ============================
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (CHARS_PER_TOKEN characters per token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+_stats_lock = threading.Lock()
+_stats = Counter()
+
+
+def measuring() -> bool:
+    """Whether record() has a reader: /metrics or the DEBUG log."""
+    return metrics.ENABLED or log.isEnabledFor(logging.DEBUG)
+
+
+def record(context: ContextPlan, prompt: str, full_prompt_chars: int, tool_count: int):
+    """
+    Account one request: `prompt` as sent (first step), and the length of the
+    same prompt with every tool described in full.
+    """
+    tokens, full_tokens = estimate_tokens(prompt), math.ceil(full_prompt_chars / CHARS_PER_TOKEN)
+    log.debug("agent context", extra=kv(tools=",".join(context.tools), tool_count=tool_count,
+                                        prompt_tokens=tokens, full_prompt_tokens=full_tokens,
+                                        history_chars=len(context.history)))
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["tools_sent"] += len(context.tools)
+        _stats["tools_available"] += tool_count
+        _stats["prompt_tokens"] += tokens
+        _stats["full_prompt_tokens"] += full_tokens
+
+
+def stats() -> dict:
+    """Average first-step prompt size sent vs with every tool in full, and tools sent per request."""
+    with _stats_lock:
+        requests = _stats["requests"]
+        full = _stats["full_prompt_tokens"]
+        return {
+            "requests": requests,
+            "avg_tools": _stats["tools_sent"] / requests if requests else 0.0,
+            "avg_tools_available": _stats["tools_available"] / requests if requests else 0.0,
+            "avg_prompt_tokens": _stats["prompt_tokens"] / requests if requests else 0.0,
+            "avg_full_prompt_tokens": full / requests if requests else 0.0,
+            "reduction": 1 - _stats["prompt_tokens"] / full if full else 0.0,
+        }
+
+
+metrics.register_stats("agent_context", stats)
@@ -0,0 +1,179 @@
+# intent_parser.py
+"""
+Rule-based fast path in front of the LangChain agent.
+
+Common, unambiguous commands ("show all events", "list events on 2025-09-21",
+"delete event 4") are matched by anchored regexes and mapped straight to a
+tool in TOOL_MAPPING, skipping the multi-round-trip LLM loop. Anything the
+rules don't fully match is left to the agent.
+
+A rule's confidence says how surely its match is the whole intent; matches
+below FAST_PATH_THRESHOLD (relative periods like "this week", deleting every
+event with a title) still go to the agent. Matches whose captured date or
+time is not real ("2026-13-45", "25:99") are rejected too. Deleting the whole
+calendar has no rule at all: destructive requests never skip the agent.
+"""
+import re
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+
+from db.timeutil import day_number, parse_time
+from logs import metrics
+
+# Matches below this confidence are handed to the LLM agent instead
+FAST_PATH_THRESHOLD = 0.9
+
+
+class Intent(NamedTuple):
+    tool: str
+    kwargs: dict
+    confidence: float
+
+
+# ============================
+# Shared pattern pieces
+# ============================
+_EVENTS = r"(?:events?|meetings?|appointments?|schedule|calendar)"
+_SHOW = r"(?:show|list|display|get|view|what are|what's|whats|what is)(?: me)?"
+_MY = r"(?:(?:all )?(?:of )?(?:my|the) )?"
+_DATE = r"(?P<date>\d{4}-\d{2}-\d{2}|today|tomorrow|day after tomorrow)"
+_TIME = r"\d{1,2}:\d{2}"
+_TITLE = r"[\"']?(?P<title>.+?)[\"']?"
+
+
+def _resolve_date(text: str) -> str:
+    text = text.lower()
+    if text == "today":
+        return date.today().isoformat()
+    if text == "tomorrow":
+        return (date.today() + timedelta(days=1)).isoformat()
+    if text == "day after tomorrow":
+        return (date.today() + timedelta(days=2)).isoformat()
+    return text
+
+
+def _date_kwargs(m):
+    """None (no match) unless the date is a real calendar day."""
+    day = _resolve_date(m.group("date"))
+    return {"date": day} if day_number(day) is not None else None
+
+
+def _add_kwargs(m):
+    kwargs = _date_kwargs(m)
+    if kwargs is None:
+        return None
+    kwargs = {"title": m.group("title"), **kwargs}
+    start, end = m.group("start"), m.group("end")
+    if start:
+        if parse_time(start) is None:
+            return None
+        kwargs["start_time"] = start
+    if end:
+        if parse_time(end) is None or parse_time(end) <= parse_time(start):
+            return None
+        kwargs["end_time"] = end
+    return kwargs
+
+
+# (pattern, tool name, kwargs builder, confidence); a builder returning None rejects the match
+RULES = [
+    (rf"{_SHOW} (?:all )?{_MY}{_EVENTS}|(?:show|list) all|what'?s on {_MY}(?:calendar|schedule)",
+     "list_all_events_tool", lambda m: {}, 1.0),
+    (rf"(?:{_SHOW} )?{_MY}{_EVENTS} (?:(?:on|for) )?{_DATE}",
+     "list_events_on_date_tool", _date_kwargs, 1.0),
+    (rf"what do i have (?:on )?{_DATE}",
+     "list_events_on_date_tool", _date_kwargs, 1.0),
+    (rf"(?:{_SHOW} )?{_MY}{_EVENTS} (?:in|for|over) the next (?P<n>\d+) days?",
+     "list_events_next_n_days_tool", lambda m: {"n": int(m.group("n"))}, 1.0),
+    (rf"(?:{_SHOW} )?{_MY}{_EVENTS} (?:this|for the) week",
+     "list_events_next_n_days_tool", lambda m: {"n": 7}, 0.7),      # calendar week or the next 7 days?
+    (rf"(?:{_SHOW}|find) {_MY}{_EVENTS} (?:titled|named|called) {_TITLE}",
+     "list_events_by_title_tool", lambda m: {"title": m.group("title")}, 1.0),
+    (rf"(?:search|find) (?:{_MY}{_EVENTS} )?(?:for|with|containing|matching|about) {_TITLE}",
+     "list_events_by_keyword_tool", lambda m: {"keyword": m.group("title")}, 0.9),
+    (r"(?:delete|remove|cancel) (?:event|meeting|appointment) (?:#|id )?(?P<id>\d+)",
+     "delete_event_tool", lambda m: {"event_id": int(m.group("id"))}, 0.95),
+    # removes every event and series with that title: left to the agent
+    (rf"(?:delete|remove|cancel) (?:the )?{_EVENTS} (?:titled|named|called) {_TITLE}",
+     "delete_event_by_title_tool", lambda m: {"title": m.group("title")}, 0.6),
+    (r"(?:rename|retitle) (?:event|meeting) (?:#|id )?(?P<id>\d+) to [\"']?(?P<title>.+?)[\"']?",
+     "update_event_tool", lambda m: {"event_id": int(m.group("id")), "title": m.group("title")}, 0.95),
+    (rf"(?:add|create|schedule) (?:an? )?(?:event|meeting|appointment)? ?(?:titled |called |named )?"
+     rf"[\"'](?P<title>[^\"']+)[\"'] on {_DATE}"
+     rf"(?: (?:at|from) (?P<start>{_TIME})(?: (?:to|until|-) (?P<end>{_TIME}))?)?",
+     "add_event_tool", _add_kwargs, 1.0),
+]
+
+_COMPILED_RULES = [(re.compile(p, re.I), tool, build, conf) for p, tool, build, conf in RULES]
+
+_TRAILING_PUNCT = re.compile(r"[\s?.!]+$")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, collapse whitespace and strip trailing punctuation."""
+    return _TRAILING_PUNCT.sub("", _SPACES.sub(" ", text.strip().lower()))
+
+
+# ============================
+# Metrics
+# ============================
+_stats_lock = threading.Lock()
+_stats = Counter()
+_tool_hits = Counter()
+
+
+def _record(hit: bool, tool: str = None):
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["fast_path" if hit else "fallback"] += 1
+        if hit:
+            _tool_hits[tool] += 1
+        elif tool:
+            _stats["low_confidence"] += 1
+
+
+def stats() -> dict:
+    """Fast-path hit rate and per-tool hit counts."""
+    with _stats_lock:
+        requests = _stats["requests"]
+        return {
+            "requests": requests,
+            "fast_path": _stats["fast_path"],
+            "fallback": _stats["fallback"],
+            "low_confidence": _stats["low_confidence"],     # matched a rule below the threshold
+            "hit_rate": _stats["fast_path"] / requests if requests else 0.0,
+            "by_tool": dict(_tool_hits),
+        }
+
+
+# ============================
+# Matching
+# ============================
+def match_intent(text: str) -> Optional[Intent]:
+    """
+    Return the Intent for `text` if a rule matches the whole input with
+    confidence >= FAST_PATH_THRESHOLD, else None (use the LLM agent).
+    Titles keep their original casing.
+    """
+    # match case-insensitively on the original text so titles keep their casing
+    cleaned = _TRAILING_PUNCT.sub("", _SPACES.sub(" ", text.strip()))
+    for pattern, tool, build, confidence in _COMPILED_RULES:
+        m = pattern.fullmatch(cleaned)
+        if not m:
+            continue
+        kwargs = build(m)
+        if kwargs is None:
+            continue
+        if confidence < FAST_PATH_THRESHOLD:
+            _record(False, tool)
+            return None
+        _record(True, tool)
+        return Intent(tool, kwargs, confidence)
+    _record(False)
+    return None
+
+
+metrics.register_stats("intent_fast_path", stats)
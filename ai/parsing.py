@@ -0,0 +1,98 @@
+# parsing.py
+"""
+Heuristic parsing of raw agent tool input ("lunch tomorrow at 1pm and gym
+2025-09-21 7:00") into tool kwargs.
+
+Patterns are compiled once at import. ISO dates and common relative dates
+("today", "tomorrow", "day after tomorrow", weekday names) are resolved
+directly; only other text reaches dateparser, whose results are memoized per
+(text, reference date) since it is slow and loads locale data on first use.
+"""
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+DATEPARSER_CACHE_SIZE = 1024
+
+_SPLIT = re.compile(r"\band\b|,")
+_TIME = re.compile(r"(\d{1,2}(:\d{2})?\s?(am|pm)?)", re.I)
+_EVENT_ID = re.compile(r"#?(\d+)")
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+# longest alternatives first so "day after tomorrow" wins over "tomorrow"
+_RELATIVE = re.compile(
+    r"\b(?:(?P<offset>day after tomorrow|tomorrow|today|tonight)"
+    r"|(?:(?P<next>next|this) )?(?P<weekday>" + "|".join(_WEEKDAYS) + r"))\b",
+    re.I,
+)
+_OFFSETS = {"today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2}
+
+
+def split_fragments(text: str) -> list:
+    """Split "X and Y, Z" into its fragments, stripped of quotes and spaces."""
+    return [part.strip('"').strip("'").strip() for part in _SPLIT.split(text)]
+
+
+def _fast_date(text: str, today: date) -> Optional[date]:
+    m = _ISO_DATE.search(text)
+    if m:
+        try:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            pass
+    m = _RELATIVE.search(text)
+    if not m:
+        return None
+    if m.group("offset"):
+        return today + timedelta(days=_OFFSETS[m.group("offset").lower()])
+    # a bare/"this" weekday is its next occurrence from today on; "next" skips today
+    days_ahead = (_WEEKDAYS.index(m.group("weekday").lower()) - today.weekday()) % 7
+    if days_ahead == 0 and (m.group("next") or "").lower() == "next":
+        days_ahead = 7
+    return today + timedelta(days=days_ahead)
+
+
+@lru_cache(maxsize=DATEPARSER_CACHE_SIZE)
+def _dateparser_date(text: str, reference: date) -> Optional[str]:
+    import dateparser   # imported lazily: it loads locale data
+
+    parsed = dateparser.parse(
+        text, settings={"RELATIVE_BASE": datetime.combine(reference, datetime.min.time())})
+    return parsed.strftime("%Y-%m-%d") if parsed else None
+
+
+def parse_date(text: str, today: date = None) -> Optional[str]:
+    """YYYY-MM-DD for the date mentioned in `text`, or None."""
+    today = today or date.today()
+    found = _fast_date(text, today)
+    if found:
+        return found.isoformat()
+    return _dateparser_date(text, today)
+
+
+def parse_times(text: str) -> list:
+    """Time-like tokens in order of appearance ("5pm", "10:00", ...)."""
+    return [m[0] for m in _TIME.findall(text)]
+
+
+def parse_fragment(text: str, today: date = None) -> dict:
+    """Tool kwargs guessed from one fragment: title, date, start/end time, event_id."""
+    kwargs = {"title": text}
+
+    # Bare ids ("3 and #4") for tools taking an event_id
+    id_match = _EVENT_ID.fullmatch(text)
+    if id_match:
+        kwargs["event_id"] = int(id_match.group(1))
+
+    parsed_date = parse_date(text, today)
+    if parsed_date:
+        kwargs["date"] = parsed_date
+
+    # drop ISO dates first so their digits are not read as times
+    times = parse_times(_ISO_DATE.sub(" ", text))
+    if times:
+        kwargs["start_time"] = times[0]
+    if len(times) >= 2:
+        kwargs["end_time"] = times[1]
+    return kwargs
@@ -0,0 +1,83 @@
+# response_cache.py
+"""
+LRU + TTL cache for agent responses.
+
+Keys include the calendar version of the user whose data the tools read
+(db.calendar_version), so any add/update/delete makes older entries
+unreachable; they then age out of the LRU.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from ai.intent_parser import normalize
+from logs import metrics
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))   # seconds
+
+
+class ResponseCache:
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()    # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._expired = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expired": self._expired,
+            }
+
+
+def make_key(user: str, text: str, version: int) -> tuple:
+    """
+    Cache key: user, normalized text, calendar version, and today's date
+    (relative phrases like "tomorrow" change meaning at midnight).
+    """
+    return (user, normalize(text), version, date.today().isoformat())
+
+
+response_cache = ResponseCache()
+metrics.register_stats("response_cache", response_cache.stats)
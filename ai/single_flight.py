@@ -0,0 +1,72 @@
+# single_flight.py
+"""
+Request coalescing ("single flight") for agent queries.
+
+While a query is being answered, identical queries (same key) wait for that
+execution and share its result instead of starting their own LLM round
+trips. Nothing is stored once the call finishes; caching is the job of
+response_cache.
+
+Waiters block their thread, which fits both the threaded Flask server and
+the ASGI app (agent calls run on its executor threads).
+"""
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+from logs import metrics
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}     # key -> Future of the in-flight execution
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    def do(self, key, fn):
+        """
+        Run fn() unless an identical call is in flight, in which case wait
+        for it and return its result (or raise its exception).
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._stats["executions"] += 1
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self._stats["calls"]
+            return {
+                "calls": calls,
+                "executions": self._stats["executions"],
+                "coalesced": self._stats["coalesced"],
+                "coalesced_rate": self._stats["coalesced"] / calls if calls else 0.0,
+                "in_flight": len(self._calls),
+            }
+
+
+agent_flights = SingleFlight()
+metrics.register_stats("agent_flights", agent_flights.stats)
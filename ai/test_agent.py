@@ -1,6 +1,6 @@
 # test_agent.py
 from ai.agent_runner import run_agent
-from db import database as db
+from db.backend import get_backend
 from logs import log_convo
 
 
@@ -20,6 +20,6 @@ def main():
 
 
 if __name__ == "__main__":
-    db.init_db()                        # ensure calendar.db exists
-    log_convo.ensure_memory_exists()    # ensure memory.json exists
+    get_backend().init()                # ensure calendar.db exists
+    log_convo.ensure_memory_exists()    # ensure memory.jsonl exists
     main()
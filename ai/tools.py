@@ -1,21 +1,67 @@
 # tools.py
+import logging
+import re
 from typing import Dict
-import db.database as db
+from db.backend import get_backend
+from logs import metrics
+from logs.logger import get_logger, kv
+
+log = get_logger(__name__)
+
+
+def _log_output(tool: str, output_msg: str):
+    """Tool output at DEBUG, sampled: listings can be the whole calendar."""
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("tool output", extra=kv(sampled=True, tool=tool, lines=output_msg.count("\n") + 1,
+                                          preview=output_msg[:200]))
+
 
 # ============================
 # Create: Add Event
 # ============================
-def add_event_tool(title, date, start_time=None, end_time=None, user="user1"):
+def _flag(value) -> bool:
+    return str(value).lower() in ("true", "1", "yes")
+
+
+def _batch_result(results: list, describe) -> Dict:
+    """Per-item lines for a batch write; success only if every item succeeded."""
+    lines = [
+        describe(r) if r["success"] else f"❌ Item {i}: {r['error']}"
+        for i, r in enumerate(results, start=1)
+    ]
+    output_msg = "\n".join(lines) if lines else "📭 Nothing to do."
+    _log_output("batch", output_msg)
+    return {"success": all(r["success"] for r in results), "message": output_msg, "results": results}
+
+
+def add_event_tool(title, date=None, start_time=None, end_time=None, user="user1",
+                   reject_on_conflict=False, atomic=False):
+    """
+    Adds one event, or - when `title` is a list of event dicts - all of them
+    in a single transaction (atomic=True: all or none).
+    """
+    if isinstance(title, list):
+        events = [{**ev, "reject_on_conflict": _flag(ev.get("reject_on_conflict", reject_on_conflict))}
+                  for ev in title]
+        results = get_backend().add_events(events, user=user, atomic=_flag(atomic))
+        return _batch_result(results, lambda r: (
+            f"✅ Event added: [ID: {r['event'].id}] {r['event'].title} on {r['event'].date} "
+            f"{r['event'].start_time or ''}-{r['event'].end_time or ''}"))
+
+    if not date:
+        return {"success": False, "message": "❌ Could not add event: missing date", "events": []}
     kwargs = {"title": title, "date": date, "user": user}
+    if _flag(reject_on_conflict):
+        kwargs["reject_on_conflict"] = True
     if start_time:
         kwargs["start_time"] = start_time
     if end_time:
         kwargs["end_time"] = end_time
 
     try:
-        event = db.add_event(**kwargs)
-        output_msg = f"✅ Event added: [ID: {event['id']}] {event['title']} on {event['date']} {event.get('start_time','')}-{event.get('end_time','')}"
-        print(output_msg)
+        event = get_backend().add_event(**kwargs)
+        output_msg = f"✅ Event added: [ID: {event.id}] {event.title} on {event.date} {event.start_time or ''}-{event.end_time or ''}"
+        _log_output("add_event_tool", output_msg)
         # Return dictionary with 'message' key
         return {"success": True, "message": output_msg, "events": [event]}
     except Exception as e:
@@ -25,103 +71,152 @@ def add_event_tool(title, date, start_time=None, end_time=None, user="user1"):
 # ============================
 # Read: List Events
 # ============================
-def list_all_events_tool(user: str = "user1") -> Dict:
-    print("DEBUG:===> [[list_all_events_tool]] called with(user):", user)
-    events = db.list_all_events(user=user)
+def list_all_events_tool(user: str = "user1", limit=50, after: str = None) -> Dict:
+    """
+    Lists one page of events (default 50). When more remain, the message ends
+    with the cursor to pass as `after` to fetch the next page.
+    """
+    limit = int(limit)
+    log.debug("list_all_events_tool called", extra=kv(user=user, limit=limit, after=after))
+    events, next_cursor = get_backend().list_events_page(user=user, limit=limit, after=after)
     if not events:
         output_msg = "📭 No events found."
-        print(output_msg)
+        _log_output("list_all_events_tool", output_msg)
         return {"success": True, "message": output_msg}
 
     lines = [
-        f"[{ev['id']}] {ev['title']} on {ev['date']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
+        f"[{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}"
         for ev in events
     ]
+    if next_cursor:
+        lines.append(f"… more events available, call again with after='{next_cursor}'")
     output_msg = "\n".join(lines)
-    print(output_msg)
-    return {"success": True, "message": output_msg, "events": events}
+    _log_output("list_all_events_tool", output_msg)
+    return {"success": True, "message": output_msg, "events": events, "next_cursor": next_cursor}
 
 
 def list_events_on_date_tool(date: str, user: str = "user1") -> Dict:
-    print("DEBUG:===> [[list_events_on_date_tool]] called with(date, user):", date, "==", user)
-    events = db.list_events_on_date(date, user=user)
+    log.debug("list_events_on_date_tool called", extra=kv(date=date, user=user))
+    try:
+        events = get_backend().list_events_on_date(date, user=user)
+    except ValueError as e:
+        return {"success": False, "message": f"❌ Could not list events: {e}", "events": []}
     if not events:
         output_msg = f"📭 No events found on {date}"
-        print(output_msg)
+        _log_output("list_events_on_date_tool", output_msg)
         return {"success": True, "message": output_msg}
 
     lines = [
-        f"[{ev['id']}] {ev['title']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
+        f"[{ev.id}] {ev.title} {ev.start_time or ''}-{ev.end_time or ''}"
         for ev in events
     ]
     output_msg = "\n".join(lines)
-    print(output_msg)
+    _log_output("list_events_on_date_tool", output_msg)
     return {"success": True, "message": output_msg, "events": events}
 
 
 def list_events_by_title_tool(title: str, user: str = "user1") -> Dict:
-    print("DEBUG:===> [[list_events_by_title_tool]] called with(title, user):", title, "==", user)
-    events = db.list_events_by_title(title, user=user)
+    log.debug("list_events_by_title_tool called", extra=kv(title=title, user=user))
+    events = get_backend().list_events_by_title(title, user=user)
     if not events:
         output_msg = f"📭 No events found with title '{title}'"
-        print(output_msg)
+        _log_output("list_events_by_title_tool", output_msg)
         return {"success": True, "message": output_msg}
 
     lines = [
-        f"[{ev['id']}] {ev['title']} on {ev['date']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
+        f"[{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}"
         for ev in events
     ]
     output_msg = "\n".join(lines)
-    print(output_msg)
+    _log_output("list_events_by_title_tool", output_msg)
     return {"success": True, "message": output_msg, "events": events}
 
 
 def list_events_next_n_days_tool(n, user: str = "user1") -> Dict:
     n = int(n)
-    print("DEBUG:===> [[list_events_next_n_days_tool]] called with(n,user):", n, "==", user)
-    events = db.list_events_next_n_days(n, user=user)
+    log.debug("list_events_next_n_days_tool called", extra=kv(n=n, user=user))
+    events = get_backend().list_events_next_n_days(n, user=user)
     if not events:
         output_msg = f"📭 No events in next {n} days"
-        print(output_msg)
+        _log_output("list_events_next_n_days_tool", output_msg)
         return {"success": True, "message": output_msg, "events": []}
 
     lines = [
-        f"[{ev['id']}] {ev['title']} on {ev['date']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
+        f"[{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}"
         for ev in events
     ]
     output_msg = "\n".join(lines)
-    print(output_msg)
+    _log_output("list_events_next_n_days_tool", output_msg)
     return {"success": True, "message": output_msg, "events": events}
 
 
 def list_events_by_keyword_tool(keyword: str, user: str = "user1") -> Dict:
-    print("DEBUG:===> [[list_events_by_keyword_tool]] called with(keyword,user):", keyword, "==", user)
-    events = db.list_all_events(user=user)
-    filtered = [ev for ev in events if keyword.lower() in ev['title'].lower()]
+    log.debug("list_events_by_keyword_tool called", extra=kv(keyword=keyword, user=user))
+    filtered = get_backend().search_events(keyword, user=user)
     
     if not filtered:
         output_msg = f"📭 No events found with keyword '{keyword}'"
-        print(output_msg)
+        _log_output("list_events_by_keyword_tool", output_msg)
         return {"success": True, "message": output_msg, "events": []}
     
     lines = [
-        f"[{ev['id']}] {ev['title']} on {ev['date']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
+        f"[{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}"
         for ev in filtered
     ]
     output_msg = "\n".join(lines)
-    print(output_msg)
+    _log_output("list_events_by_keyword_tool", output_msg)
     return {"success": True, "message": output_msg, "events": filtered}
 
 
+def find_conflicts_tool(date: str, start_time: str, end_time: str = None, user: str = "user1") -> Dict:
+    log.debug("find_conflicts_tool called",
+              extra=kv(date=date, start_time=start_time, end_time=end_time, user=user))
+    try:
+        events = get_backend().find_conflicts(date, start_time, end_time, user=user)
+    except ValueError as e:
+        return {"success": False, "message": f"❌ Could not check conflicts: {e}", "events": []}
+    if not events:
+        output_msg = f"✅ No conflicts on {date} {start_time}-{end_time or ''}"
+        _log_output("find_conflicts_tool", output_msg)
+        return {"success": True, "message": output_msg, "events": []}
+
+    lines = [f"⚠️ {len(events)} conflicting event(s) on {date}:"] + [
+        f"[{ev.id}] {ev.title} {ev.start_time or ''}-{ev.end_time or ''}"
+        for ev in events
+    ]
+    output_msg = "\n".join(lines)
+    _log_output("find_conflicts_tool", output_msg)
+    return {"success": True, "message": output_msg, "events": events}
+
+
+def find_free_slots_tool(date: str, duration=30, end_date: str = None, work_start: str = "09:00",
+                         work_end: str = "17:00", user: str = "user1") -> Dict:
+    log.debug("find_free_slots_tool called", extra=kv(date=date, duration=duration, end_date=end_date,
+                                                      work_start=work_start, work_end=work_end, user=user))
+    try:
+        slots = get_backend().find_free_slots(date, end_date, int(duration), work_start, work_end, user=user, limit=20)
+    except ValueError as e:
+        return {"success": False, "message": f"❌ Could not find free slots: {e}", "slots": []}
+    if not slots:
+        output_msg = f"📭 No free slot of {duration} minutes found"
+        _log_output("find_free_slots_tool", output_msg)
+        return {"success": True, "message": output_msg, "slots": []}
+
+    lines = [f"{s['date']} {s['start_time']}-{s['end_time']} ({s['minutes']} min free)" for s in slots]
+    output_msg = "\n".join(lines)
+    _log_output("find_free_slots_tool", output_msg)
+    return {"success": True, "message": output_msg, "slots": slots}
+
+
 # ============================
 # Update: Update Event
 # ============================
 def update_event_tool(event_id: int, title: str = None, date: str = None,
                       start_time: str = None, end_time: str = None, user: str = "user1") -> Dict:
-    print("DEBUG:===> [[update_event_tool]] called with(event_id, title, date, start_time, end_time, user):",
-          event_id, "==", title, "==", date, "==", start_time, "==", end_time, "==", user)
+    log.debug("update_event_tool called", extra=kv(event_id=event_id, title=title, date=date,
+                                                   start_time=start_time, end_time=end_time, user=user))
     try:
-        success = db.update_event(event_id, title, date, start_time, end_time, user=user)
+        success = get_backend().update_event(event_id, title, date, start_time, end_time, user=user)
         if success:
             output_msg = f"✅ Event {event_id} updated successfully"
         else:
@@ -129,51 +224,99 @@ def update_event_tool(event_id: int, title: str = None, date: str = None,
     except Exception as e:
         output_msg = f"❌ Could not update event: {e}"
 
-    print(output_msg)
+    _log_output("update_event_tool", output_msg)
     return {"success": success if 'success' in locals() else False, "message": output_msg}
 
 
 # ============================
 # Delete: Delete Event
 # ============================
-def delete_event_tool(event_id: int, user: str = "user1") -> Dict:
-    print("DEBUG:===> [[delete_event_tool]] called with(event_id,user):", event_id, "==", user)
+_EVENT_REF = re.compile(r"#?(R?\d+)", re.I)
+
+
+def _resolve_event(item, user: str) -> tuple:
+    """
+    (event id, None) for one batch item - an id ("4", "#4"), a title, or a
+    dict with an "event_id" or "title" - or (None, why it can't be resolved).
+    A title must name exactly one event.
+    """
+    ref, title = (item.get("event_id"), item.get("title")) if isinstance(item, dict) else (item, None)
+    if ref is None and title and _EVENT_REF.fullmatch(str(title).strip()):
+        ref = title
+    if ref is not None:
+        m = _EVENT_REF.fullmatch(str(ref).strip())
+        if m:
+            return (int(m.group(1)) if m.group(1).isdigit() else m.group(1).upper()), None
+        title = title or str(ref)
+    title = (title or "").strip()
+    if not title:
+        return None, "no event id or title"
+    matches = get_backend().list_events_by_title(title, user=user)
+    if not matches:
+        return None, f"No event titled '{title}'"
+    if len(matches) > 1:
+        return None, f"{len(matches)} events titled '{title}', give the event id"
+    return matches[0].id, None
+
 
-    success = db.delete_event(event_id, user=user)
+def delete_event_tool(event_id, user: str = "user1", atomic=False) -> Dict:
+    """
+    Deletes one event, or - when `event_id` is a list (of ids, titles or
+    dicts with an "event_id" or "title") - all of them in a single
+    transaction (atomic=True: all or none). Items that match no single
+    event fail on their own.
+    """
+    log.debug("delete_event_tool called", extra=kv(event_id=event_id, user=user))
+    if isinstance(event_id, list):
+        resolved = [_resolve_event(item, user) for item in event_id]
+        ids = [ref for ref, error in resolved if error is None]
+        if _flag(atomic) and len(ids) < len(resolved):
+            results = [{"success": False, "error": error or "not attempted"} for _, error in resolved]
+        else:
+            deleted = iter(get_backend().delete_events(ids, user=user, atomic=_flag(atomic)))
+            results = [next(deleted) if error is None else {"success": False, "error": error}
+                       for _, error in resolved]
+        return _batch_result(results, lambda r: f"✅ Event {r['event_id']} deleted successfully")
+
+    success = get_backend().delete_event(event_id, user=user)
     output_msg = f"✅ Event {event_id} deleted successfully" if success else f"❌ Event {event_id} not found"
 
-    print(output_msg)
+    _log_output("delete_event_tool", output_msg)
     return {"success": success, "message": output_msg}
 
 def delete_event_by_title_tool(title: str, user: str = "user1") -> Dict:
-    print("DEBUG:===> [[delete_event_by_title_tool]] called with(title,user):", title, "==", user)
+    log.debug("delete_event_by_title_tool called", extra=kv(title=title, user=user))
     try:
-        deleted = db.delete_event_by_title(title, user=user)
+        deleted = get_backend().delete_event_by_title(title, user=user)
         output_msg = f"✅ Event(s) with title '{title}' deleted" if deleted else f"📭 No event found with title '{title}'"
         success = True
     except Exception as e:
         output_msg = f"❌ Could not delete: {e}"
         success = False
 
-    print(output_msg)
+    _log_output("delete_event_by_title_tool", output_msg)
     return {"success": success, "message": output_msg}
 
 def delete_all_events_tool(user: str = "user1") -> dict:
-    print("DEBUG:===> [[delete_all_events_tool]] called with(user):", user)
+    log.debug("delete_all_events_tool called", extra=kv(user=user))
     try:
-        db.delete_all_events(user=user)
+        get_backend().delete_all_events(user=user)
         output_msg = f"All events for {user} deleted successfully."
         success = True
     except Exception as e:
         output_msg = str(e)
         success = False
 
-    print(output_msg)
+    _log_output("delete_all_events_tool", output_msg)
     return {"success": success, "message": output_msg}
 
 # ============================
 # TOOL MAPPING
 # ============================
+# Tools whose first argument also accepts a list: the agent passes every item
+# parsed from one input in a single call, so they are written in one transaction.
+BATCH_TOOLS = {"add_event_tool", "delete_event_tool"}
+
 TOOL_MAPPING = {
     "add_event_tool": add_event_tool,
     "list_all_events_tool": list_all_events_tool,
@@ -184,5 +327,10 @@ TOOL_MAPPING = {
     "update_event_tool": update_event_tool,
     "delete_event_tool": delete_event_tool,
     "delete_event_by_title_tool": delete_event_by_title_tool,
-    "list_events_by_keyword_tool": list_events_by_keyword_tool
+    "list_events_by_keyword_tool": list_events_by_keyword_tool,
+    "find_conflicts_tool": find_conflicts_tool,
+    "find_free_slots_tool": find_free_slots_tool
 }
+
+# Time every tool call (see logs/metrics.py)
+TOOL_MAPPING = {name: metrics.timed(f"tool.{name}")(fn) for name, fn in TOOL_MAPPING.items()}
@@ -1,12 +1,13 @@
-from flask import Flask, request, jsonify, render_template
-from ai.tools import TOOL_MAPPING
-from ai.agent_runner import run_agent
-from db import database as db
+from flask import Flask, Response, request, jsonify, render_template
+from db.backend import get_backend
+import web_handlers as handlers
 
 app = Flask(__name__)
 
 # Ensure DB exists
-db.init_db()
+get_backend().init()
+
+# Request handling lives in web_handlers.py, shared with the ASGI app (asgi_app.py)
 
 # -------------------------------
 # Home page
@@ -21,26 +22,17 @@ def home():
 # -------------------------------
 @app.route("/run_cli", methods=["POST"])
 def run_cli():
-    data = request.json
-    cmd = data.get("command", "")
-    if not cmd:
-        return jsonify({"error": "No command provided"}), 400
+    body, status = handlers.run_cli(request.json)
+    return jsonify(body), status
 
-    import shlex
 
-    parts = shlex.split(cmd)
-    tool_name = parts[0] + "_tool"
-    args = parts[1:]
-    if tool_name in TOOL_MAPPING:
-        kwargs = {}
-        for a in args:
-            if "=" in a:
-                k, v = a.split("=", 1)
-                kwargs[k] = v.strip("'\"")
-        result = TOOL_MAPPING[tool_name](**kwargs)
-        return jsonify({"response": result.get("message", str(result))})
-    else:
-        return jsonify({"response": f"Tool '{tool_name}' not found"})
+# -------------------------------
+# Paginated event listing (JSON)
+# -------------------------------
+@app.route("/events", methods=["GET"])
+def list_events():
+    body, status = handlers.list_events(request.args)
+    return jsonify(body), status
 
 
 # -------------------------------
@@ -48,42 +40,16 @@ def run_cli():
 # -------------------------------
 @app.route("/parse_command", methods=["POST"])
 def parse_command():
-    data = request.json
-    text = data.get("text")
-    if not text:
-        return jsonify({"error": "No command provided"}), 400
-
-    from ai.agent_runner import run_agent
-    import json
-
-    try:
-        result_str = run_agent(text, user="user_shreya")
-        print("Agent output:", result_str)
+    body, status = handlers.parse_command(request.json)
+    return jsonify(body), status
 
-        # If agent fails, always return generic message
-        if "❌ Agent failed:" in result_str:
-            return jsonify({"error": "❌ Agent failed"})
 
-        # Try JSON parse
-        try:
-            parsed_result = json.loads(result_str)
-            if isinstance(parsed_result, dict) and "events" in parsed_result:
-                event = parsed_result["events"][0] if parsed_result["events"] else {}
-                response = {
-                    "title": event.get("title", ""),
-                    "date": event.get("date", ""),
-                    "start_time": event.get("start_time", ""),
-                    "end_time": event.get("end_time", ""),
-                    "message": event.get("message", "")
-                }
-            else:
-                response = {"message": str(parsed_result)}
-        except Exception:
-            # fallback to plain text, but only if it didn't fail
-            response = {"message": result_str}
-
-        return jsonify(response)
-
-    except Exception:
-        # If anything goes wrong in your Flask handler, return generic failure
-        return jsonify({"error": "❌ Agent failed"}), 500
+# -------------------------------
+# Latency metrics
+# -------------------------------
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    body, status = handlers.metrics_export(request.args.get("format"))
+    if isinstance(body, str):
+        return Response(body, status=status, mimetype="text/plain; version=0.0.4")
+    return jsonify(body), status
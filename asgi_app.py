@@ -0,0 +1,124 @@
+# asgi_app.py
+"""
+ASGI variant of app.py (run with: uvicorn asgi_app:app --workers 1).
+
+The routes and responses are the same as the Flask app (both use
+web_handlers.py), but nothing blocks the event loop:
+  - agent calls (Gemini round trips) run on a bounded executor, at most
+    AGENT_CONCURRENCY at a time; a request that cannot get a slot within
+    AGENT_QUEUE_TIMEOUT seconds gets a 503 instead of piling up
+  - database calls run on a separate thread pool (DB_WORKERS), so a burst of
+    slow agent requests never starves cheap listings
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.templating import Jinja2Templates
+
+from db.backend import get_backend
+from db.database import POOL_SIZE
+from logs import metrics
+import web_handlers as handlers
+
+AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", "8"))
+AGENT_QUEUE_TIMEOUT = float(os.getenv("AGENT_QUEUE_TIMEOUT", "30"))
+DB_WORKERS = int(os.getenv("DB_WORKERS", str(POOL_SIZE)))
+
+_agent_executor = ThreadPoolExecutor(max_workers=AGENT_CONCURRENCY, thread_name_prefix="agent")
+_db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+_agent_slots = asyncio.Semaphore(AGENT_CONCURRENCY)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    _agent_executor.shutdown(wait=False, cancel_futures=True)
+    _db_executor.shutdown(wait=True)
+
+
+app = FastAPI(lifespan=lifespan)
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates"))
+
+# Ensure DB exists
+get_backend().init()
+
+
+async def _in_thread(executor, fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+def _respond(result):
+    body, status = result
+    return JSONResponse(body, status_code=status)
+
+
+async def _json_body(request: Request) -> dict:
+    try:
+        return await request.json()
+    except ValueError:
+        return {}
+
+
+# -------------------------------
+# Home page
+# -------------------------------
+@app.get("/")
+async def home(request: Request):
+    return templates.TemplateResponse(request, "index.html")
+
+
+# -------------------------------
+# Run CLI commands
+# -------------------------------
+@app.post("/run_cli")
+async def run_cli(request: Request):
+    return _respond(await _in_thread(_db_executor, handlers.run_cli, await _json_body(request)))
+
+
+# -------------------------------
+# Paginated event listing (JSON)
+# -------------------------------
+@app.get("/events")
+async def list_events(request: Request):
+    return _respond(await _in_thread(_db_executor, handlers.list_events, dict(request.query_params)))
+
+
+# -------------------------------
+# Run AI agent (natural language)
+# -------------------------------
+@app.post("/parse_command")
+async def parse_command(request: Request):
+    with metrics.span("web.parse_command"):
+        text, error = handlers.parse_command_text(await _json_body(request))
+        if error:
+            return _respond(error)
+
+        try:
+            with metrics.span("web.agent_queue"):
+                await asyncio.wait_for(_agent_slots.acquire(), AGENT_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return JSONResponse({"error": "❌ Agent busy, try again later"}, status_code=503)
+        try:
+            from ai.agent_runner import run_agent
+            result_str = await _in_thread(_agent_executor, run_agent, text, handlers.WEB_USER)
+            return _respond(handlers.format_agent_result(result_str))
+        except Exception:
+            # If anything goes wrong in the handler, return generic failure
+            return JSONResponse({"error": "❌ Agent failed"}, status_code=500)
+        finally:
+            _agent_slots.release()
+
+
+# -------------------------------
+# Latency metrics
+# -------------------------------
+@app.get("/metrics")
+async def metrics_endpoint(request: Request):
+    body, status = handlers.metrics_export(request.query_params.get("format"))
+    if isinstance(body, str):
+        return PlainTextResponse(body, status_code=status, media_type="text/plain; version=0.0.4")
+    return JSONResponse(body, status_code=status)
@@ -0,0 +1,106 @@
+# asgi_load.py
+"""
+[user-016] Throughput of agent requests through asgi_app under uvicorn, and
+/events latency while they are in flight.
+
+The agent is a stub that takes --agent-ms (a Gemini round trip) and the
+inputs never match the fast path, so every request holds an agent slot.
+
+    python -m bench.asgi_load [--agent-ms 200] [--agent-concurrency 16] [--requests 64]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import threading
+import time
+
+from bench.common import day, percentile, temp_database
+
+
+class _StubAgent:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def run(self, question: str) -> str:
+        time.sleep(self.delay)
+        return "stub reply"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agent-ms", type=float, default=200, help="stub agent latency per request")
+    parser.add_argument("--agent-concurrency", type=int, default=16, help="AGENT_CONCURRENCY for the server")
+    parser.add_argument("--requests", type=int, default=64, help="agent requests per concurrency level")
+    args = parser.parse_args()
+    os.environ["AGENT_CONCURRENCY"] = str(args.agent_concurrency)
+    os.environ.setdefault("GEMINI_API_KEY", "dummy")
+
+    import httpx
+    import uvicorn
+    from ai import agent_runner
+
+    agent_runner.build_agent = lambda context, llm=None: _StubAgent(args.agent_ms / 1000)
+
+    with temp_database() as db:
+        import asgi_app     # initialises the backend on import: only once the temporary database is set
+
+        for i in range(200):
+            db.add_event(f"Event {i}", day(i % 30), f"{8 + i % 10}:00")
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(asgi_app.app, port=port, log_level="error"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+        counter = itertools.count()
+
+        async def agent_load(client, concurrency: int) -> float:
+            slots = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with slots:
+                    r = await client.post("/parse_command", json={"text": f"please sort out thing {next(counter)}"})
+                    r.raise_for_status()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(args.requests)))
+            return args.requests / (time.perf_counter() - start)
+
+        async def events_latency(client, samples: int = 50) -> list:
+            latencies = []
+            for _ in range(samples):
+                start = time.perf_counter()
+                (await client.get("/events", params={"limit": 20})).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+        async def run():
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+                print(f"stub agent {args.agent_ms:.0f} ms, AGENT_CONCURRENCY={args.agent_concurrency}, "
+                      f"{args.requests} requests per level")
+                for concurrency in (1, 4, 16, 32):
+                    print(f"  concurrency {concurrency:>2}: {await agent_load(client, concurrency):7.1f} req/s")
+                idle = await events_latency(client)
+                busy_task = asyncio.ensure_future(agent_load(client, 32))
+                await asyncio.sleep(args.agent_ms / 1000)
+                busy = await events_latency(client)
+                await busy_task
+                for label, latencies in (("idle", idle), ("32 agent requests in flight", busy)):
+                    print(f"  GET /events, {label:<28} p50 {percentile(latencies, 50) * 1e3:6.1f} ms   "
+                          f"p99 {percentile(latencies, 99) * 1e3:6.1f} ms")
+
+        try:
+            asyncio.run(run())
+        finally:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
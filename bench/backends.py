@@ -0,0 +1,78 @@
+"""
+[user-023] The same workload on each storage backend (SQLite on disk vs the
+in-memory engine), run through get_backend() as the tools and handlers do:
+bulk import, single writes, day / range / paged listings, search, free slots.
+
+    python -m bench.backends [--events 50000] [--writes 500]
+"""
+import argparse
+
+from bench.common import day, report, temp_database, timed
+from db.backend import BACKENDS, get_backend, set_backend
+
+USER = "u"
+
+
+def workload(events: int, writes: int) -> list:
+    """(label, fn, repeat) cases run against whatever get_backend() returns."""
+    rows = [{"title": f"Event {i}", "date": day(i % 365), "start_time": f"{8 + i % 10}:00",
+             "end_time": f"{9 + i % 10}:00"} for i in range(events)]
+    counter = iter(range(10 ** 9))
+
+    def import_all():
+        backend = get_backend()
+        backend.delete_all_events(USER)
+        backend.import_events(rows, user=USER)
+
+    def add_and_delete():
+        backend = get_backend()
+        ids = [backend.add_event(f"Write {next(counter)}", day(400), "10:00", user=USER).id
+               for _ in range(writes)]
+        backend.delete_events(ids, user=USER)
+
+    def update():
+        backend = get_backend()
+        [ev] = backend.list_events_by_title("Event 0", USER)
+        backend.update_event(ev.id, start_time=f"{8 + next(counter) % 10}:00", user=USER)
+
+    return [
+        (f"import_events({events})", import_all, 3),
+        (f"{writes} add_event + delete_events", add_and_delete, 3),
+        ("update_event", update, 200),
+        ("list_events_on_date", lambda: get_backend().list_events_on_date(day(7), USER), 200),
+        ("list_events_next_n_days(30)", lambda: get_backend().list_events_next_n_days(30, USER), 20),
+        ("list_events_page x10 (limit 100)", lambda: page_through(10), 20),
+        ("iter_all_events", lambda: sum(1 for _ in get_backend().iter_all_events(USER, batch_size=1000)), 3),
+        ("search_events('event 12')", lambda: get_backend().search_events("event 12", USER), 20),
+        ("find_free_slots over a week", lambda: get_backend().find_free_slots(day(0), day(6), 30, user=USER), 20),
+    ]
+
+
+def page_through(pages: int):
+    after = None
+    for _ in range(pages):
+        _, after = get_backend().list_events_page(USER, 100, after)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--writes", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.events} events, {args.writes} writes per round")
+    for name in sorted(BACKENDS):
+        with temp_database():
+            backend = BACKENDS[name]()
+            backend.init()
+            previous = set_backend(backend)
+            try:
+                print(name)
+                for label, fn, number in workload(args.events, args.writes):
+                    report(label, timed(fn, repeat=5, number=number), "ms")
+            finally:
+                set_backend(previous)
+
+
+if __name__ == "__main__":
+    main()
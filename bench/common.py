@@ -0,0 +1,72 @@
+# common.py
+"""
+Helpers shared by the benchmark scripts: a throwaway database and timers.
+
+Run a benchmark from the project root, e.g. `python -m bench.connection_pool`.
+Nothing touches calendar.db or memory.jsonl: every script works in a
+temporary directory that is removed afterwards.
+"""
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+
+@contextmanager
+def temp_database(sharded: bool = False):
+    """
+    Point db.database at a new calendar.db (or, with `sharded`, a shard
+    directory) in a temporary directory; yields the module.
+    """
+    from db import database
+    from logs import log_convo
+
+    tmp = tempfile.mkdtemp(prefix="calendar-bench-")
+    saved = database.DB_NAME, database.SHARD_DIR, log_convo.LOG_FILE, log_convo.MEMORY_FILE
+    database.DB_NAME = os.path.join(tmp, "calendar.db")
+    database.SHARD_DIR = os.path.join(tmp, "shards") if sharded else None
+    log_convo.LOG_FILE = os.path.join(tmp, "memory.jsonl")
+    log_convo.MEMORY_FILE = os.path.join(tmp, "memory.json")
+    database.day_cache.clear()
+    try:
+        database.init_db()
+        yield database
+    finally:
+        log_convo.flush()
+        database.close_pools()
+        database._initialized.clear()
+        database.day_cache.clear()
+        database.DB_NAME, database.SHARD_DIR, log_convo.LOG_FILE, log_convo.MEMORY_FILE = saved
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def day(offset: int) -> str:
+    """ISO date `offset` days from today."""
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+def timed(fn, repeat: int = 5, number: int = 1) -> list:
+    """Seconds per call of `fn` over `repeat` rounds of `number` calls (after one warm-up call)."""
+    fn()
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return rounds
+
+
+def report(label: str, rounds: list, unit: str = "ms", extra: str = ""):
+    """One line: best and median of `rounds` (seconds) in `unit` ("s", "ms" or "us")."""
+    scale = {"s": 1, "ms": 1e3, "us": 1e6}[unit]
+    print(f"  {label:<40} best {min(rounds) * scale:9.3f} {unit}   median {statistics.median(rounds) * scale:9.3f} {unit}"
+          + (f"   {extra}" if extra else ""))
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
@@ -0,0 +1,74 @@
+# connection_pool.py
+"""
+[user-001] Pooled WAL connections vs. a connection opened per call.
+
+The baseline reproduces the old access pattern: sqlite3.connect() with
+default settings (rollback journal, no statement reuse across calls) for
+every query and every write, on a copy of the same database.
+
+    python -m bench.connection_pool [--events 2000] [--calls 2000]
+"""
+import argparse
+import sqlite3
+
+from bench.common import day, report, temp_database, timed
+
+READ_SQL = """
+    SELECT id, user, title, date, start_time, end_time
+    FROM events
+    WHERE user=? AND title=?
+    ORDER BY day ASC, start_min ASC, id ASC
+"""
+INSERT_SQL = "INSERT INTO events (user, title, date, start_time, day, start_min) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000, help="events in the calendar")
+    parser.add_argument("--calls", type=int, default=2000, help="calls per measured round")
+    args = parser.parse_args()
+
+    with temp_database() as db:
+        db.import_events(({"title": f"Meeting {i % 50}", "date": day(i % 365), "start_time": f"{8 + i % 10}:00"}
+                          for i in range(args.events)), user="u")
+        baseline = db.DB_NAME + ".baseline"
+        source, conn = sqlite3.connect(db.DB_NAME), sqlite3.connect(baseline)
+        source.backup(conn)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        source.close()
+        conn.close()
+
+        def read_per_call():
+            conn = sqlite3.connect(baseline)
+            try:
+                conn.execute(READ_SQL, ("u", "Meeting 7")).fetchall()
+            finally:
+                conn.close()
+
+        counter = iter(range(10 ** 9))
+
+        def write_per_call():
+            i = next(counter)
+            conn = sqlite3.connect(baseline)
+            try:
+                with conn:
+                    conn.execute(INSERT_SQL, ("w", f"w{i}", day(1), "10:00", 0, 600))
+            finally:
+                conn.close()
+
+        def write_pooled():
+            i = next(counter)
+            db.add_event(f"w{i}", day(1), "10:00", user="w")
+
+        print(f"{args.events} events, {args.calls} calls per round")
+        print("reads (events by title):")
+        report("connection per call", timed(read_per_call, number=args.calls), "us")
+        report("pooled", timed(lambda: db.list_events_by_title("Meeting 7", "u"), number=args.calls), "us")
+        writes = max(1, args.calls // 10)
+        print("writes (one insert, one commit):")
+        report("connection per call, rollback journal", timed(write_per_call, number=writes), "us")
+        report("pooled, WAL + synchronous=NORMAL", timed(write_pooled, number=writes), "us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# event_rows.py
+"""
+[user-020] Listings returning Event named tuples built by a row factory vs.
+the old dicts zipped from fetched tuples: time and memory (tracemalloc).
+Also list_recurring_events with its recurrence_row factory vs. zipping.
+
+    python -m bench.event_rows [--events 200000] [--rules 2000]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from bench.common import day, report, temp_database, timed
+
+EVENT_SQL = """
+    SELECT id, user, title, date, start_time, end_time
+    FROM events
+    WHERE user=?
+    ORDER BY day ASC, start_min ASC, id ASC
+"""
+EXCEPTION_SQL = """
+    SELECT x.recurrence_id, x.date
+    FROM recurrence_exceptions x JOIN recurrences r ON r.id = x.recurrence_id
+    WHERE r.user=?
+    ORDER BY x.date
+"""
+RULE_SQL = """
+    SELECT id, user, title, start_date, start_time, end_time, freq, every, until, occurrences
+    FROM recurrences
+    WHERE user=?
+    ORDER BY start_date ASC, start_time ASC
+"""
+
+
+def old_events(db, user: str) -> list:
+    """Fetched tuples, then one dict per row with the key list rebuilt each time."""
+    with db._cursor(user, create=False) as cur:
+        cur.execute(EVENT_SQL, (user,))
+        rows = cur.fetchall()
+        return [dict(zip(["id", "user", "title", "date", "start_time", "end_time"], row)) for row in rows]
+
+
+def old_rules(db, user: str) -> list:
+    """list_recurring_events zipping each fetched tuple into a dict."""
+    with db._cursor(user, create=False) as cur:
+        cur.execute(EXCEPTION_SQL, (user,))
+        exceptions = {}
+        for rule_id, exc_date in cur.fetchall():
+            exceptions.setdefault(rule_id, []).append(exc_date)
+        cur.execute(RULE_SQL, (user,))
+        rows = cur.fetchall()
+    rules = [dict(zip(["id", "user", "title", "date", "start_time", "end_time", "freq", "every", "until",
+                       "occurrences"], row)) for row in rows]
+    for rule in rules:
+        rule["exceptions"] = exceptions.get(rule["id"], [])
+    return rules
+
+
+def memory(fn) -> str:
+    """MB still held by fn's result, and the peak while building it."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return f"held {held / 2 ** 20:6.1f} MB  peak {peak / 2 ** 20:6.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--rules", type=int, default=2000)
+    args = parser.parse_args()
+
+    with temp_database() as db:
+        db.import_events(({"title": f"Event {i}", "date": day(i % 3650), "start_time": f"{8 + i % 10}:00",
+                           "end_time": f"{9 + i % 10}:00"} for i in range(args.events)), user="u")
+        for i in range(args.rules):
+            db.add_recurring_event(f"Rule {i}", day(i % 365), "weekly", occurrences=10, start_time="12:00",
+                                   user="r")
+        cases = [
+            ("list_all_events: old dicts", lambda: old_events(db, "u")),
+            ("list_all_events: Event rows", lambda: db.list_all_events("u")),
+            ("list_events_next_n_days(365)", lambda: db.list_events_next_n_days(365, "u")),
+            ("iter_all_events(batch_size=1000)", lambda: sum(1 for _ in db.iter_all_events("u", batch_size=1000))),
+            ("list_recurring_events: old dicts", lambda: old_rules(db, "r")),
+            ("list_recurring_events: row factory", lambda: db.list_recurring_events("r")),
+        ]
+        print(f"{args.events} events, {args.rules} recurring rules")
+        for label, fn in cases:
+            report(label, timed(fn, repeat=5), "ms", memory(fn))
+
+
+if __name__ == "__main__":
+    main()
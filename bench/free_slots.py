@@ -0,0 +1,52 @@
+# free_slots.py
+"""
+[user-011] find_free_slots: one range scan and one sweep per day, vs. one
+listing per day with the busy times parsed from the text columns (what a
+caller had to do before, e.g. the agent walking list_events_on_date).
+
+    python -m bench.free_slots [--events 100000] [--users 1]
+"""
+import argparse
+from datetime import date, timedelta
+
+from bench.common import day, report, temp_database, timed
+from db.scheduling import free_slots
+from db.timeutil import event_interval
+
+
+def per_day_listing(db, start: str, days: int, duration: int, user: str) -> int:
+    found, first = 0, date.fromisoformat(start)
+    for offset in range(days):
+        db.day_cache.clear()
+        events = db.list_events_on_date((first + timedelta(days=offset)).isoformat(), user)
+        busy = sorted(filter(None, (event_interval(ev.start_time, ev.end_time) for ev in events)))
+        found += len(free_slots(busy, 9 * 60, 17 * 60, duration))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000, help="events per user, spread over one year")
+    parser.add_argument("--users", type=int, default=1, help="users sharing the database")
+    args = parser.parse_args()
+
+    with temp_database() as db:
+        for u in range(args.users):
+            db.import_events(({"title": f"Busy {i}", "date": day(i % 365),
+                               "start_time": f"{7 + i % 12}:{(i * 7) % 60:02d}",
+                               "end_time": f"{8 + i % 12}:{(i * 7) % 60:02d}"} for i in range(args.events)),
+                             user=f"user{u}")
+        db.add_recurring_event("Standup", day(0), "daily", start_time="09:00", end_time="09:15", user="user0")
+        print(f"{args.events} events per user over 365 days, {args.users} user(s), plus a daily recurring event")
+        for days in (7, 31, 365):
+            end = day(days - 1)
+            slots = len(db.find_free_slots(day(0), end, 30, user="user0"))
+            report(f"find_free_slots, {days} days", timed(lambda: db.find_free_slots(day(0), end, 30, user="user0"),
+                                                          repeat=3), "ms", f"{slots} slots")
+            report(f"one listing per day, {days} days",
+                   timed(lambda: per_day_listing(db, day(0), days, 30, "user0"), repeat=3), "ms",
+                   f"{per_day_listing(db, day(0), days, 30, 'user0')} slots")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# intent_fast_path.py
+"""
+[user-007] run_agent with and without the rule-based intent fast path.
+
+The LLM is a stub that answers after --llm-ms (a Gemini round trip), so
+the numbers show the agent overhead plus the latency the fast path skips.
+The response cache is cleared before every call.
+
+    python -m bench.intent_fast_path [--llm-ms 300] [--rounds 3]
+"""
+import argparse
+import os
+import statistics
+import time
+import warnings
+
+from bench.common import day, temp_database
+
+# a typical mix: common commands the rules cover, and requests only the LLM can handle
+COMMANDS = [
+    "show all events",
+    "list my events",
+    f"list events on {day(1)}",
+    "what do i have tomorrow",
+    "show events for the next 7 days",
+    "find events titled Standup",
+    "search for review",
+    "show events this week",
+    "delete the events titled Standup",
+    "add meeting with Sam next friday at 3pm",
+    "move my dentist appointment to the afternoon",
+    "am I free on thursday morning?",
+]
+
+
+def _stub_llm(delay: float):
+    from langchain_community.llms.fake import FakeListLLM
+
+    class SlowFakeLLM(FakeListLLM):
+        def _call(self, *args, **kwargs):
+            time.sleep(delay)
+            return super()._call(*args, **kwargs)
+
+    return SlowFakeLLM(responses=["Final Answer: done"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-ms", type=float, default=300, help="stub LLM latency per call")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the command mix")
+    args = parser.parse_args()
+    os.environ.setdefault("GEMINI_API_KEY", "dummy")
+
+    from ai import agent_runner, intent_parser
+    from ai.response_cache import response_cache
+
+    with temp_database() as db:
+        for i in range(20):
+            db.add_event(["Standup", "Design review", "Lunch"][i % 3], day(i % 7), f"{9 + i % 8}:00",
+                         user=agent_runner.AGENT_USER)
+        agent_runner._llm = _stub_llm(args.llm_ms / 1000)
+        warnings.simplefilter("ignore", DeprecationWarning)     # set after LangChain's own filters
+
+        def run(fast_path: bool) -> dict:
+            match_intent = intent_parser.match_intent
+            if not fast_path:
+                intent_parser.match_intent = lambda text: None
+            times = {}
+            try:
+                for _ in range(args.rounds):
+                    for command in COMMANDS:
+                        response_cache.clear()
+                        start = time.perf_counter()
+                        agent_runner.run_agent(command)
+                        times.setdefault(command, []).append(time.perf_counter() - start)
+            finally:
+                intent_parser.match_intent = match_intent
+            return times
+
+        run(True)   # warm up LangChain imports and the agent
+        baseline, fast = run(False), run(True)
+
+    hits = [command for command in COMMANDS if intent_parser.match_intent(command)]
+    print(f"stub LLM latency {args.llm_ms:.0f} ms, {len(COMMANDS)} commands x {args.rounds} rounds, "
+          f"fast-path hits {len(hits)}/{len(COMMANDS)}")
+    print(f"  {'command':<48} {'LLM only':>10} {'fast path':>10}")
+    for command in COMMANDS:
+        print(f"  {command:<48} {statistics.median(baseline[command]) * 1e3:8.1f}ms "
+              f"{statistics.median(fast[command]) * 1e3:8.1f}ms{'  (hit)' if command in hits else ''}")
+    total_base = sum(map(statistics.median, baseline.values()))
+    total_fast = sum(map(statistics.median, fast.values()))
+    print(f"  {'mean per command':<48} {total_base / len(COMMANDS) * 1e3:8.1f}ms "
+          f"{total_fast / len(COMMANDS) * 1e3:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
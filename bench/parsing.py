@@ -0,0 +1,92 @@
+# parsing.py
+"""
+[user-015] Raw tool-input parsing (ai/parsing.py) vs. the old inline
+heuristic: patterns compiled on every call and dateparser run on every
+fragment.
+
+Inputs are the user messages in memory.json (or --file, a JSON list of
+{"role", "message"}). dateparser is warmed up before anything is timed.
+
+    python -m bench.parsing [--file memory.json] [--rounds 5]
+"""
+import argparse
+import json
+import os
+import re
+import time
+from datetime import date
+
+from ai import parsing
+from bench.common import report
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def old_parse(input_str: str) -> list:
+    """make_tool's raw-text branch before ai/parsing.py."""
+    import dateparser
+
+    kwargs_list = []
+    for event_text in re.split(r"\band\b|,", input_str):
+        event_text = event_text.strip('"').strip("'").strip()
+        kwargs = {"title": event_text}
+        id_match = re.fullmatch(r"#?(\d+)", event_text)
+        if id_match:
+            kwargs["event_id"] = int(id_match.group(1))
+        parsed_date = dateparser.parse(event_text)
+        if parsed_date:
+            kwargs["date"] = parsed_date.strftime("%Y-%m-%d")
+        time_matches = [m[0] for m in re.findall(r"(\d{1,2}(:\d{2})?\s?(am|pm)?)", event_text, re.I)]
+        if time_matches:
+            kwargs["start_time"] = time_matches[0]
+        if len(time_matches) >= 2:
+            kwargs["end_time"] = time_matches[1]
+        kwargs_list.append(kwargs)
+    return kwargs_list
+
+
+def new_parse(input_str: str, today: date) -> list:
+    return [parsing.parse_fragment(fragment, today) for fragment in parsing.split_fragments(input_str)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=os.path.join(PROJECT_ROOT, "memory.json"),
+                        help="conversation log (JSON list)")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    with open(args.file) as f:
+        inputs = [m["message"] for m in json.load(f) if m.get("role") == "user" and m.get("message")]
+    today = date.today()
+    fragments = [fragment for text in inputs for fragment in parsing.split_fragments(text)]
+    direct = sum(1 for fragment in fragments if parsing._fast_date(fragment, today))
+
+    import dateparser
+    dateparser.parse("tomorrow at 5pm")    # load locale data before timing
+
+    def cold():
+        parsing._dateparser_date.cache_clear()
+        for text in inputs:
+            new_parse(text, today)
+
+    def warm():
+        for text in inputs:
+            new_parse(text, today)
+
+    def old():
+        for text in inputs:
+            old_parse(text)
+
+    print(f"{len(inputs)} inputs, {len(fragments)} fragments; {direct} resolved without dateparser")
+    for label, fn in (("old: dateparser per fragment", old), ("new, cold dateparser memo", cold),
+                      ("new, warm dateparser memo", warm)):
+        rounds = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            fn()
+            rounds.append((time.perf_counter() - start) / len(inputs))
+        report(label, rounds, "us", f"{1 / min(rounds):,.0f} inputs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# search.py
+"""
+[user-013] search_events through the FTS5 index and through the title scan,
+vs. the old keyword tool (every event of the user, substring match in Python).
+
+Two layouts: many users with small calendars, and one large calendar.
+
+    python -m bench.search [--users 200] [--per-user 1000] [--large 200000]
+"""
+import argparse
+import random
+
+from bench.common import day, report, temp_database, timed
+
+WORDS = ["project", "review", "standup", "planning", "retro", "lunch", "dentist", "sync", "budget", "café"]
+QUERIES = ["interview", "proj rev", "zebra", "cafe"]
+
+
+def _titles(n: int, rnd: random.Random):
+    for i in range(n):
+        words = rnd.sample(WORDS, 2)
+        if i % 5 == 0:
+            words.append("interview")           # a common word: 20% of titles
+        if i % 10_000 == 0:
+            words.append("zebra")               # a rare one
+        yield " ".join(words) + f" {i % 300}"
+
+
+def _fill(db, user: str, n: int, rnd: random.Random):
+    db.import_events(({"title": title, "date": day(i % 365), "start_time": f"{8 + i % 10}:00"}
+                      for i, title in enumerate(_titles(n, rnd))), user=user)
+
+
+def _compare(db, user: str):
+    threshold = db.SEARCH_SCAN_THRESHOLD
+    try:
+        for query in QUERIES:
+            print(f"  {query!r}:")
+            hits = len(db.search_events(query, user))
+            old = [ev for ev in db.list_all_events(user) if query.lower() in ev.title.lower()]
+            report("old: list all + substring", timed(
+                lambda: [ev for ev in db.list_all_events(user) if query.lower() in ev.title.lower()], repeat=3),
+                "ms", f"{len(old)} matches")
+            db.SEARCH_SCAN_THRESHOLD = 0
+            report("FTS5", timed(lambda: db.search_events(query, user), repeat=3), "ms", f"{hits} returned")
+            db.SEARCH_SCAN_THRESHOLD = 2 ** 62
+            report("title scan", timed(lambda: db.search_events(query, user), repeat=3), "ms")
+            db.SEARCH_SCAN_THRESHOLD = threshold
+    finally:
+        db.SEARCH_SCAN_THRESHOLD = threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="users in the many-calendars layout")
+    parser.add_argument("--per-user", type=int, default=1000, help="events per user in that layout")
+    parser.add_argument("--large", type=int, default=200_000, help="events in the one-calendar layout")
+    args = parser.parse_args()
+    rnd = random.Random(1)
+
+    with temp_database() as db:
+        for u in range(args.users):
+            _fill(db, f"user{u}", args.per_user, rnd)
+        print(f"{args.users} users x {args.per_user} events (search_events picks the "
+              f"{'FTS5 index' if args.per_user >= db.SEARCH_SCAN_THRESHOLD else 'title scan'} here)")
+        _compare(db, "user7")
+
+    with temp_database() as db:
+        _fill(db, "big", args.large, rnd)
+        print(f"1 user x {args.large} events (search_events picks the "
+              f"{'FTS5 index' if args.large >= db.SEARCH_SCAN_THRESHOLD else 'title scan'} here)")
+        _compare(db, "big")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# shards.py
+"""
+[user-022] One shared calendar.db vs. a database file per user
+(CALENDAR_DB_SHARD_DIR).
+
+  1. Commit throughput with 1-8 writer threads, one user each.
+  2. One user bulk-importing while another adds an event every 2 ms: the
+     second user's write latency and failures ("database is locked" after
+     the 5 s busy timeout when they share the file).
+
+    python -m bench.shards [--commits 300] [--import-rows 100000]
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.common import percentile, temp_database
+
+
+def throughput(db, writers: int, commits: int) -> float:
+    def work(user):
+        for i in range(commits):
+            db.add_event(f"w{i}", f"2030-01-{i % 28 + 1:02d}", f"{i % 24:02d}:{i % 60:02d}", user=user)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(writers) as pool:
+        list(pool.map(work, [f"writer{writers}-{k}" for k in range(writers)]))
+    return writers * commits / (time.perf_counter() - start)
+
+
+def write_during_import(db, rows: int) -> tuple:
+    done = threading.Event()
+    latencies, failures = [], 0
+
+    def small_writes():
+        nonlocal failures
+        i = 0
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                db.add_event(f"s{i}", "2031-01-01", f"{i % 24:02d}:{i % 60:02d}", user="small")
+                latencies.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                failures += 1
+            i += 1
+            time.sleep(0.002)
+
+    writer = threading.Thread(target=small_writes)
+    writer.start()
+    start = time.perf_counter()
+    try:
+        db.import_events(({"title": f"b{i}", "date": "2032-01-01", "start_time": f"{i % 24:02d}:{i % 60:02d}"}
+                          for i in range(rows)), user="bulk")
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+        writer.join()
+    return elapsed, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commits", type=int, default=300, help="add_event commits per writer")
+    parser.add_argument("--import-rows", type=int, default=100_000, help="rows in the bulk import")
+    args = parser.parse_args()
+
+    print(f"commits/s, {args.commits} add_event commits per writer thread (one user each)")
+    print(f"  {'writers':<10}" + "".join(f"{n:>8}" for n in (1, 2, 4, 8)))
+    for sharded in (False, True):
+        with temp_database(sharded=sharded) as db:
+            rates = [throughput(db, n, args.commits) for n in (1, 2, 4, 8)]
+        print(f"  {'sharded' if sharded else 'shared':<10}" + "".join(f"{rate:8.0f}" for rate in rates))
+
+    print(f"another user's add_event every 2 ms during a {args.import_rows}-row import")
+    for sharded in (False, True):
+        with temp_database(sharded=sharded) as db:
+            elapsed, latencies, failures = write_during_import(db, args.import_rows)
+        line = f"  {'sharded' if sharded else 'shared':<10} import {elapsed:5.1f} s, {len(latencies)} ok, {failures} failed"
+        if latencies:
+            line += (f", p50 {percentile(latencies, 50) * 1e3:.1f} ms, p99 {percentile(latencies, 99) * 1e3:.1f} ms, "
+                     f"max {max(latencies) * 1e3:.0f} ms")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 # smart_calendar_cli.py
+import sys
 import click
-import db.database as db
+from db.backend import get_backend
+from db.database import SEARCH_LIMIT
+import db.event_io as event_io
+from db.timeutil import canonical_date
 import logs.log_convo as log_convo
 from datetime import datetime
 
-# Load previous conversation memory - ensures memory.json is read once when the CLI starts
-conversation_memory = log_convo.get_history()
+# Ensure the conversation log exists (migrates a legacy memory.json on first run)
+log_convo.ensure_memory_exists()
 
 
 # ==========================================================
@@ -15,8 +19,7 @@ def validate_date(ctx, param, value):
     if value is None:
         return None
     try:
-        datetime.strptime(value, "%Y-%m-%d")
-        return value
+        return canonical_date(value)
     except ValueError:
         raise click.BadParameter("Date must be in YYYY-MM-DD format")
 
@@ -65,15 +68,16 @@ def log_cli(user_input: str, output_msg: str):
 @click.option("--start", "start_time", callback=validate_time, default=None, help="Start time HH:MM")
 @click.option("--end", "end_time", callback=validate_time, default=None, help="End time HH:MM")
 @click.option("--user", default="user1", help="Username for multi-user support")
-def add(title, date, start_time, end_time, user):
+@click.option("--no-overlap", is_flag=True, default=False, help="Reject the event if it overlaps another one")
+def add(title, date, start_time, end_time, user, no_overlap):
     """Add a new event"""
     user_cmd = f"add {title} {date} --start {start_time} --end {end_time}"
     try:
         if not title.strip():
             raise click.BadParameter("Title cannot be empty")
         validate_time_range(start_time, end_time)
-        event = db.add_event(title, date, start_time, end_time, user=user)
-        output_msg = f"✅ Event added: [ID: {event['id']}] {event['title']} on {event['date']} {event['start_time'] or ''}-{event['end_time'] or ''}"
+        event = get_backend().add_event(title, date, start_time, end_time, user=user, reject_on_conflict=no_overlap)
+        output_msg = f"✅ Event added: [ID: {event.id}] {event.title} on {event.date} {event.start_time or ''}-{event.end_time or ''}"
         click.echo(output_msg)
         log_cli(user_cmd, output_msg)
     except Exception as e:
@@ -82,24 +86,119 @@ def add(title, date, start_time, end_time, user):
         log_cli(user_cmd, error_msg)
 
 
+# ==========================================================
+# RECURRING EVENTS
+# ==========================================================
+@cli.command("add-recurring")
+@click.argument("title")
+@click.argument("date", callback=validate_date)
+@click.option("--freq", type=click.Choice(["daily", "weekly", "monthly"]), required=True, help="Repeat frequency")
+@click.option("--every", type=int, default=1, help="Repeat every N days/weeks/months")
+@click.option("--until", callback=validate_date, default=None, help="Last date (YYYY-MM-DD)")
+@click.option("--count", "occurrences", type=int, default=None, help="Number of occurrences")
+@click.option("--start", "start_time", callback=validate_time, default=None, help="Start time HH:MM")
+@click.option("--end", "end_time", callback=validate_time, default=None, help="End time HH:MM")
+@click.option("--user", default="user1", help="Username for multi-user support")
+def add_recurring(title, date, freq, every, until, occurrences, start_time, end_time, user):
+    """Add a recurring event (stored once, expanded when listed)"""
+    user_cmd = f"add-recurring {title} {date} --freq {freq} --every {every} --until {until} --count {occurrences}"
+    try:
+        if not title.strip():
+            raise click.BadParameter("Title cannot be empty")
+        if every <= 0:
+            raise click.BadParameter("--every must be positive")
+        validate_time_range(start_time, end_time)
+        rule = get_backend().add_recurring_event(title, date, freq, every, until, occurrences,
+                                      start_time, end_time, user=user)
+        output_msg = f"✅ Recurring event added: [ID: R{rule['id']}] {rule['title']} {freq} from {rule['date']} {rule['start_time'] or ''}-{rule['end_time'] or ''}"
+    except Exception as e:
+        output_msg = f"❌ Could not add recurring event: {e}"
+    click.echo(output_msg)
+    log_cli(user_cmd, output_msg)
+
+
+@cli.command("skip")
+@click.argument("rule_id", type=int)
+@click.argument("date", callback=validate_date)
+@click.option("--user", default="user1", help="Username for multi-user support")
+def skip_occurrence(rule_id, date, user):
+    """Skip one occurrence of a recurring event"""
+    user_cmd = f"skip {rule_id} {date}"
+    if get_backend().add_recurrence_exception(rule_id, date, user=user):
+        output_msg = f"✅ Occurrence of R{rule_id} on {date} skipped."
+    else:
+        output_msg = "❌ Recurring event not found."
+    click.echo(output_msg)
+    log_cli(user_cmd, output_msg)
+
+
+@cli.command("delete-recurring")
+@click.argument("rule_id", type=int)
+@click.option("--user", default="user1", help="Username for multi-user support")
+def delete_recurring(rule_id, user):
+    """Delete a recurring event and all its occurrences"""
+    user_cmd = f"delete-recurring {rule_id}"
+    if get_backend().delete_recurring_event(rule_id, user=user):
+        output_msg = f"✅ Recurring event R{rule_id} deleted."
+    else:
+        output_msg = "❌ Recurring event not found."
+    click.echo(output_msg)
+    log_cli(user_cmd, output_msg)
+
+
 # ==========================================================
 # READ COMMANDS
 # ==========================================================
 @cli.command("list-all")
 @click.option("--user", default="user1", help="Username for multi-user support")
-def list_all(user):
-    user_cmd = "list-all"
-    events = db.list_all_events(user=user)
-    if not events:
+@click.option("--limit", type=int, default=None, help="Show at most this many events")
+@click.option("--after", default=None, help="Cursor printed by a previous --limit listing")
+def list_all(user, limit, after):
+    user_cmd = "list-all" + (f" --limit {limit}" if limit else "") + (f" --after {after}" if after else "")
+    if limit is not None and limit <= 0:
+        output_msg = "❌ Limit must be positive"
+        click.echo(output_msg)
+        log_cli(user_cmd, output_msg)
+        return
+
+    next_cursor = None
+    if limit:
+        events, next_cursor = get_backend().list_events_page(user=user, limit=limit, after=after)
+    else:
+        events = get_backend().iter_all_events(user=user, after=after)   # streamed page by page
+
+    count = 0
+    for ev in events:
+        click.echo(f"[{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}")
+        count += 1
+
+    if not count:
         output_msg = "📭 No events found."
         click.echo(output_msg)
     else:
-        output_lines = []
-        for ev in events:
-            line = f"[{ev['id']}] {ev['title']} on {ev['date']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
-            click.echo(line)
-            output_lines.append(line)
-        output_msg = "\n".join(output_lines)
+        output_msg = f"📋 Listed {count} events."
+        if next_cursor:
+            output_msg += f" Next page: --after '{next_cursor}'"
+            click.echo(f"… more events, next page: --after '{next_cursor}'")
+    log_cli(user_cmd, output_msg)
+
+
+@cli.command("admin-list")
+@click.option("--start", "start_date", default=None, callback=validate_date, help="First date (YYYY-MM-DD)")
+@click.option("--end", "end_date", default=None, callback=validate_date, help="Last date (YYYY-MM-DD)")
+def admin_list(start_date, end_date):
+    """List every user's events (across all shards when sharding is on)"""
+    user_cmd = "admin-list" + (f" --start {start_date}" if start_date else "") + (f" --end {end_date}" if end_date else "")
+    count = 0
+    users = set()
+    for ev in get_backend().iter_events_all_users(start_date=start_date, end_date=end_date):
+        click.echo(f"{ev.user}: [{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}")
+        count += 1
+        users.add(ev.user)
+
+    output_msg = f"📋 Listed {count} events of {len(users)} users." if count else "📭 No events found."
+    if not count:
+        click.echo(output_msg)
     log_cli(user_cmd, output_msg)
 
 
@@ -108,14 +207,14 @@ def list_all(user):
 @click.option("--user", default="user1", help="Username for multi-user support")
 def list_on_date(date, user):
     user_cmd = f"list-date {date}"
-    events = db.list_events_on_date(date, user=user)
+    events = get_backend().list_events_on_date(date, user=user)
     if not events:
         output_msg = f"📭 No events on {date}"
         click.echo(output_msg)
     else:
         output_lines = []
         for ev in events:
-            line = f"[{ev['id']}] {ev['title']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
+            line = f"[{ev.id}] {ev.title} {ev.start_time or ''}-{ev.end_time or ''}"
             click.echo(line)
             output_lines.append(line)
         output_msg = "\n".join(output_lines)
@@ -127,14 +226,35 @@ def list_on_date(date, user):
 @click.option("--user", default="user1", help="Username for multi-user support")
 def list_by_title(title, user):
     user_cmd = f"list-title {title}"
-    events = db.list_events_by_title(title, user=user)
+    events = get_backend().list_events_by_title(title, user=user)
     if not events:
         output_msg = f"📭 No events with title '{title}'"
         click.echo(output_msg)
     else:
         output_lines = []
         for ev in events:
-            line = f"[{ev['id']}] {ev['title']} on {ev['date']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
+            line = f"[{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}"
+            click.echo(line)
+            output_lines.append(line)
+        output_msg = "\n".join(output_lines)
+    log_cli(user_cmd, output_msg)
+
+
+@cli.command("search")
+@click.argument("keyword")
+@click.option("--limit", type=int, default=SEARCH_LIMIT, help="Maximum number of results")
+@click.option("--user", default="user1", help="Username for multi-user support")
+def search(keyword, limit, user):
+    """Full-text search over event titles (word prefixes, best matches first)"""
+    user_cmd = f"search {keyword}"
+    events = get_backend().search_events(keyword, user=user, limit=limit)
+    if not events:
+        output_msg = f"📭 No events matching '{keyword}'"
+        click.echo(output_msg)
+    else:
+        output_lines = []
+        for ev in events:
+            line = f"[{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}"
             click.echo(line)
             output_lines.append(line)
         output_msg = "\n".join(output_lines)
@@ -152,20 +272,65 @@ def list_next(n, user):
         log_cli(user_cmd, output_msg)
         return
 
-    events = db.list_events_next_n_days(n, user=user)
+    events = get_backend().list_events_next_n_days(n, user=user)
     if not events:
         output_msg = f"📭 No events in next {n} days."
         click.echo(output_msg)
     else:
         output_lines = []
         for ev in events:
-            line = f"[{ev['id']}] {ev['title']} on {ev['date']} {ev['start_time'] or ''}-{ev['end_time'] or ''}"
+            line = f"[{ev.id}] {ev.title} on {ev.date} {ev.start_time or ''}-{ev.end_time or ''}"
             click.echo(line)
             output_lines.append(line)
         output_msg = "\n".join(output_lines)
     log_cli(user_cmd, output_msg)
 
 
+@cli.command("conflicts")
+@click.argument("date", callback=validate_date)
+@click.option("--start", "start_time", callback=validate_time, required=True, help="Start time HH:MM")
+@click.option("--end", "end_time", callback=validate_time, default=None, help="End time HH:MM")
+@click.option("--user", default="user1", help="Username for multi-user support")
+def conflicts(date, start_time, end_time, user):
+    """Show events overlapping a time slot"""
+    user_cmd = f"conflicts {date} --start {start_time} --end {end_time}"
+    validate_time_range(start_time, end_time)
+    events = get_backend().find_conflicts(date, start_time, end_time, user=user)
+    if not events:
+        output_msg = f"✅ No conflicts on {date} {start_time}-{end_time or ''}"
+        click.echo(output_msg)
+    else:
+        output_lines = []
+        for ev in events:
+            line = f"[{ev.id}] {ev.title} {ev.start_time or ''}-{ev.end_time or ''}"
+            click.echo(line)
+            output_lines.append(line)
+        output_msg = "\n".join(output_lines)
+    log_cli(user_cmd, output_msg)
+
+
+@cli.command("free")
+@click.argument("date", callback=validate_date)
+@click.option("--to", "end_date", callback=validate_date, default=None, help="Last date to search (YYYY-MM-DD)")
+@click.option("--duration", type=int, default=30, help="Minimum slot length in minutes")
+@click.option("--from", "work_start", callback=validate_time, default="09:00", help="Working hours start HH:MM")
+@click.option("--until", "work_end", callback=validate_time, default="17:00", help="Working hours end HH:MM")
+@click.option("--user", default="user1", help="Username for multi-user support")
+def free(date, end_date, duration, work_start, work_end, user):
+    """Find free time slots"""
+    user_cmd = f"free {date} --to {end_date} --duration {duration} --from {work_start} --until {work_end}"
+    try:
+        slots = get_backend().find_free_slots(date, end_date, duration, work_start, work_end, user=user)
+        if not slots:
+            output_msg = f"📭 No free slot of {duration} minutes found"
+        else:
+            output_msg = "\n".join(f"{s['date']} {s['start_time']}-{s['end_time']} ({s['minutes']} min)" for s in slots)
+    except ValueError as e:
+        output_msg = f"❌ Could not find free slots: {e}"
+    click.echo(output_msg)
+    log_cli(user_cmd, output_msg)
+
+
 # ==========================================================
 # UPDATE
 # ==========================================================
@@ -183,7 +348,7 @@ def update(event_id, title, date, start_time, end_time, user):
             raise click.BadParameter("Title cannot be empty")
         validate_time_range(start_time, end_time)
 
-        success = db.update_event(event_id, title, date, start_time, end_time, user=user)
+        success = get_backend().update_event(event_id, title, date, start_time, end_time, user=user)
         if success:
             output_msg = "✅ Event updated successfully."
         else:
@@ -203,7 +368,7 @@ def update(event_id, title, date, start_time, end_time, user):
 @click.option("--user", default="user1", help="Username for multi-user support")
 def delete(event_id, user):
     user_cmd = f"delete {event_id}"
-    success = db.delete_event(event_id, user=user)
+    success = get_backend().delete_event(event_id, user=user)
     if success:
         output_msg = f"✅ Event {event_id} deleted."
     else:
@@ -212,20 +377,112 @@ def delete(event_id, user):
     log_cli(user_cmd, output_msg)
 
 
+# ==========================================================
+# BULK IMPORT / EXPORT
+# ==========================================================
+@cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(event_io.FORMATS), default=None,
+              help="File format (default: from extension)")
+@click.option("--user", default="user1", help="Username for multi-user support")
+def import_cmd(path, fmt, user):
+    """Import events from a CSV, JSON Lines or iCalendar file"""
+    user_cmd = f"import {path}"
+    try:
+        fmt = fmt or event_io.detect_format(path)
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            result = get_backend().import_events(event_io.read_events(f, fmt), user=user)
+        for c in result["conflicts"]:
+            ev = c["event"]
+            click.echo(f"⚠️ Row {c['row']} skipped ({c['reason']}): {ev.get('title')} on {ev.get('date')} {ev.get('start_time') or ''}")
+        output_msg = f"✅ Imported {result['inserted']} events, {len(result['conflicts'])} skipped"
+    except Exception as e:
+        output_msg = f"❌ Could not import events: {e}"
+    click.echo(output_msg)
+    log_cli(user_cmd, output_msg)
+
+
+@cli.command("export")
+@click.argument("path")
+@click.option("--format", "fmt", type=click.Choice(event_io.FORMATS), default=None,
+              help="File format (default: from extension)")
+@click.option("--user", default="user1", help="Username for multi-user support")
+def export_cmd(path, fmt, user):
+    """Export events to a CSV, JSON Lines or iCalendar file ('-' for stdout)"""
+    user_cmd = f"export {path}"
+    backend = get_backend()
+    # occurrences ("R<n>" ids) are written once, as their recurring event
+    events = (ev for ev in backend.iter_all_events(user=user) if not isinstance(ev.id, str))
+    dropped = []
+    try:
+        rules = backend.list_recurring_events(user=user)
+        if path == "-":
+            count = event_io.write_events(events, sys.stdout, fmt or "jsonl", rules, dropped)
+        else:
+            fmt = fmt or event_io.detect_format(path)
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                count = event_io.write_events(events, f, fmt, rules, dropped)
+        for d in dropped:
+            ev = d["event"]
+            click.echo(f"⚠️ Unreadable time {', '.join(map(repr, d['times']))} left out: {ev['title']} on {ev['date']}",
+                       err=path == "-")
+        output_msg = f"✅ Exported {count} events to {path}"
+    except Exception as e:
+        output_msg = f"❌ Could not export events: {e}"
+    click.echo(output_msg, err=path == "-")
+    log_cli(user_cmd, output_msg)
+
+
 # ==========================================================
 # SHOW CONVERSATION MEMORY
 # ==========================================================
 @cli.command("show-memory")
 def show_memory():
     """Show last 10 conversation messages"""
-    history = log_convo.get_history()
+    history = log_convo.tail(10)  # last 10 messages, without reading the whole log
     if not history:
         click.echo("📭 No conversation history yet.")
         return
-    for msg in history[-10:]:  # last 10 messages
+    for msg in history:
         click.echo(f"[{msg['timestamp']}] {msg['role']}: {msg['message']}")
 
 
+# ==========================================================
+# LATENCY METRICS
+# ==========================================================
+@cli.command("stats")
+@click.option("--url", envvar="METRICS_URL", default="http://127.0.0.1:5000/metrics",
+              show_default=True, help="/metrics endpoint of the running web app")
+def stats(url):
+    """Show per-stage latency histograms collected by the web app"""
+    import json
+    from urllib.error import URLError
+    from urllib.request import urlopen
+
+    try:
+        with urlopen(f"{url}?format=json", timeout=5) as resp:
+            snapshot = json.load(resp)
+    except (URLError, ValueError) as e:
+        click.echo(f"❌ Could not fetch metrics from {url}: {e}")
+        return
+    if not snapshot.get("enabled"):
+        click.echo("ℹ️ Metrics are disabled on the server (METRICS_ENABLED=0).")
+
+    spans = snapshot.get("spans", {})
+    if not spans:
+        click.echo("📭 No timings recorded yet.")
+    else:
+        width = max(len(name) for name in spans)
+        click.echo(f"{'span':<{width}} {'count':>7} {'avg ms':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>9}")
+        # slowest stages (by total time) first
+        for name, s in sorted(spans.items(), key=lambda item: -item[1]["avg_ms"] * item[1]["count"]):
+            click.echo(f"{name:<{width}} {s['count']:>7} {s['avg_ms']:>9.2f} {s['p50_ms']:>8.2f} "
+                       f"{s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['max_ms']:>9.2f}")
+    for source, values in snapshot.get("stats", {}).items():
+        click.echo(f"{source}: " + ", ".join(
+            f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in values.items()))
+
+
 # ==========================================================
 # AI NATURAL LANGUAGE COMMAND (LangChain agent)
 # ==========================================================
@@ -0,0 +1,145 @@
+# backend.py
+"""
+Storage backend interface.
+
+The tools, web handlers and CLI talk to get_backend() instead of importing
+db.database, so the store can be swapped by configuration:
+
+  CALENDAR_BACKEND=sqlite   (default) SQLite files on disk, db/database.py
+  CALENDAR_BACKEND=memory   in-process store with no disk I/O, db/memory.py
+                            (tests, demos, ephemeral deployments)
+
+Both return the same types (Event tuples, result dicts) and raise the same
+ValueErrors, so callers do not care which one is configured.
+"""
+import os
+import threading
+from typing import Iterator, List, Optional, Protocol, Tuple
+
+from db import database as sqlite_db
+from db.memory import MemoryBackend
+from db.models import Event
+
+
+class StorageBackend(Protocol):
+    def init(self) -> None: ...
+
+    def calendar_version(self, user: str = "user1") -> int: ...
+
+    # --- writes ---
+    def add_event(self, title: str, date: str, start_time: str = None, end_time: str = None,
+                  user: str = "user1", reject_on_conflict: bool = False) -> Event: ...
+
+    def add_events(self, events: list, user: str = "user1", atomic: bool = False) -> List[dict]: ...
+
+    def import_events(self, events, user: str = "user1", chunk_size: int = ...) -> dict: ...
+
+    def update_event(self, event_id: int, title: str = None, date: str = None,
+                     start_time: str = None, end_time: str = None, user: str = "user1") -> bool: ...
+
+    def delete_event(self, event_id: int, user: str = "user1") -> bool: ...
+
+    def delete_events(self, event_ids: list, user: str = "user1", atomic: bool = False) -> List[dict]: ...
+
+    def delete_event_by_title(self, title: str, user: str = "user1") -> bool: ...
+
+    def delete_all_events(self, user: str = None) -> bool: ...
+
+    def add_recurring_event(self, title: str, date: str, freq: str, every: int = 1, until: str = None,
+                            occurrences: int = None, start_time: str = None, end_time: str = None,
+                            user: str = "user1") -> dict: ...
+
+    def add_recurrence_exception(self, rule_id: int, date: str, user: str = "user1") -> bool: ...
+
+    def delete_recurring_event(self, rule_id: int, user: str = "user1") -> bool: ...
+
+    # --- listings and ranges ---
+    def list_all_events(self, user: str = "user1") -> List[Event]: ...
+
+    def list_events_on_date(self, date: str, user: str = "user1") -> List[Event]: ...
+
+    def list_events_by_title(self, title: str, user: str = "user1") -> List[Event]: ...
+
+    def list_events_next_n_days(self, n: int, user: str = "user1") -> List[Event]: ...
+
+    def list_events_page(self, user: str = "user1", limit: int = ..., after: str = None,
+                         start_date: str = None, end_date: str = None) -> Tuple[List[Event], Optional[str]]: ...
+
+    def iter_all_events(self, user: str = "user1", batch_size: int = ..., after: str = None,
+                        start_date: str = None, end_date: str = None) -> Iterator[Event]: ...
+
+    def iter_events_next_n_days(self, n: int, user: str = "user1", batch_size: int = ...) -> Iterator[Event]: ...
+
+    def list_recurring_events(self, user: str = "user1") -> List[dict]: ...
+
+    def search_events(self, keyword: str, user: str = "user1", limit: int = ...) -> List[Event]: ...
+
+    def find_conflicts(self, date: str, start_time: str, end_time: str = None, user: str = "user1",
+                       exclude_id: int = None) -> List[Event]: ...
+
+    def find_free_slots(self, start_date: str, end_date: str = None, duration: int = 30,
+                        work_start: str = "09:00", work_end: str = "17:00",
+                        user: str = "user1", limit: int = None) -> List[dict]: ...
+
+    # --- admin ---
+    def list_users(self) -> List[str]: ...
+
+    def iter_events_all_users(self, start_date: str = None, end_date: str = None,
+                              batch_size: int = ...) -> Iterator[Event]: ...
+
+
+class SQLiteBackend:
+    """The on-disk store: db/database.py's module functions."""
+    init = staticmethod(sqlite_db.init_db)
+    calendar_version = staticmethod(sqlite_db.calendar_version)
+    add_event = staticmethod(sqlite_db.add_event)
+    add_events = staticmethod(sqlite_db.add_events)
+    import_events = staticmethod(sqlite_db.import_events)
+    update_event = staticmethod(sqlite_db.update_event)
+    delete_event = staticmethod(sqlite_db.delete_event)
+    delete_events = staticmethod(sqlite_db.delete_events)
+    delete_event_by_title = staticmethod(sqlite_db.delete_event_by_title)
+    delete_all_events = staticmethod(sqlite_db.delete_all_events)
+    add_recurring_event = staticmethod(sqlite_db.add_recurring_event)
+    add_recurrence_exception = staticmethod(sqlite_db.add_recurrence_exception)
+    delete_recurring_event = staticmethod(sqlite_db.delete_recurring_event)
+    list_all_events = staticmethod(sqlite_db.list_all_events)
+    list_events_on_date = staticmethod(sqlite_db.list_events_on_date)
+    list_events_by_title = staticmethod(sqlite_db.list_events_by_title)
+    list_events_next_n_days = staticmethod(sqlite_db.list_events_next_n_days)
+    list_events_page = staticmethod(sqlite_db.list_events_page)
+    iter_all_events = staticmethod(sqlite_db.iter_all_events)
+    iter_events_next_n_days = staticmethod(sqlite_db.iter_events_next_n_days)
+    list_recurring_events = staticmethod(sqlite_db.list_recurring_events)
+    search_events = staticmethod(sqlite_db.search_events)
+    find_conflicts = staticmethod(sqlite_db.find_conflicts)
+    find_free_slots = staticmethod(sqlite_db.find_free_slots)
+    list_users = staticmethod(sqlite_db.list_users)
+    iter_events_all_users = staticmethod(sqlite_db.iter_events_all_users)
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "memory": MemoryBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> StorageBackend:
+    """The configured backend (CALENDAR_BACKEND), created on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = os.getenv("CALENDAR_BACKEND", "sqlite").lower()
+                if name not in BACKENDS:
+                    raise ValueError(f"Unknown CALENDAR_BACKEND {name!r}, expected one of {', '.join(BACKENDS)}")
+                _backend = BACKENDS[name]()
+    return _backend
+
+
+def set_backend(backend: StorageBackend) -> StorageBackend:
+    """Replace the process-wide backend (e.g. a fresh MemoryBackend per test); returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
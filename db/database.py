@@ -1,64 +1,671 @@
 # database.py
 import sqlite3
-from datetime import datetime, timedelta
+import atexit
+import heapq
+import itertools
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from operator import itemgetter
+from datetime import date as date_cls, datetime, timedelta
 import os
+import re
+import sys
+import time
+from urllib.parse import quote
+
+from db.day_cache import day_cache
+from db.models import (Event, event_row, event_sort_key, page_key, encode_cursor, decode_cursor, cursor_key,
+                       event_position, recurrence_row, search_terms, title_matches, title_rank)
+from db.recurrence import FREQUENCIES, expand_rules, parse_rrule
+from db.scheduling import IntervalIndex, slot_window, free_slots_by_day
+from db.timeutil import (event_interval, minutes_interval, parse_time, day_number, time_columns,
+                         canonical_date, legacy_date)
+from logs import metrics
+from logs.logger import get_logger, kv
+
+log = get_logger(__name__)
 
 # Absolute path to calendar.db in project root
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_NAME = os.path.join(PROJECT_ROOT, "calendar.db")
 
-def init_db():
+# Connection pool tuning (override via env)
+POOL_SIZE = int(os.getenv("CALENDAR_DB_POOL_SIZE", "8"))
+STATEMENT_CACHE_SIZE = 256          # prepared statements kept per connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",   # 256 MB
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache
+    "PRAGMA busy_timeout=5000",
+)
+
+# Optional sharding: with CALENDAR_DB_SHARD_DIR set, each user's calendar is a
+# separate file <dir>/<user>.db, so one user's writes never wait on another
+# user's SQLite write lock. Unset, every user shares calendar.db.
+SHARD_DIR = os.getenv("CALENDAR_DB_SHARD_DIR") or None
+SHARD_POOL_SIZE = int(os.getenv("CALENDAR_DB_SHARD_POOL_SIZE", "2"))   # idle connections kept per shard
+MAX_POOLS = int(os.getenv("CALENDAR_DB_MAX_POOLS", "64"))   # open shard pools; least recently used are closed
+_SHARD_SUFFIX = ".db"
+# Reads of a user whose shard file doesn't exist yet are served from this
+# empty in-memory calendar (shared by its connections) instead of creating it
+_EMPTY_DB = "file:calendar-empty?mode=memory&cache=shared"
+
+
+# -------------------------------
+# CONNECTION POOL
+# -------------------------------
+_SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE|INDEX|TRIGGER)\s+(?:IF (?:NOT )?EXISTS\s+)?(\w+)", re.I)
+_sql_labels = {}
+
+
+def _sql_label(sql: str) -> str:
+    """ "SELECT events" for a statement text; cached, statements are a fixed set."""
+    label = _sql_labels.get(sql)
+    if label is None:
+        words = sql.split(None, 1)
+        verb = words[0].upper() if words else "?"
+        table = _SQL_TABLE.search(sql)
+        label = _sql_labels[sql] = f"{verb} {table.group(1)}" if table else verb
+    return label
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Cursor recording each statement into a "sql.<calling function>.<VERB table>"
+    histogram. Times execution up to the first row; fetching is not included.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.observe(f"sql.{sys._getframe(1).f_code.co_name}.{_sql_label(sql)}",
+                            (time.perf_counter() - start) * 1000)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.observe(f"sql.{sys._getframe(1).f_code.co_name}.{_sql_label(sql)}",
+                            (time.perf_counter() - start) * 1000)
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by all threads.
+    Connections are opened lazily with the tuned PRAGMAS and kept open, so
+    sqlite3's per-connection statement cache is reused across calls.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            uri=self.path.startswith("file:"),
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._release(conn)
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._idle.put_nowait(conn)
+                    return
+                except queue.Full:
+                    pass
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+_pools = OrderedDict()      # path -> ConnectionPool, least recently used first
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str = None, size: int = POOL_SIZE) -> ConnectionPool:
+    """
+    The pool for `path`. Beyond MAX_POOLS open pools (one per shard in use)
+    the least recently used one is closed; its connections that are still
+    borrowed close when returned.
+    """
+    path = path or DB_NAME
+    evicted = []
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is not None:
+            _pools.move_to_end(path)
+            return pool
+        pool = _pools[path] = ConnectionPool(path, size)
+        for old in list(_pools):
+            if len(_pools) <= MAX_POOLS:
+                break
+            if old not in (path, DB_NAME, _EMPTY_DB):     # the in-memory calendar lives in its connections
+                evicted.append(_pools.pop(old))
+    for old in evicted:
+        old.close_all()
+    return pool
+
+
+def close_pools():
+    """Close every pooled connection (registered to run at exit)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+    _initialized.discard(_EMPTY_DB)
+
+
+atexit.register(close_pools)
+
+
+# -------------------------------
+# SHARD ROUTING
+# -------------------------------
+_initialized = set()    # database files whose schema is known to be current
+
+
+def db_path(user: str) -> str:
+    """Database file holding `user`'s calendar: calendar.db, or their shard file."""
+    if SHARD_DIR is None:
+        return DB_NAME
+    return os.path.join(SHARD_DIR, quote(user, safe="") + _SHARD_SUFFIX)
+
+
+def shard_paths() -> list:
+    """Every database file in use: [calendar.db], or each user's shard."""
+    if SHARD_DIR is None:
+        return [DB_NAME]
+    if not os.path.isdir(SHARD_DIR):
+        return []
+    return sorted(os.path.join(SHARD_DIR, name) for name in os.listdir(SHARD_DIR)
+                  if name.endswith(_SHARD_SUFFIX))
+
+
+def _pool(path: str) -> ConnectionPool:
+    return get_pool(path, SHARD_POOL_SIZE if SHARD_DIR else POOL_SIZE)
+
+
+@contextmanager
+def _cursor(user: str = None, path: str = None, create: bool = True):
+    """
+    Borrow a pooled connection to `user`'s database (or the file at `path`)
+    and run the block as one transaction: commits on success, rolls back on
+    exception. A shard is created and migrated on first use; reads pass
+    create=False and see an empty calendar while the shard file is missing.
+    """
+    path = path or db_path(user)
+    if path not in _initialized:
+        if not create and SHARD_DIR and not os.path.exists(path):
+            path = _EMPTY_DB
+        if path not in _initialized:
+            init_db(path)
+    with _pool(path).connection() as conn:
+        with conn:
+            yield conn.cursor(TimedCursor) if metrics.ENABLED else conn.cursor()
+
+
+def _shard_missing(user: str) -> bool:
+    """
+    Sharding is on and `user` has no shard yet. Updates and deletes then
+    have nothing to change: they return without creating the shard or
+    touching the shared empty calendar reads use instead.
+    """
+    path = db_path(user)
+    return bool(SHARD_DIR) and path not in _initialized and not os.path.exists(path)
+
+
+def _fetch_events(cur) -> list:
+    """Rows of the pending event SELECT (id, user, title, date, start_time, end_time) as Events."""
+    cur.row_factory = event_row
+    try:
+        return cur.fetchall()
+    finally:
+        cur.row_factory = None
+
+
+# -------------------------------
+# SCHEMA MIGRATIONS
+# -------------------------------
+# Each entry upgrades the schema by one version (tracked in PRAGMA user_version).
+# Steps are SQL strings or callables taking the cursor.
+MIGRATIONS = [
+    # v1: covering indexes so listings are index range scans, not table scans
+    (
+        """CREATE INDEX IF NOT EXISTS idx_events_user_date
+           ON events(user, date, start_time, title, end_time)""",
+        """CREATE INDEX IF NOT EXISTS idx_events_user_title
+           ON events(user, title, date, start_time, end_time)""",
+    ),
+    # v2: (user, date, start_time, rowid) order for keyset pagination
+    (
+        """CREATE INDEX IF NOT EXISTS idx_events_user_date_id
+           ON events(user, date, start_time)""",
+    ),
+    # v3: per-user calendar version, bumped by triggers on every write to events
+    (
+        """CREATE TABLE IF NOT EXISTS calendar_versions (
+               user TEXT PRIMARY KEY,
+               version INTEGER NOT NULL
+           )""",
+        """CREATE TRIGGER IF NOT EXISTS trg_events_version_insert AFTER INSERT ON events
+           BEGIN
+               INSERT INTO calendar_versions (user, version) VALUES (NEW.user, 1)
+               ON CONFLICT(user) DO UPDATE SET version = version + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_events_version_update AFTER UPDATE ON events
+           BEGIN
+               INSERT INTO calendar_versions (user, version) VALUES (OLD.user, 1)
+               ON CONFLICT(user) DO UPDATE SET version = version + 1;
+               INSERT INTO calendar_versions (user, version) VALUES (NEW.user, 1)
+               ON CONFLICT(user) DO UPDATE SET version = version + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_events_version_delete AFTER DELETE ON events
+           BEGIN
+               INSERT INTO calendar_versions (user, version) VALUES (OLD.user, 1)
+               ON CONFLICT(user) DO UPDATE SET version = version + 1;
+           END""",
+    ),
+    # v4: recurring events, stored once and expanded lazily (see recurrence.py)
+    (
+        """CREATE TABLE IF NOT EXISTS recurrences (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               user TEXT NOT NULL,
+               title TEXT NOT NULL,
+               start_date TEXT NOT NULL,
+               start_time TEXT,
+               end_time TEXT,
+               freq TEXT NOT NULL,          -- daily / weekly / monthly
+               every INTEGER NOT NULL DEFAULT 1,
+               until TEXT,                  -- last possible date (inclusive)
+               occurrences INTEGER          -- max number of instances
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_recurrences_user ON recurrences(user, start_date)""",
+        """CREATE TABLE IF NOT EXISTS recurrence_exceptions (
+               recurrence_id INTEGER NOT NULL,
+               date TEXT NOT NULL,
+               PRIMARY KEY (recurrence_id, date)
+           ) WITHOUT ROWID""",
+        """CREATE TRIGGER IF NOT EXISTS trg_recurrences_version_insert AFTER INSERT ON recurrences
+           BEGIN
+               INSERT INTO calendar_versions (user, version) VALUES (NEW.user, 1)
+               ON CONFLICT(user) DO UPDATE SET version = version + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_recurrences_version_delete AFTER DELETE ON recurrences
+           BEGIN
+               INSERT INTO calendar_versions (user, version) VALUES (OLD.user, 1)
+               ON CONFLICT(user) DO UPDATE SET version = version + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_recurrence_exceptions_version AFTER INSERT ON recurrence_exceptions
+           BEGIN
+               UPDATE calendar_versions SET version = version + 1
+               WHERE user = (SELECT user FROM recurrences WHERE id = NEW.recurrence_id);
+           END""",
+    ),
+    # v5: FTS5 index over event titles, kept in sync by triggers
+    (
+        lambda cur: _create_fts(cur),
+    ),
+    # v6: integer day / minute-of-day columns next to the free-form text;
+    # listings sort and range-filter on these instead of the strings
+    (
+        lambda cur: _add_time_columns(cur),
+        # covering, so listings and free-slot scans never visit the table
+        """CREATE INDEX IF NOT EXISTS idx_events_user_day
+           ON events(user, day, start_min, end_min, title, date, start_time, end_time)""",
+        # (user, day, start_min, rowid) order for keyset pagination
+        """CREATE INDEX IF NOT EXISTS idx_events_user_day_id
+           ON events(user, day, start_min)""",
+        "DROP INDEX IF EXISTS idx_events_user_date",
+        "DROP INDEX IF EXISTS idx_events_user_date_id",
+        # by-title listings order by (day, start_min) too: keep them an equality seek with no sort
+        "DROP INDEX IF EXISTS idx_events_user_title",
+        """CREATE INDEX IF NOT EXISTS idx_events_user_title
+           ON events(user, title, day, start_min, end_min, date, start_time, end_time)""",
+    ),
+    # v7: rebuild events_fts folding every Latin diacritic, as models.fold does for scanned titles
+    (
+        "DROP TABLE IF EXISTS events_fts",
+        lambda cur: _create_fts(cur),
+    ),
+    # v8: id right after start_min in the covering indexes, so listings are in
+    # the total (day, start_min, id) order of pages and the memory backend
+    # without a sort; the pagination index becomes a prefix of the day index
+    (
+        "DROP INDEX IF EXISTS idx_events_user_day",
+        """CREATE INDEX IF NOT EXISTS idx_events_user_day
+           ON events(user, day, start_min, id, end_min, title, date, start_time, end_time)""",
+        "DROP INDEX IF EXISTS idx_events_user_day_id",
+        "DROP INDEX IF EXISTS idx_events_user_title",
+        """CREATE INDEX IF NOT EXISTS idx_events_user_title
+           ON events(user, title, day, start_min, id, end_min, date, start_time, end_time)""",
+    ),
+    # v9: legacy dates the v6 backfill left without a day ("2025/09/22") are
+    # rewritten as ISO; unreadable ones ("tomorrow") move out of the listings
+    (
+        """CREATE TABLE IF NOT EXISTS undated_events (
+               id INTEGER PRIMARY KEY,
+               user TEXT NOT NULL,
+               title TEXT NOT NULL,
+               date TEXT NOT NULL,
+               start_time TEXT,
+               end_time TEXT,
+               reason TEXT NOT NULL
+           )""",
+        lambda cur: _normalize_legacy_dates(cur),
+    ),
+]
+
+
+def _create_fts(cur):
+    """
+    External-content FTS5 table over events.title (the text lives only in
+    events), backfilled once and maintained by triggers. SQLite builds without
+    FTS5 are left without it; search_events then scans titles instead.
+    Its tokenizer is the one models.search_terms / title_matches mirror.
+    """
+    try:
+        cur.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS events_fts
+                       USING fts5(title, content='events', content_rowid='id', prefix='2 3 4',
+                                  tokenize='unicode61 remove_diacritics 2')""")
+    except sqlite3.OperationalError:
+        return
+    cur.execute("INSERT INTO events_fts(events_fts) VALUES('rebuild')")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_events_fts_insert AFTER INSERT ON events
+                   BEGIN
+                       INSERT INTO events_fts(rowid, title) VALUES (NEW.id, NEW.title);
+                   END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_events_fts_delete AFTER DELETE ON events
+                   BEGIN
+                       INSERT INTO events_fts(events_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+                   END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS trg_events_fts_update AFTER UPDATE OF title ON events
+                   BEGIN
+                       INSERT INTO events_fts(events_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+                       INSERT INTO events_fts(rowid, title) VALUES (NEW.id, NEW.title);
+                   END""")
+
+
+def _add_time_columns(cur):
+    """
+    Add day (days since 1970-01-01), start_min and end_min (minutes since
+    midnight) and backfill them from date/start_time/end_time; values the
+    parsers do not recognise ("tbd") are stored as NULL. The text columns
+    stay the source of truth for display.
+    """
+    for column in ("day", "start_min", "end_min"):
+        cur.execute(f"ALTER TABLE events ADD COLUMN {column} INTEGER")
+    conn = cur.connection
+    conn.create_function("day_number", 1, day_number, deterministic=True)
+    conn.create_function("parse_time", 1, parse_time, deterministic=True)
+    try:
+        cur.execute("""UPDATE events
+                       SET day = day_number(date), start_min = parse_time(start_time),
+                           end_min = parse_time(end_time)""")
+    finally:
+        conn.create_function("day_number", 1, None)
+        conn.create_function("parse_time", 1, None)
+
+
+def _normalize_legacy_dates(cur):
+    """
+    Rewrite the dates of events stored before dates were validated as ISO
+    (see timeutil.legacy_date) and fill in their day. Rows whose date cannot
+    be read, or whose ISO spelling is already stored, are moved as they are
+    to undated_events with the reason, and logged.
+    """
+    cur.execute("SELECT id, user, title, date, start_time, end_time FROM events WHERE day IS NULL")
+    undated = []
+    for row in cur.fetchall():
+        iso = legacy_date(row[3])
+        if iso is None:
+            undated.append((*row, "unrecognised date"))
+            continue
+        try:
+            cur.execute("UPDATE events SET date = ?, day = ? WHERE id = ?", (iso, day_number(iso), row[0]))
+        except sqlite3.IntegrityError:
+            undated.append((*row, f"duplicate of {iso}"))
+    if not undated:
+        return
+    cur.executemany("""INSERT INTO undated_events (id, user, title, date, start_time, end_time, reason)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""", undated)
+    cur.executemany("DELETE FROM events WHERE id = ?", [(row[0],) for row in undated])
+    log.warning("events with unreadable dates moved to undated_events",
+                extra=kv(count=len(undated), ids=[row[0] for row in undated]))
+
+
+def _migrate(cur):
+    version = cur.execute("PRAGMA user_version").fetchone()[0]
+    for target, steps in enumerate(MIGRATIONS[version:], start=version + 1):
+        for step in steps:
+            if callable(step):
+                step(cur)
+            else:
+                cur.execute(step)
+        cur.execute(f"PRAGMA user_version={target}")
+
+
+def init_db(path: str = None):
     """
     Initialize the SQLite database and create the events table if not exists.
     Schema ensures no duplicate (user, title, date, start_time)
+    Pending schema migrations are applied in the same transaction.
+    `path` defaults to calendar.db; with sharding on, only the shard
+    directory is created here and each shard is initialized on first use.
+    Nothing touches the disk before this runs (explicitly or from the
+    first query), so importing the module is free of I/O.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user TEXT NOT NULL,          -- add multi-user support
-            title TEXT NOT NULL,
-            date TEXT NOT NULL,
-            start_time TEXT,
-            end_time TEXT,
-            UNIQUE(user, title, date, start_time)
-        )
-    """)
-    conn.commit()
-    conn.close()
+    if SHARD_DIR:
+        os.makedirs(SHARD_DIR, exist_ok=True)
+        if path is None:
+            return
+    path = path or DB_NAME
+    with _pool(path).connection() as conn, conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user TEXT NOT NULL,          -- add multi-user support
+                title TEXT NOT NULL,
+                date TEXT NOT NULL,
+                start_time TEXT,
+                end_time TEXT,
+                UNIQUE(user, title, date, start_time)
+            )
+        """)
+        _migrate(cur)
+    _initialized.add(path)
+
+
+# -------------------------------
+# CALENDAR VERSION
+# -------------------------------
+def calendar_version(user: str = "user1") -> int:
+    """
+    Monotonic counter bumped (by triggers) on every insert/update/delete of the
+    user's events, from any process. Callers cache derived data against it.
+    """
+    with _cursor(user, create=False) as cur:
+        return _read_version(cur, user)
+
+
+def _read_version(cur, user: str) -> int:
+    cur.execute("SELECT version FROM calendar_versions WHERE user=?", (user,))
+    row = cur.fetchone()
+    return row[0] if row else 0
 
 
 # -------------------------------
 # ADD EVENT
 # -------------------------------
-def add_event(title: str, date: str, start_time: str = None, end_time: str = None, user: str = "user1") -> dict:
-    print("DEBUG: Adding event from ==from databse.py:", DB_NAME)
+def add_event(title: str, date: str, start_time: str = None, end_time: str = None, user: str = "user1",
+              reject_on_conflict: bool = False) -> Event:
     """
     Adds a new event. Raises sqlite3.IntegrityError if duplicate.
+    With reject_on_conflict=True, raises ValueError if the slot overlaps an
+    existing event (checked inside the same write transaction).
+    Raises ValueError if `date` is not an ISO date; it is stored as YYYY-MM-DD.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
+    date = canonical_date(date)
+    log.debug("add_event", extra=kv(db=db_path(user), user=user, title=title, date=date))
     try:
-        cur.execute("""
-            INSERT INTO events (user, title, date, start_time, end_time)
-            VALUES (?, ?, ?, ?, ?)
-        """, (user, title, date, start_time, end_time))
-        conn.commit()
-        event_id = cur.lastrowid
+        with _cursor(user) as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            before = _read_version(cur, user)
+            if reject_on_conflict:
+                interval = event_interval(start_time, end_time)
+                if interval:
+                    clashes = _day_index(cur, user, date).overlapping(*interval)
+                    if clashes:
+                        raise ValueError("Conflicts with: " + ", ".join(
+                            f"[{ev.id}] {ev.title} {ev.start_time}-{ev.end_time or ''}" for ev in clashes))
+            cur.execute(_INSERT_EVENT_SQL, (user, title, date, start_time, end_time,
+                                            *time_columns(date, start_time, end_time)))
+            event_id = cur.lastrowid
+            after = _read_version(cur, user)
     except sqlite3.IntegrityError:
-        conn.close()
         raise ValueError("Duplicate event: same title/date/start time already exists")
-    conn.close()
 
-    return {
-        "id": event_id,
-        "user": user,
-        "title": title,
-        "date": date,
-        "start_time": start_time,
-        "end_time": end_time
-    }
+    day_cache.written(db_path(user), user, [day_number(date)], before, after)
+    return Event(event_id, user, title, date, start_time, end_time)
+
+
+# -------------------------------
+# CONFLICT DETECTION
+# -------------------------------
+INTERVAL_CACHE_SIZE = 1024
+
+# (db path, user, date) -> (calendar version, IntervalIndex); rebuilt when the version moves
+_interval_cache = OrderedDict()
+_interval_lock = threading.Lock()
+
+
+def _day_index(cur, user: str, date: str, cached: bool = True) -> IntervalIndex:
+    """
+    Interval tree of the user's timed events on `date`, cached per calendar version.
+    Pass cached=False after uncommitted writes in the same transaction: a
+    rollback would bring the version back while the cached tree kept them.
+    """
+    version = _read_version(cur, user)
+    key = (db_path(user), user, date)
+    with _interval_lock:
+        hit = _interval_cache.get(key) if cached else None
+        if hit and hit[0] == version:
+            _interval_cache.move_to_end(key)
+            return hit[1]
+
+    cur.execute("""
+        SELECT id, user, title, date, start_time, end_time
+        FROM events
+        WHERE user=? AND day=?
+    """, (user, day_number(date)))
+    events = _fetch_events(cur)
+    events.extend(expand_rules(_load_rules(cur, user, date, date), user, date, date))
+    intervals = []
+    for ev in events:
+        interval = event_interval(ev.start_time, ev.end_time)
+        if interval:
+            intervals.append((*interval, ev))
+    index = IntervalIndex(intervals)
+    if not cached:
+        return index
+
+    with _interval_lock:
+        _interval_cache[key] = (version, index)
+        _interval_cache.move_to_end(key)
+        while len(_interval_cache) > INTERVAL_CACHE_SIZE:
+            _interval_cache.popitem(last=False)
+    return index
+
+
+def find_conflicts(date: str, start_time: str, end_time: str = None, user: str = "user1",
+                   exclude_id: int = None) -> list:
+    """
+    Events of `user` on `date` overlapping [start_time, end_time).
+    A missing end_time means a default-length slot (see timeutil); all-day
+    events (no start time) never conflict. `exclude_id` skips one event,
+    e.g. the one being rescheduled. Raises ValueError for a date that is not ISO.
+    """
+    date = canonical_date(date)
+    interval = event_interval(start_time, end_time)
+    if interval is None:
+        raise ValueError(f"Unrecognised start time: {start_time!r}")
+    with _cursor(user, create=False) as cur:
+        clashes = _day_index(cur, user, date).overlapping(*interval)
+    return [ev for ev in clashes if ev.id != exclude_id]
+
+
+# -------------------------------
+# FREE SLOT FINDER
+# -------------------------------
+def find_free_slots(start_date: str, end_date: str = None, duration: int = 30,
+                    work_start: str = "09:00", work_end: str = "17:00",
+                    user: str = "user1", limit: int = None) -> list:
+    """
+    Free slots of at least `duration` minutes between work_start and work_end
+    on every day from start_date to end_date (inclusive, default: start_date).
+    The user's events in the range are read in one index range scan over
+    the integer day column, with their pre-parsed minutes (plus recurring
+    occurrences in the range); each day's busy intervals are sorted and
+    swept once.
+    All-day events (no start time) do not block time.
+    Returns [{"date", "start_time", "end_time", "minutes"}], at most `limit` items.
+    """
+    first, last, window_start, window_end, duration = slot_window(start_date, end_date, work_start,
+                                                                  work_end, duration)
+    busy_by_day = {}
+    with _cursor(user, create=False) as cur:
+        cur.execute("""
+            SELECT day, start_min, end_min
+            FROM events
+            WHERE user=? AND day BETWEEN ? AND ?
+        """, (user, day_number(first.isoformat()), day_number(last.isoformat())))
+        for day, start_min, end_min in cur:
+            interval = minutes_interval(start_min, end_min)
+            if interval:
+                busy_by_day.setdefault(day, []).append(interval)
+        rules = _load_rules(cur, user, first.isoformat(), last.isoformat())
+
+    for ev in expand_rules(rules, user, first.isoformat(), last.isoformat()):
+        interval = event_interval(ev.start_time, ev.end_time)
+        if interval:
+            busy_by_day.setdefault(day_number(ev.date), []).append(interval)
+    return free_slots_by_day(busy_by_day, first, last, window_start, window_end, duration, limit)
 
 
 # -------------------------------
@@ -70,28 +677,8 @@ def update_event(event_id: int, title: str = None, date: str = None,
     Updates an event by ID. Checks duplicates before updating.
     Returns True if updated, False if event not found.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-
-    # Check if update will violate UNIQUE constraint
-    if title or date or start_time:
-        # get current values
-        cur.execute("SELECT title, date, start_time FROM events WHERE user=? AND id=?", (user, event_id))
-        row = cur.fetchone()
-        if not row:
-            conn.close()
-            return False
-        cur_title, cur_date, cur_start = row
-        new_title = title or cur_title
-        new_date = date or cur_date
-        new_start = start_time or cur_start
-        # check duplicate
-        cur.execute("SELECT id FROM events WHERE user=? AND title=? AND date=? AND start_time=? AND id!=?",
-                    (user, new_title, new_date, new_start, event_id))
-        if cur.fetchone():
-            conn.close()
-            raise ValueError("Duplicate event would be created with this update")
-
+    if date:
+        date = canonical_date(date)
     # Build dynamic update query
     fields, values = [], []
     if title: fields.append("title=?"); values.append(title)
@@ -99,16 +686,39 @@ def update_event(event_id: int, title: str = None, date: str = None,
     if start_time: fields.append("start_time=?"); values.append(start_time)
     if end_time: fields.append("end_time=?"); values.append(end_time)
 
-    if not fields:
-        conn.close()
+    if not fields or _shard_missing(user):
         return False
 
-    values += [user, event_id]
-    query = f"UPDATE events SET {', '.join(fields)} WHERE user=? AND id=?"
-    cur.execute(query, tuple(values))
-    conn.commit()
-    updated = cur.rowcount > 0
-    conn.close()
+    with _cursor(user, create=False) as cur:
+        cur.execute("BEGIN IMMEDIATE")
+        before = _read_version(cur, user)
+        # get current values
+        cur.execute("SELECT title, date, start_time, end_time FROM events WHERE user=? AND id=?", (user, event_id))
+        row = cur.fetchone()
+        if not row:
+            return False
+        cur_title, cur_date, cur_start, cur_end = row
+
+        # Check if update will violate UNIQUE constraint
+        if title or date or start_time:
+            cur.execute("SELECT id FROM events WHERE user=? AND title=? AND date=? AND start_time=? AND id!=?",
+                        (user, title or cur_title, date or cur_date, start_time or cur_start, event_id))
+            if cur.fetchone():
+                raise ValueError("Duplicate event would be created with this update")
+
+        # keep the integer columns in step with the text ones
+        if date or start_time or end_time:
+            fields += ["day=?", "start_min=?", "end_min=?"]
+            values += time_columns(date or cur_date, start_time or cur_start, end_time or cur_end)
+
+        values += [user, event_id]
+        query = f"UPDATE events SET {', '.join(fields)} WHERE user=? AND id=?"
+        cur.execute(query, tuple(values))
+        updated = cur.rowcount > 0
+        after = _read_version(cur, user)
+
+    if updated:
+        day_cache.written(db_path(user), user, [day_number(cur_date), day_number(date or cur_date)], before, after)
     return updated
 
 
@@ -116,121 +726,676 @@ def update_event(event_id: int, title: str = None, date: str = None,
 # DELETE EVENT
 # -------------------------------
 def delete_event(event_id: int, user: str = "user1") -> bool:
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("DELETE FROM events WHERE user=? AND id=?", (user, event_id))
-    conn.commit()
-    deleted = cur.rowcount > 0
-    conn.close()
-    return deleted
+    if _shard_missing(user):
+        return False
+    with _cursor(user, create=False) as cur:
+        cur.execute("BEGIN IMMEDIATE")
+        before = _read_version(cur, user)
+        cur.execute("SELECT day FROM events WHERE user=? AND id=?", (user, event_id))
+        days = [day for day, in cur.fetchall()]
+        if not days:
+            return False
+        cur.execute("DELETE FROM events WHERE user=? AND id=?", (user, event_id))
+        after = _read_version(cur, user)
+    day_cache.written(db_path(user), user, days, before, after)
+    return True
 
 
 def delete_event_by_title(title: str, user: str = "user1") -> bool:
     """
-    Delete all events matching a title for a user.
-    Returns True if at least one event was deleted.
+    Delete all events and recurring events matching a title for a user.
+    Returns True if at least one of either was deleted.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("DELETE FROM events WHERE user=? AND title=?", (user, title))
-    conn.commit()
-    deleted = cur.rowcount > 0
-    conn.close()
-    return deleted
+    if _shard_missing(user):
+        return False
+    with _cursor(user, create=False) as cur:
+        cur.execute("BEGIN IMMEDIATE")
+        before = _read_version(cur, user)
+        cur.execute("SELECT DISTINCT day FROM events WHERE user=? AND title=?", (user, title))
+        days = [day for day, in cur.fetchall()]
+        cur.execute("SELECT id FROM recurrences WHERE user=? AND title=?", (user, title))
+        rule_ids = [rule_id for rule_id, in cur.fetchall()]
+        if not days and not rule_ids:
+            return False
+        cur.execute("DELETE FROM events WHERE user=? AND title=?", (user, title))
+        if rule_ids:
+            marks = ",".join("?" * len(rule_ids))
+            cur.execute(f"DELETE FROM recurrence_exceptions WHERE recurrence_id IN ({marks})", rule_ids)
+            cur.execute(f"DELETE FROM recurrences WHERE id IN ({marks})", rule_ids)
+        after = _read_version(cur, user)
+    if rule_ids:
+        # occurrences may have been on any cached day
+        day_cache.invalidate_user(db_path(user), user)
+    else:
+        day_cache.written(db_path(user), user, days, before, after)
+    return True
 
 
 def delete_all_events(user: str = None):
     """
-    Delete all events from the database.
-    If user is provided, only delete events for that user.
+    Delete all events and recurring events from the database.
+    If user is provided, only delete those of that user.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
     if user:
-        cursor.execute("DELETE FROM events WHERE user = ?", (user,))
-    else:
-        cursor.execute("DELETE FROM events")  # delete all events
-
-    conn.commit()
-    conn.close()
+        if _shard_missing(user):
+            return True
+        with _cursor(user, create=False) as cursor:
+            cursor.execute("""
+                DELETE FROM recurrence_exceptions
+                WHERE recurrence_id IN (SELECT id FROM recurrences WHERE user = ?)
+            """, (user,))
+            cursor.execute("DELETE FROM recurrences WHERE user = ?", (user,))
+            cursor.execute("DELETE FROM events WHERE user = ?", (user,))
+        day_cache.invalidate_user(db_path(user), user)
+        return True
+    for path in shard_paths():
+        with _cursor(path=path) as cursor:
+            cursor.execute("DELETE FROM recurrence_exceptions")
+            cursor.execute("DELETE FROM recurrences")
+            cursor.execute("DELETE FROM events")  # delete all events
+    day_cache.clear()
     return True
 
 
 # -------------------------------
 # LIST ALL, LIST BY DATE/TITLE/NEXT N DAYS
 # -------------------------------
+NEXT_DAYS_CACHE_SPAN = 31   # longer list_events_next_n_days ranges bypass the day cache
+
 def list_all_events(user: str = "user1") -> list:
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT id, user, title, date, start_time, end_time
-        FROM events
-        WHERE user=?
-        ORDER BY date ASC, start_time ASC
-    """, (user,))
-    rows = cur.fetchall()
-    conn.close()
-    return [dict(zip(["id", "user", "title", "date", "start_time", "end_time"], r)) for r in rows]
+    """
+    All of a user's events, including occurrences of recurring events
+    (open-ended rules are expanded up to RECURRENCE_HORIZON_DAYS from today).
+    """
+    with _cursor(user, create=False) as cur:
+        cur.execute("""
+            SELECT id, user, title, date, start_time, end_time
+            FROM events
+            WHERE user=?
+            ORDER BY day ASC, start_min ASC, id ASC
+        """, (user,))
+        events = _fetch_events(cur)
+        rules = _load_rules(cur, user)
+    if not rules:
+        return events
+    return list(heapq.merge(events, expand_rules(rules, user), key=event_sort_key))
 
 
 def list_events_on_date(date: str, user: str = "user1") -> list:
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
+    """
+    The user's events on `date`, occurrences merged in. Served from the day
+    cache (db/day_cache.py) while the calendar version is unchanged.
+    Raises ValueError for a date that is not ISO.
+    """
+    date = canonical_date(date)
+    path, day = db_path(user), day_number(date)
+    with _cursor(user, create=False) as cur:
+        # version first: rows read after it are at least that new
+        version = _read_version(cur, user)
+        cached = day_cache.get(path, user, day, version)
+        if cached is not None:
+            return list(cached)
+        events = _read_day(cur, user, date, day)
+    day_cache.put(path, user, day, version, events)
+    return events
+
+
+def _read_day(cur, user: str, date: str, day: int) -> list:
     cur.execute("""
         SELECT id, user, title, date, start_time, end_time
         FROM events
-        WHERE user=? AND date=?
-        ORDER BY start_time ASC
-    """, (user, date))
-    rows = cur.fetchall()
-    conn.close()
-    return [dict(zip(["id", "user", "title", "date", "start_time", "end_time"], r)) for r in rows]
+        WHERE user=? AND day=?
+        ORDER BY start_min ASC, id ASC
+    """, (user, day))
+    events = _fetch_events(cur)
+    rules = _load_rules(cur, user, date, date)
+    if not rules:
+        return events
+    return list(heapq.merge(events, expand_rules(rules, user, date, date), key=event_sort_key))
 
 
 def list_events_by_title(title: str, user: str = "user1") -> list:
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT id, user, title, date, start_time, end_time
-        FROM events
-        WHERE user=? AND title=?
-        ORDER BY date ASC, start_time ASC
-    """, (user, title))
-    rows = cur.fetchall()
-    conn.close()
-    return [dict(zip(["id", "user", "title", "date", "start_time", "end_time"], r)) for r in rows]
+    with _cursor(user, create=False) as cur:
+        cur.execute("""
+            SELECT id, user, title, date, start_time, end_time
+            FROM events
+            WHERE user=? AND title=?
+            ORDER BY day ASC, start_min ASC, id ASC
+        """, (user, title))
+        return _fetch_events(cur)
 
 
 def list_events_next_n_days(n: int, user: str = "user1") -> list:
     """
     Returns all events for the given user within the next `n` days, inclusive.
-    Events are ordered by date then start_time.
+    Events are ordered by date then start time, as a range scan of the
+    (user, day, start_min) index. Spans up to NEXT_DAYS_CACHE_SPAN days go
+    through the day cache: when at least half the days are cached only the
+    others are read (one day each), otherwise the whole range is read and
+    cached.
     """
     today = datetime.today().date()
     end_date = today + timedelta(days=n)
+    path, first = db_path(user), day_number(today.isoformat())
+    days = range(first, first + n + 1) if n < NEXT_DAYS_CACHE_SPAN else None
+
+    with _cursor(user, create=False) as cur:
+        version = _read_version(cur, user)
+        if days is not None:
+            by_day = {day: day_cache.get(path, user, day, version) for day in days}
+            missing = [day for day, events in by_day.items() if events is None]
+            if len(missing) <= len(by_day) // 2:
+                for day in missing:
+                    by_day[day] = _read_day(cur, user, (today + timedelta(days=day - first)).isoformat(), day)
+                    day_cache.put(path, user, day, version, by_day[day])
+                return [ev for events in by_day.values() for ev in events]
+        cur.execute("""
+            SELECT id, user, title, date, start_time, end_time
+            FROM events
+            WHERE user = ?
+              AND day BETWEEN ? AND ?
+            ORDER BY day ASC, start_min ASC, id ASC
+        """, (user, day_number(today.isoformat()), day_number(end_date.isoformat())))
+        events = _fetch_events(cur)
+        rules = _load_rules(cur, user, today.isoformat(), end_date.isoformat())
+
+    if rules:
+        events = list(heapq.merge(events, expand_rules(rules, user, today.isoformat(), end_date.isoformat()),
+                                  key=event_sort_key))
+    if days is not None:
+        by_day = {day: [] for day in days}
+        for ev in events:
+            by_day[day_number(ev.date)].append(ev)
+        for day, day_events in by_day.items():
+            day_cache.put(path, user, day, version, day_events)
+    return events
 
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
 
+# -------------------------------
+# RECURRING EVENTS
+# -------------------------------
+_INSERT_RULE_SQL = """
+    INSERT INTO recurrences (user, title, start_date, start_time, end_time, freq, every, until, occurrences)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def add_recurring_event(title: str, date: str, freq: str, every: int = 1, until: str = None,
+                        occurrences: int = None, start_time: str = None, end_time: str = None,
+                        user: str = "user1") -> dict:
+    """
+    Store a recurrence rule once (freq: daily / weekly / monthly, repeating
+    every `every` periods from `date`, optionally bounded by `until` and/or
+    a number of `occurrences`). Occurrences are never materialised as rows.
+    """
+    if freq not in FREQUENCIES:
+        raise ValueError(f"freq must be one of {', '.join(FREQUENCIES)}")
+    date = canonical_date(date)
+    until = canonical_date(until) if until else None
+    with _cursor(user) as cur:
+        cur.execute(_INSERT_RULE_SQL, (user, title, date, start_time, end_time, freq, int(every or 1), until,
+                                       occurrences))
+        rule_id = cur.lastrowid
+    return {"id": rule_id, "user": user, "title": title, "date": date, "start_time": start_time,
+            "end_time": end_time, "freq": freq, "every": int(every or 1), "until": until,
+            "occurrences": occurrences}
+
+
+def add_recurrence_exception(rule_id: int, date: str, user: str = "user1") -> bool:
+    """Skip a single occurrence of a recurring event. Returns False if the rule is not found."""
+    date = canonical_date(date)
+    if _shard_missing(user):
+        return False
+    with _cursor(user, create=False) as cur:
+        cur.execute("SELECT 1 FROM recurrences WHERE user=? AND id=?", (user, rule_id))
+        if not cur.fetchone():
+            return False
+        cur.execute("INSERT OR IGNORE INTO recurrence_exceptions (recurrence_id, date) VALUES (?, ?)",
+                    (rule_id, date))
+    return True
+
+
+def delete_recurring_event(rule_id: int, user: str = "user1") -> bool:
+    if _shard_missing(user):
+        return False
+    with _cursor(user, create=False) as cur:
+        cur.execute("DELETE FROM recurrences WHERE user=? AND id=?", (user, rule_id))
+        deleted = cur.rowcount > 0
+        if deleted:
+            cur.execute("DELETE FROM recurrence_exceptions WHERE recurrence_id=?", (rule_id,))
+    return deleted
+
+
+def list_recurring_events(user: str = "user1") -> list:
+    """The user's rules as dicts (models.recurrence_row), each with its skipped dates under "exceptions"."""
+    with _cursor(user, create=False) as cur:
+        cur.execute("""
+            SELECT x.recurrence_id, x.date
+            FROM recurrence_exceptions x JOIN recurrences r ON r.id = x.recurrence_id
+            WHERE r.user=?
+            ORDER BY x.date
+        """, (user,))
+        exceptions = {}
+        for rule_id, exc_date in cur.fetchall():
+            exceptions.setdefault(rule_id, []).append(exc_date)
+        cur.row_factory = recurrence_row
+        try:
+            cur.execute("""
+                SELECT id, user, title, start_date, start_time, end_time, freq, every, until, occurrences
+                FROM recurrences
+                WHERE user=?
+                ORDER BY start_date ASC, start_time ASC
+            """, (user,))
+            rules = cur.fetchall()
+        finally:
+            cur.row_factory = None
+    for rule in rules:
+        rule["exceptions"] = exceptions.get(rule["id"], [])
+    return rules
+
+
+def _load_rules(cur, user: str, first: str = None, last: str = None) -> list:
+    """Rules of `user` that may have occurrences in [first, last], with their exception dates."""
     cur.execute("""
-        SELECT id, user, title, date, start_time, end_time
-        FROM events
+        SELECT id, title, start_date, start_time, end_time, freq, every, until, occurrences
+        FROM recurrences
         WHERE user = ?
-          AND date(date) >= date(?)
-          AND date(date) <= date(?)
-        ORDER BY date ASC, start_time ASC
-    """, (user, today.isoformat(), end_date.isoformat()))
+          AND start_date <= IFNULL(?, start_date)
+          AND (until IS NULL OR until >= IFNULL(?, until))
+    """, (user, last, first))
+    rules = cur.fetchall()
+    if not rules:
+        return []
+    exceptions = {}
+    cur.execute(f"""
+        SELECT recurrence_id, date FROM recurrence_exceptions
+        WHERE recurrence_id IN ({','.join('?' * len(rules))})
+    """, [r[0] for r in rules])
+    for rule_id, exc_date in cur.fetchall():
+        exceptions.setdefault(rule_id, set()).add(date_cls.fromisoformat(exc_date))
+    return [(r, exceptions.get(r[0], ())) for r in rules]
+
+
+# -------------------------------
+# FULL-TEXT SEARCH
+# -------------------------------
+SEARCH_LIMIT = 50
+# Calendars smaller than this are searched by scanning the user's titles: it is
+# cheaper than having FTS5 rank a common word's matches across every user.
+SEARCH_SCAN_THRESHOLD = 5000
+_fts_available = None
+
+
+def _has_fts(cur) -> bool:
+    global _fts_available
+    if _fts_available is None:
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='events_fts'")
+        _fts_available = cur.fetchone() is not None
+    return _fts_available
+
+
+def _fts_query(terms: list) -> str:
+    """Every term must match as a word prefix: "team" "sync" -> "team"* AND "sync"*."""
+    return " AND ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+
+
+def search_events(keyword: str, user: str = "user1", limit: int = SEARCH_LIMIT) -> list:
+    """
+    Events whose title contains every word of `keyword` as a word prefix
+    ("proj rev" matches "Project review"), best matches (bm25) first.
+    Recurring events whose title matches are included once each, with the
+    rule id ("R3") and the series' first date, after the ranked events.
+
+    Large calendars are searched through the FTS5 index; small ones (and
+    SQLite builds without FTS5) by a LIKE scan of the user's titles, ordered
+    by title length - what bm25 reduces to when each term occurs once. Both
+    paths split and fold words the same way (models.search_terms).
+    """
+    terms = search_terms(keyword)
+    if not terms:
+        return []
+
+    # LIKE is exact only for ASCII titles (it neither lowercases nor folds other
+    # letters): titles with any other character go to title_matches unfiltered
+    title_like = ("(" + " AND ".join(["title LIKE ?"] * len(terms))
+                  + " OR length(title) < length(CAST(title AS BLOB)))")     # more bytes than characters
+    patterns = [f"%{t}%" for t in terms]      # terms never hold LIKE wildcards (% and _ split words)
+    with _cursor(user, create=False) as cur:
+        use_fts = _has_fts(cur)
+        if use_fts:
+            cur.execute("SELECT count(*) FROM (SELECT 1 FROM events WHERE user=? LIMIT ?)",
+                        (user, SEARCH_SCAN_THRESHOLD))
+            use_fts = cur.fetchone()[0] >= SEARCH_SCAN_THRESHOLD
+        if use_fts:
+            cur.execute("""
+                SELECT e.id, e.user, e.title, e.date, e.start_time, e.end_time
+                FROM events_fts
+                CROSS JOIN events e ON e.id = events_fts.rowid   -- drive from the index, not the user's rows
+                WHERE events_fts MATCH ? AND e.user = ?
+                ORDER BY events_fts.rank, e.day, e.start_min, e.id
+                LIMIT ?
+            """, (_fts_query(terms), user, limit))
+            events = _fetch_events(cur)
+        else:
+            # LIKE narrows to substring matches; the word-prefix check is done below
+            cur.execute(f"""
+                SELECT id, user, title, date, start_time, end_time
+                FROM events
+                WHERE user = ? AND {title_like}
+            """, (user, *patterns))
+            events = [ev for ev in _fetch_events(cur) if title_matches(ev.title, terms)]
+            events.sort(key=lambda ev: (title_rank(ev), page_key(ev)))
+            del events[limit:]
+        cur.execute(f"""
+            SELECT id, title, start_date, start_time, end_time
+            FROM recurrences
+            WHERE user = ? AND {title_like}
+            ORDER BY start_date ASC, start_time ASC
+        """, (user, *patterns))
+        rules = [r for r in cur.fetchall() if title_matches(r[1], terms)]
+    events += [Event(f"R{rule_id}", user, title, start_date, start_time, end_time)
+               for rule_id, title, start_date, start_time, end_time in rules]
+    return events[:limit]
+
+
+# -------------------------------
+# PAGINATED / STREAMING LISTINGS
+# -------------------------------
+PAGE_SIZE = 100
+
 
-    rows = cur.fetchall()
-    conn.close()
+def list_events_page(user: str = "user1", limit: int = PAGE_SIZE, after: str = None,
+                     start_date: str = None, end_date: str = None) -> tuple:
+    """
+    One page of a user's events ordered by (day, start_min, id), optionally
+    restricted to start_date..end_date (inclusive).
+    `after` is the cursor returned by the previous page. Keyset pagination
+    seeks straight to the cursor through the (user, day, start_min) index,
+    so every page costs O(limit) no matter how deep it is.
+    Occurrences of recurring events are merged in; they are expanded from
+    the cursor position onwards only.
+    Returns (events, next_cursor); next_cursor is None on the last page.
+    """
+    where = ["user = ?"]
+    params = [user]
+    for bound, op in ((start_date, ">="), (end_date, "<=")):
+        if bound:
+            day = day_number(bound)
+            if day is None:
+                raise ValueError(f"Invalid date: {bound!r}")
+            where.append(f"day {op} ?"); params.append(day)
+    after_key = None
+    if after:
+        cur_day, cur_start, cur_id = decode_cursor(after)
+        after_key = cursor_key(cur_day, cur_start, cur_id)
+        if isinstance(cur_id, str):
+            cur_id = 2 ** 63 - 1     # stored events sort before occurrences at the same time
+        # NULL start_min sorts first, so it needs its own comparison
+        if cur_start is None:
+            where.append("day >= ? AND (day > ? OR start_min IS NOT NULL OR id > ?)")
+            params += [cur_day, cur_day, cur_id]
+        else:
+            where.append("day >= ? AND (day > ? OR start_min > ? OR (start_min = ? AND id > ?))")
+            params += [cur_day, cur_day, cur_start, cur_start, cur_id]
+
+    with _cursor(user, create=False) as cur:
+        cur.execute(f"""
+            SELECT id, user, title, date, start_time, end_time, day, start_min
+            FROM events
+            WHERE {' AND '.join(where)}
+            ORDER BY day ASC, start_min ASC, id ASC
+            LIMIT ?
+        """, (*params, limit + 1))
+        rows = cur.fetchall()
+        window_start = max(filter(None, (start_date, after_key and after_key[0])), default=None)
+        rules = _load_rules(cur, user, window_start, end_date)
+
+    events = [Event._make(row[:6]) for row in rows]
+    if rules:
+        occurrences = (ev for ev in expand_rules(rules, user, window_start, end_date)
+                       if after_key is None or page_key(ev) > after_key)
+        events = list(itertools.islice(
+            heapq.merge(events, occurrences, key=page_key), limit + 1))
+    if len(events) <= limit:
+        return events, None
+    # the cursor carries the stored day / start_min, not the display strings
+    last = events[limit - 1]
+    stored = next((row[6:] for row in rows if row[0] == last.id), None)
+    day, start_min = stored or event_position(last)[:2]
+    return events[:limit], encode_cursor(day, start_min, last.id)
+
+
+def iter_all_events(user: str = "user1", batch_size: int = PAGE_SIZE, after: str = None,
+                    start_date: str = None, end_date: str = None):
+    """
+    Generator over a user's events, fetched page by page with list_events_page.
+    No connection is held between pages, so it is safe to consume slowly.
+    """
+    while True:
+        events, after = list_events_page(user, batch_size, after, start_date, end_date)
+        yield from events
+        if after is None:
+            return
+
+
+def iter_events_next_n_days(n: int, user: str = "user1", batch_size: int = PAGE_SIZE):
+    """Generator variant of list_events_next_n_days."""
+    today = datetime.today().date()
+    end_date = today + timedelta(days=n)
+    return iter_all_events(user, batch_size, start_date=today.isoformat(), end_date=end_date.isoformat())
+
+
+# -------------------------------
+# ADMIN: ALL USERS / ALL SHARDS
+# -------------------------------
+def list_users() -> list:
+    """Every user with events or recurring events, across all shards, sorted."""
+    users = set()
+    for path in shard_paths():
+        with _cursor(path=path) as cur:
+            cur.execute("SELECT DISTINCT user FROM events UNION SELECT DISTINCT user FROM recurrences")
+            users.update(user for user, in cur.fetchall())
+    return sorted(users)
+
+
+def iter_events_all_users(start_date: str = None, end_date: str = None, batch_size: int = PAGE_SIZE):
+    """
+    Admin listing of every user's events (recurring occurrences included),
+    user by user in name order and each user's in listing order. Pages
+    through one shard at a time like iter_all_events.
+    """
+    for user in list_users():
+        yield from iter_all_events(user, batch_size, start_date=start_date, end_date=end_date)
+
+
+# -------------------------------
+# BULK IMPORT / EXPORT
+# -------------------------------
+IMPORT_CHUNK_SIZE = 500
 
-    # Convert rows to list of dicts
-    return [
-        dict(zip(["id", "user", "title", "date", "start_time", "end_time"], row))
-        for row in rows
-    ]
+_INSERT_EVENT_SQL = """
+    INSERT INTO events (user, title, date, start_time, end_time, day, start_min, end_min)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
 
-# Ensure DB exists
-init_db()
+def import_events(events, user: str = "user1", chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """
+    Insert many events in a single transaction.
+    `events` is any iterable of dicts with title, date, start_time, end_time;
+    it is consumed chunk by chunk, so a generator keeps memory constant.
+    Each chunk goes through executemany; a chunk that hits a duplicate is
+    rolled back to its savepoint and retried row by row, so duplicates are
+    reported per row instead of aborting the import; so are rows without a
+    title or date, whose date is not ISO, or that the reader could not
+    parse (an "error" key, see event_io).
+    Rows with an "rrule" (recurring events, see event_io) are stored as a
+    recurrence rule with their "exdates" as exceptions.
+    Returns {"inserted": int, "conflicts": [{"row": n, "event": {...}, "reason": str}]},
+    conflicts in input order. Rows are numbered from 1.
+    """
+    inserted = 0
+    conflicts = []
+    rows = enumerate(events, start=1)
+
+    with _cursor(user) as cur:
+        cur.execute("BEGIN IMMEDIATE")
+        while True:
+            batch = list(itertools.islice(rows, chunk_size))
+            if not batch:
+                break
+            chunk, skipped = [], []
+            for row_no, ev in batch:
+                if ev.get("error"):         # a record event_io could not parse
+                    skipped.append({"row": row_no, "event": ev, "reason": ev["error"]})
+                    continue
+                if not ev.get("title") or not ev.get("date"):
+                    skipped.append({"row": row_no, "event": ev, "reason": "missing title or date"})
+                    continue
+                try:
+                    date = canonical_date(ev["date"])
+                except ValueError:
+                    skipped.append({"row": row_no, "event": ev, "reason": "invalid date"})
+                    continue
+                start_time, end_time = ev.get("start_time") or None, ev.get("end_time") or None
+                if ev.get("rrule"):
+                    reason = _import_rule(cur, user, ev, date, start_time, end_time)
+                    if reason:
+                        skipped.append({"row": row_no, "event": ev, "reason": reason})
+                    else:
+                        inserted += 1
+                    continue
+                chunk.append((row_no, ev, (user, ev["title"], date, start_time, end_time,
+                                           *time_columns(date, start_time, end_time))))
+
+            if chunk:
+                cur.execute("SAVEPOINT import_chunk")
+                try:
+                    cur.executemany(_INSERT_EVENT_SQL, [params for _, _, params in chunk])
+                    inserted += len(chunk)
+                except sqlite3.IntegrityError:
+                    cur.execute("ROLLBACK TO import_chunk")
+                    for row_no, ev, params in chunk:
+                        try:
+                            cur.execute(_INSERT_EVENT_SQL, params)
+                            inserted += 1
+                        except sqlite3.IntegrityError:
+                            skipped.append({"row": row_no, "event": ev, "reason": "duplicate event"})
+                cur.execute("RELEASE import_chunk")
+            # duplicates are only found after the rest of the chunk: report in input order
+            conflicts.extend(sorted(skipped, key=itemgetter("row")))
+
+    return {"inserted": inserted, "conflicts": conflicts}
+
+
+def _import_rule(cur, user: str, ev: dict, date: str, start_time: str, end_time: str) -> str:
+    """Store an imported recurring event; returns why it was skipped, or None."""
+    try:
+        rule = parse_rrule(ev["rrule"])
+        exdates = [canonical_date(d) for d in ev.get("exdates") or ()]
+    except ValueError:
+        return "invalid recurrence"
+    cur.execute("""
+        SELECT 1 FROM recurrences
+        WHERE user=? AND title=? AND start_date=? AND start_time IS ? AND freq=? AND every=?
+          AND until IS ? AND occurrences IS ?
+    """, (user, ev["title"], date, start_time, rule["freq"], rule["every"], rule["until"], rule["occurrences"]))
+    if cur.fetchone():
+        return "duplicate event"
+    cur.execute(_INSERT_RULE_SQL, (user, ev["title"], date, start_time, end_time, rule["freq"], rule["every"],
+                                   rule["until"], rule["occurrences"]))
+    rule_id = cur.lastrowid
+    cur.executemany("INSERT OR IGNORE INTO recurrence_exceptions (recurrence_id, date) VALUES (?, ?)",
+                    [(rule_id, d) for d in exdates])
+    return None
+
+
+# -------------------------------
+# BATCH WRITES
+# -------------------------------
+def _run_batch(items, apply, atomic: bool, user: str, create: bool = True) -> list:
+    """
+    Run `apply(cur, item)` for every item inside one write transaction, each
+    under its own savepoint so a failing item is undone on its own.
+    `apply` returns the item's result dict or raises ValueError.
+    With atomic=True the first failure rolls back the whole batch and the
+    remaining items are not attempted.
+    `create`=False (deletes) leaves a missing shard uncreated.
+    """
+    results = []
+    with _cursor(user, create=create) as cur:
+        cur.execute("BEGIN IMMEDIATE")
+        for item in items:
+            cur.execute("SAVEPOINT batch_item")
+            try:
+                results.append({"success": True, **apply(cur, item)})
+                cur.execute("RELEASE batch_item")
+            except ValueError as e:
+                cur.execute("ROLLBACK TO batch_item")
+                cur.execute("RELEASE batch_item")
+                results.append({"success": False, "error": str(e)})
+                if atomic:
+                    cur.execute("ROLLBACK")
+                    break
+    if atomic and not all(r["success"] for r in results):
+        skipped = len(items) - len(results)
+        results = [r if not r["success"] else {"success": False, "error": "rolled back"} for r in results]
+        results += [{"success": False, "error": "not attempted"}] * skipped
+    return results
+
+
+def _add_one(cur, ev: dict, user: str) -> dict:
+    title, date = ev.get("title"), ev.get("date")
+    if not title or not date:
+        raise ValueError("missing title or date")
+    date = canonical_date(date)
+    start_time, end_time = ev.get("start_time") or None, ev.get("end_time") or None
+    if ev.get("reject_on_conflict"):
+        interval = event_interval(start_time, end_time)
+        if interval:
+            clashes = _day_index(cur, user, date, cached=False).overlapping(*interval)
+            if clashes:
+                raise ValueError("Conflicts with: " + ", ".join(
+                    f"[{c.id}] {c.title} {c.start_time}-{c.end_time or ''}" for c in clashes))
+    try:
+        cur.execute(_INSERT_EVENT_SQL, (user, title, date, start_time, end_time,
+                                        *time_columns(date, start_time, end_time)))
+    except sqlite3.IntegrityError:
+        raise ValueError("Duplicate event: same title/date/start time already exists")
+    return {"event": Event(cur.lastrowid, user, title, date, start_time, end_time)}
+
+
+def add_events(events: list, user: str = "user1", atomic: bool = False) -> list:
+    """
+    Add several events in one transaction (one commit instead of one per event).
+    `events` are dicts like add_event's arguments (reject_on_conflict included).
+    Returns one result per event, in order:
+    {"success": True, "event": Event} or {"success": False, "error": "..."}.
+    atomic=True writes all events or none.
+    """
+    events = list(events)
+    return _run_batch(events, lambda cur, ev: _add_one(cur, ev, user), atomic, user)
+
+
+def _delete_one(cur, event_id, user: str) -> dict:
+    cur.execute("DELETE FROM events WHERE user=? AND id=?", (user, event_id))
+    if cur.rowcount == 0:
+        raise ValueError(f"Event {event_id} not found")
+    return {"event_id": event_id}
+
+
+def delete_events(event_ids: list, user: str = "user1", atomic: bool = False) -> list:
+    """
+    Delete several events in one transaction. Returns one result per id, in order:
+    {"success": True, "event_id": id} or {"success": False, "error": "..."}.
+    atomic=True deletes all of them or none.
+    """
+    event_ids = list(event_ids)
+    if _shard_missing(user):
+        results = [{"success": False, "error": f"Event {event_id} not found"} for event_id in event_ids]
+        if atomic:
+            results[1:] = [{"success": False, "error": "not attempted"}] * (len(results) - 1)
+        return results
+    return _run_batch(event_ids, lambda cur, event_id: _delete_one(cur, event_id, user), atomic, user,
+                      create=False)
+
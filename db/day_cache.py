@@ -0,0 +1,112 @@
+# day_cache.py
+"""
+Bounded LRU cache of one user's event list per day, behind
+database.list_events_on_date and database.list_events_next_n_days. Days are
+keyed by the integer day column (timeutil.day_number), so any spelling of a
+date finds the same entry.
+
+Entries are tagged with the calendar version (database.calendar_version)
+they were read at and are served only while that version is current, so
+writes from other processes (the CLI, another web worker) are never masked.
+Writes made by this process go through written(): the days they touch are
+dropped and the user's other entries move to the new version, so adding one
+event does not empty the cache for the rest of the week.
+
+An entry also records the day it was read on: open-ended recurring events
+are expanded up to a horizon that moves at midnight.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import date as date_cls
+
+from logs import metrics
+
+DAY_CACHE_SIZE = int(os.getenv("DAY_CACHE_SIZE", "2048"))   # (user, day) lists kept; 0 disables
+
+
+class DayCache:
+    def __init__(self, max_size: int = DAY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()    # (db path, user, day) -> [version, read on, events tuple]
+        self._days = {}                  # (db path, user) -> set of cached days
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._invalidations = self._retagged = 0
+
+    def get(self, scope: str, user: str, day: int, version: int):
+        """The cached events of `day` (a tuple), or None if absent or stale."""
+        key = (scope, user, day)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or entry[1] != date_cls.today():
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    def put(self, scope: str, user: str, day: int, version: int, events):
+        if self.max_size <= 0 or day is None:
+            return
+        key = (scope, user, day)
+        with self._lock:
+            self._entries[key] = [version, date_cls.today(), tuple(events)]
+            self._entries.move_to_end(key)
+            self._days.setdefault(key[:2], set()).add(day)
+            while len(self._entries) > self.max_size:
+                self._forget(self._entries.popitem(last=False)[0])
+                self._evictions += 1
+
+    def _forget(self, key: tuple):
+        days = self._days.get(key[:2])
+        if days is not None:
+            days.discard(key[2])
+            if not days:
+                del self._days[key[:2]]
+
+    def written(self, scope: str, user: str, days, before: int, after: int):
+        """
+        A committed write moved `user`'s version from `before` to `after` and
+        changed only `days`: drop those, and carry entries read at `before`
+        over to `after` (they are still exact).
+        """
+        with self._lock:
+            for day in set(days):
+                if self._entries.pop((scope, user, day), None) is not None:
+                    self._forget((scope, user, day))
+                    self._invalidations += 1
+            for day in self._days.get((scope, user), ()):
+                entry = self._entries[(scope, user, day)]
+                if entry[0] == before:
+                    entry[0] = after
+                    self._retagged += 1
+
+    def invalidate_user(self, scope: str, user: str):
+        with self._lock:
+            for day in self._days.pop((scope, user), ()):
+                del self._entries[(scope, user, day)]
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._days.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "retagged": self._retagged,
+            }
+
+
+day_cache = DayCache()
+metrics.register_stats("day_cache", day_cache.stats)
@@ -0,0 +1,287 @@
+# event_io.py
+"""
+Streaming readers/writers for event files (CSV, JSON Lines, iCalendar).
+Readers are generators yielding one event dict at a time, so they can be fed
+straight into database.import_events without loading the file into memory;
+a record they cannot parse is yielded with an "error" key, which the import
+reports for that row instead of stopping.
+Writers take the Event tuples the database listings return (db/models.py),
+plus the rules list_recurring_events returns: a recurring event is written
+once, with its rule as an iCalendar RRULE value and its skipped dates
+(EXDATE), and is read back as one row carrying "rrule" / "exdates".
+"""
+import csv
+import json
+import os
+from operator import attrgetter
+from datetime import datetime, timezone
+
+from db.recurrence import format_rrule
+from db.timeutil import format_minutes, parse_time
+
+FORMATS = ("csv", "jsonl", "ics")
+EVENT_FIELDS = ["title", "date", "start_time", "end_time"]
+RULE_FIELDS = ["rrule", "exdates"]      # only set on recurring events
+_event_fields = attrgetter(*EVENT_FIELDS)
+
+_EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".ics": "ics",
+    ".ical": "ics",
+}
+
+
+def detect_format(path: str) -> str:
+    """Guess the file format from its extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in _EXTENSIONS:
+        raise ValueError(f"Cannot detect format of '{path}', expected one of {', '.join(FORMATS)}")
+    return _EXTENSIONS[ext]
+
+
+def _clean(ev: dict) -> dict:
+    """Keep the known fields; blank strings become None. Rule fields are kept only when set."""
+    out = {}
+    for field in EVENT_FIELDS:
+        value = ev.get(field)
+        if isinstance(value, str):
+            value = value.strip() or None
+        out[field] = value
+    rrule = (ev.get("rrule") or "").strip()
+    if rrule:
+        out["rrule"] = rrule
+        exdates = ev.get("exdates") or []
+        out["exdates"] = exdates.split() if isinstance(exdates, str) else list(exdates)
+    return out
+
+
+def _rule_row(rule: dict) -> dict:
+    """An exported recurring event: its first occurrence plus the rule fields."""
+    return {"title": rule["title"], "date": rule["date"], "start_time": rule["start_time"],
+            "end_time": rule["end_time"],
+            "rrule": format_rrule(rule["freq"], rule["every"], rule["until"], rule["occurrences"]),
+            "exdates": list(rule.get("exceptions") or ())}
+
+
+# ============================
+# Readers
+# ============================
+def read_csv(f):
+    for row in csv.DictReader(f):
+        yield _clean(row)
+
+
+def read_jsonl(f):
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            ev = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"error": f"malformed JSON: {e.msg}"}
+            continue
+        yield _clean(ev) if isinstance(ev, dict) else {"error": "not a JSON object"}
+
+
+def _unfold_ics(f):
+    """Yield logical iCalendar lines (continuation lines start with a space or tab)."""
+    pending = None
+    for raw in f:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def _ics_unescape(value: str) -> str:
+    return (value.replace("\\n", "\n").replace("\\N", "\n")
+                 .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\"))
+
+
+def _ics_datetime(value: str):
+    """
+    Parse DTSTART/DTEND values: 20250921 (all-day), 20250921T140000 or 20250921T140000Z.
+    Times are kept as written (no timezone conversion).
+    Returns (YYYY-MM-DD, HH:MM or None).
+    """
+    value = value.rstrip("Z")
+    if "T" in value:
+        dt = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+        return dt.strftime("%Y-%m-%d"), dt.strftime("%H:%M")
+    return datetime.strptime(value[:8], "%Y%m%d").strftime("%Y-%m-%d"), None
+
+
+def read_ics(f):
+    ev = None
+    for line in _unfold_ics(f):
+        if line == "BEGIN:VEVENT":
+            ev = {}
+            continue
+        if line == "END:VEVENT":
+            if ev is not None:
+                yield {**_clean(ev), "error": ev["error"]} if "error" in ev else _clean(ev)
+            ev = None
+            continue
+        if ev is None or ":" not in line:
+            continue
+        name, value = line.split(":", 1)
+        name = name.split(";", 1)[0].upper()    # drop parameters like ;TZID=... / ;VALUE=DATE
+        try:
+            if name == "SUMMARY":
+                ev["title"] = _ics_unescape(value)
+            elif name == "DTSTART":
+                ev["date"], ev["start_time"] = _ics_datetime(value)
+            elif name == "DTEND":
+                ev["end_time"] = _ics_datetime(value)[1]
+            elif name == "RRULE":
+                ev["rrule"] = value
+            elif name == "EXDATE":
+                ev.setdefault("exdates", []).extend(_ics_datetime(v)[0] for v in value.split(","))
+        except ValueError:
+            ev.setdefault("error", f"invalid {name}: {value}")
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "ics": read_ics}
+
+
+def read_events(f, fmt: str):
+    """Stream events from an open text file in the given format."""
+    return READERS[fmt](f)
+
+
+# ============================
+# Writers
+# ============================
+def write_csv(events, f, rules=(), dropped=None) -> int:
+    writer = csv.writer(f)
+    writer.writerow(EVENT_FIELDS + RULE_FIELDS)
+    count = 0
+    for ev in events:
+        writer.writerow([*_event_fields(ev), "", ""])
+        count += 1
+    for rule in rules:
+        row = _rule_row(rule)
+        writer.writerow([row[field] for field in EVENT_FIELDS] + [row["rrule"], " ".join(row["exdates"])])
+        count += 1
+    return count
+
+
+def write_jsonl(events, f, rules=(), dropped=None) -> int:
+    count = 0
+    for ev in events:
+        f.write(json.dumps(dict(zip(EVENT_FIELDS, _event_fields(ev)))) + "\n")
+        count += 1
+    for rule in rules:
+        f.write(json.dumps(_rule_row(rule)) + "\n")
+        count += 1
+    return count
+
+
+def _ics_escape(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace(";", "\\;")
+                 .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _ics_fold(line: str) -> str:
+    """Fold lines longer than 75 characters as required by RFC 5545."""
+    if len(line) <= 75:
+        return line + "\r\n"
+    parts = [line[:75]] + [" " + line[i:i + 74] for i in range(75, len(line), 74)]
+    return "\r\n".join(parts) + "\r\n"
+
+
+def _ics_stamp(date: str, time: str = None) -> str:
+    stamp = date.replace("-", "")
+    if time:
+        stamp += "T" + datetime.strptime(time, "%H:%M").strftime("%H%M%S")
+    return stamp
+
+
+def _ics_clock(value) -> str:
+    """ "5 pm" -> "17:00"; None when empty or not a recognisable time."""
+    minutes = parse_time(value)
+    return None if minutes is None else format_minutes(minutes)
+
+
+def _ics_times(date: str, start_time: str, end_time: str) -> tuple:
+    """
+    (DTSTART/DTEND lines, start as HH:MM or None, the times that could not be
+    read). Free-form times ("5 pm") are normalized; an event whose start is
+    not a recognisable time is written all-day, an unreadable end is left out.
+    """
+    start, end = _ics_clock(start_time), _ics_clock(end_time)
+    unreadable = [value for value, clock in ((start_time, start), (end_time, end)) if value and clock is None]
+    if start is None:
+        return [f"DTSTART;VALUE=DATE:{_ics_stamp(date)}"], None, unreadable
+    lines = [f"DTSTART:{_ics_stamp(date, start)}"]
+    if end:
+        lines.append(f"DTEND:{_ics_stamp(date, end)}")
+    return lines, start, unreadable
+
+
+def write_ics(events, f, rules=(), dropped=None) -> int:
+    now = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Smart Calendar Assistant//EN\r\n")
+    count = 0
+    for ev in events:
+        times, _, unreadable = _ics_times(ev.date, ev.start_time, ev.end_time)
+        if unreadable and dropped is not None:
+            dropped.append({"event": dict(zip(EVENT_FIELDS, _event_fields(ev))), "times": unreadable})
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{ev.id}-{ev.user}@smart-calendar",
+            f"DTSTAMP:{now}",
+            f"SUMMARY:{_ics_escape(ev.title)}",
+            *times,
+            "END:VEVENT",
+        ]
+        f.write("".join(_ics_fold(line) for line in lines))
+        count += 1
+    for rule in rules:
+        row = _rule_row(rule)
+        times, start, unreadable = _ics_times(row["date"], row["start_time"], row["end_time"])
+        if unreadable and dropped is not None:
+            dropped.append({"event": {field: row[field] for field in EVENT_FIELDS}, "times": unreadable})
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:R{rule['id']}-{rule['user']}@smart-calendar",
+            f"DTSTAMP:{now}",
+            f"SUMMARY:{_ics_escape(row['title'])}",
+            *times,
+            f"RRULE:{row['rrule']}",
+        ]
+        if row["exdates"]:
+            # EXDATE takes DTSTART's value type
+            if start is None:
+                lines.append("EXDATE;VALUE=DATE:" + ",".join(_ics_stamp(d) for d in row["exdates"]))
+            else:
+                lines.append("EXDATE:" + ",".join(_ics_stamp(d, start) for d in row["exdates"]))
+        lines.append("END:VEVENT")
+        f.write("".join(_ics_fold(line) for line in lines))
+        count += 1
+    f.write("END:VCALENDAR\r\n")
+    return count
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "ics": write_ics}
+
+
+def write_events(events, f, fmt: str, rules=(), dropped: list = None) -> int:
+    """
+    Stream events, then recurring events (`rules`), to an open text file;
+    returns the number written. Pass stored events only: occurrences are
+    written through their rule.
+    Events whose times the format cannot carry (iCalendar needs real clock
+    times; "tbd" is written all-day) are appended to `dropped` as
+    {"event": {...}, "times": [unreadable values]}. CSV and JSON Lines
+    keep times as stored.
+    """
+    return WRITERS[fmt](events, f, rules, dropped)
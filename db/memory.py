@@ -0,0 +1,493 @@
+# memory.py
+"""
+In-memory storage backend (CALENDAR_BACKEND=memory): the same interface and
+behaviour as the SQLite store (db/database.py) without any disk I/O, for
+tests, demos and ephemeral deployments. Data lives as long as the process.
+
+Per user: a list of events kept sorted in listing order (page_key), which
+date ranges and cursors binary-search into, plus dict indexes by id, by
+title and by (title, date, start_time) - the last one mirroring SQLite's
+UNIQUE constraint, under which events without a start time never collide.
+Recurrence rules are stored as rows and expanded lazily, as on disk.
+
+Search always uses the scan ordering (shortest matching titles first) that
+the SQLite store uses for calendars below SEARCH_SCAN_THRESHOLD.
+"""
+import bisect
+import heapq
+import itertools
+import math
+import threading
+from datetime import date as date_cls, datetime, timedelta
+from operator import itemgetter
+
+from db.database import IMPORT_CHUNK_SIZE, PAGE_SIZE, SEARCH_LIMIT
+from db.models import (Event, event_sort_key, page_key, encode_cursor, decode_cursor, cursor_key,
+                       event_position, recurrence_row, search_terms, title_matches, title_rank)
+from db.recurrence import FREQUENCIES, expand_rules, parse_rrule
+from db.scheduling import slot_window, free_slots_by_day
+from db.timeutil import canonical_date, day_number, event_interval
+
+
+def _as_id(value):
+    """Ids arrive as ints or digit strings (SQLite compares them numerically)."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Calendar:
+    """One user's events and recurrence rules."""
+
+    def __init__(self):
+        self.events = []         # sorted by page_key
+        self.by_id = {}          # id -> Event
+        self.by_title = {}       # title -> {id: Event}
+        self.unique = {}         # (title, date, start_time) -> id, timed events only
+        self.rules = {}          # rule id -> (id, title, start_date, start_time, end_time, freq, every, until, occurrences)
+        self.exceptions = {}     # rule id -> set of excepted dates
+        self.version = 0
+
+    def index(self, ev: Event):
+        """Add `ev` to the dict indexes (the sorted list is the caller's job)."""
+        self.by_id[ev.id] = ev
+        self.by_title.setdefault(ev.title, {})[ev.id] = ev
+        if ev.start_time is not None:
+            self.unique[(ev.title, ev.date, ev.start_time)] = ev.id
+
+    def insert(self, ev: Event):
+        self.index(ev)
+        bisect.insort(self.events, ev, key=page_key)
+
+    def remove(self, ev: Event):
+        del self.events[bisect.bisect_left(self.events, page_key(ev), key=page_key)]
+        del self.by_id[ev.id]
+        titled = self.by_title[ev.title]
+        del titled[ev.id]
+        if not titled:
+            del self.by_title[ev.title]
+        if ev.start_time is not None:
+            del self.unique[(ev.title, ev.date, ev.start_time)]
+
+    def clashes_with(self, title: str, date: str, start_time: str, event_id=None) -> bool:
+        if start_time is None:
+            return False
+        other = self.unique.get((title, date, start_time))
+        return other is not None and other != event_id
+
+    def bounds(self, first: str = None, last: str = None, after: tuple = None) -> tuple:
+        """Slice [lo, hi) of self.events within first..last (ISO dates) and after a page_key."""
+        lo = bisect.bisect_left(self.events, (first,), key=page_key) if first else 0
+        if after is not None:
+            lo = max(lo, bisect.bisect_right(self.events, after, key=page_key))
+        hi = bisect.bisect_left(self.events, (last, math.inf), key=page_key) if last else len(self.events)
+        return lo, hi
+
+    def between(self, first: str = None, last: str = None) -> list:
+        lo, hi = self.bounds(first, last)
+        return self.events[lo:hi]
+
+    def rules_between(self, first: str = None, last: str = None) -> list:
+        """(rule, exception dates) pairs that may have occurrences in [first, last]."""
+        return [(rule, self.exceptions.get(rule[0], ()))
+                for rule in self.rules.values()
+                if (last is None or rule[2] <= last) and (rule[7] is None or first is None or rule[7] >= first)]
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._calendars = {}                     # user -> _Calendar
+        self._last_event_id = 0                  # shared by all users, like AUTOINCREMENT
+        self._rule_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def init(self):
+        pass
+
+    def _calendar(self, user: str) -> _Calendar:
+        cal = self._calendars.get(user)
+        if cal is None:
+            cal = self._calendars[user] = _Calendar()
+        return cal
+
+    def calendar_version(self, user: str = "user1") -> int:
+        cal = self._calendars.get(user)
+        return cal.version if cal else 0
+
+    # -------------------------------
+    # ADD / CONFLICTS / FREE SLOTS
+    # -------------------------------
+    def _overlapping(self, cal: _Calendar, user: str, date: str, interval: tuple) -> list:
+        """Events and occurrences on `date` overlapping `interval`, ordered by (start, end)."""
+        start, end = interval
+        hits = []
+        for ev in itertools.chain(cal.between(date, date),
+                                  expand_rules(cal.rules_between(date, date), user, date, date)):
+            ev_interval = event_interval(ev.start_time, ev.end_time)
+            if ev_interval and ev_interval[0] < end and ev_interval[1] > start:
+                hits.append((*ev_interval, ev))
+        hits.sort(key=lambda hit: hit[:2])
+        return [ev for _, _, ev in hits]
+
+    def _add(self, cal: _Calendar, user: str, title: str, date: str, start_time: str, end_time: str,
+             reject_on_conflict: bool = False) -> Event:
+        if reject_on_conflict:
+            interval = event_interval(start_time, end_time)
+            if interval:
+                clashes = self._overlapping(cal, user, date, interval)
+                if clashes:
+                    raise ValueError("Conflicts with: " + ", ".join(
+                        f"[{ev.id}] {ev.title} {ev.start_time}-{ev.end_time or ''}" for ev in clashes))
+        if cal.clashes_with(title, date, start_time):
+            raise ValueError("Duplicate event: same title/date/start time already exists")
+        self._last_event_id += 1
+        ev = Event(self._last_event_id, user, title, date, start_time, end_time)
+        cal.insert(ev)
+        cal.version += 1
+        return ev
+
+    def add_event(self, title: str, date: str, start_time: str = None, end_time: str = None,
+                  user: str = "user1", reject_on_conflict: bool = False) -> Event:
+        date = canonical_date(date)
+        with self._lock:
+            return self._add(self._calendar(user), user, title, date, start_time, end_time, reject_on_conflict)
+
+    def find_conflicts(self, date: str, start_time: str, end_time: str = None, user: str = "user1",
+                       exclude_id: int = None) -> list:
+        date = canonical_date(date)
+        interval = event_interval(start_time, end_time)
+        if interval is None:
+            raise ValueError(f"Unrecognised start time: {start_time!r}")
+        with self._lock:
+            clashes = self._overlapping(self._calendar(user), user, date, interval)
+        return [ev for ev in clashes if ev.id != exclude_id]
+
+    def find_free_slots(self, start_date: str, end_date: str = None, duration: int = 30,
+                        work_start: str = "09:00", work_end: str = "17:00",
+                        user: str = "user1", limit: int = None) -> list:
+        first, last, window_start, window_end, duration = slot_window(start_date, end_date, work_start,
+                                                                      work_end, duration)
+        with self._lock:
+            cal = self._calendar(user)
+            events = cal.between(first.isoformat(), last.isoformat())
+            rules = cal.rules_between(first.isoformat(), last.isoformat())
+        busy_by_day = {}
+        for ev in itertools.chain(events, expand_rules(rules, user, first.isoformat(), last.isoformat())):
+            interval = event_interval(ev.start_time, ev.end_time)
+            if interval:
+                busy_by_day.setdefault(day_number(ev.date), []).append(interval)
+        return free_slots_by_day(busy_by_day, first, last, window_start, window_end, duration, limit)
+
+    # -------------------------------
+    # UPDATE / DELETE
+    # -------------------------------
+    def update_event(self, event_id: int, title: str = None, date: str = None,
+                     start_time: str = None, end_time: str = None, user: str = "user1") -> bool:
+        if date:
+            date = canonical_date(date)
+        with self._lock:
+            cal = self._calendar(user)
+            ev = cal.by_id.get(_as_id(event_id))
+            if ev is None or not (title or date or start_time or end_time):
+                return False
+            new = ev._replace(title=title or ev.title, date=date or ev.date,
+                              start_time=start_time or ev.start_time, end_time=end_time or ev.end_time)
+            if (title or date or start_time) and cal.clashes_with(new.title, new.date, new.start_time, ev.id):
+                raise ValueError("Duplicate event would be created with this update")
+            cal.remove(ev)
+            cal.insert(new)
+            cal.version += 1
+            return True
+
+    def delete_event(self, event_id: int, user: str = "user1") -> bool:
+        with self._lock:
+            cal = self._calendar(user)
+            ev = cal.by_id.get(_as_id(event_id))
+            if ev is None:
+                return False
+            cal.remove(ev)
+            cal.version += 1
+            return True
+
+    def delete_event_by_title(self, title: str, user: str = "user1") -> bool:
+        with self._lock:
+            cal = self._calendar(user)
+            events = list(cal.by_title.get(title, {}).values())
+            rule_ids = [rule_id for rule_id, rule in cal.rules.items() if rule[1] == title]
+            for ev in events:
+                cal.remove(ev)
+            for rule_id in rule_ids:
+                del cal.rules[rule_id]
+                cal.exceptions.pop(rule_id, None)
+            if events or rule_ids:
+                cal.version += 1
+            return bool(events or rule_ids)
+
+    def delete_all_events(self, user: str = None):
+        with self._lock:
+            calendars = [self._calendar(user)] if user else self._calendars.values()
+            for cal in calendars:
+                if cal.events or cal.rules:
+                    cal.events, cal.by_id, cal.by_title, cal.unique = [], {}, {}, {}
+                    cal.rules, cal.exceptions = {}, {}
+                    cal.version += 1
+        return True
+
+    # -------------------------------
+    # LISTINGS
+    # -------------------------------
+    def _merged(self, user: str, first: str = None, last: str = None) -> list:
+        with self._lock:
+            cal = self._calendar(user)
+            events = cal.between(first, last)
+            rules = cal.rules_between(first, last)
+        if not rules:
+            return events
+        return list(heapq.merge(events, expand_rules(rules, user, first, last), key=event_sort_key))
+
+    def list_all_events(self, user: str = "user1") -> list:
+        return self._merged(user)
+
+    def list_events_on_date(self, date: str, user: str = "user1") -> list:
+        date = canonical_date(date)
+        return self._merged(user, date, date)
+
+    def list_events_by_title(self, title: str, user: str = "user1") -> list:
+        with self._lock:
+            return sorted(self._calendar(user).by_title.get(title, {}).values(), key=page_key)
+
+    def list_events_next_n_days(self, n: int, user: str = "user1") -> list:
+        today = datetime.today().date()
+        return self._merged(user, today.isoformat(), (today + timedelta(days=n)).isoformat())
+
+    def list_events_page(self, user: str = "user1", limit: int = PAGE_SIZE, after: str = None,
+                         start_date: str = None, end_date: str = None) -> tuple:
+        for bound in (start_date, end_date):
+            if bound and day_number(bound) is None:
+                raise ValueError(f"Invalid date: {bound!r}")
+        after_key = cursor_key(*decode_cursor(after)) if after else None
+        window_start = max(filter(None, (start_date, after_key and after_key[0])), default=None)
+        with self._lock:
+            cal = self._calendar(user)
+            lo, hi = cal.bounds(start_date, end_date, after_key)
+            events = cal.events[lo:min(hi, lo + limit + 1)]
+            rules = cal.rules_between(window_start, end_date)
+        if rules:
+            occurrences = (ev for ev in expand_rules(rules, user, window_start, end_date)
+                           if after_key is None or page_key(ev) > after_key)
+            events = list(itertools.islice(heapq.merge(events, occurrences, key=page_key), limit + 1))
+        next_cursor = encode_cursor(*event_position(events[limit - 1])) if len(events) > limit else None
+        return events[:limit], next_cursor
+
+    def iter_all_events(self, user: str = "user1", batch_size: int = PAGE_SIZE, after: str = None,
+                        start_date: str = None, end_date: str = None):
+        while True:
+            events, after = self.list_events_page(user, batch_size, after, start_date, end_date)
+            yield from events
+            if after is None:
+                return
+
+    def iter_events_next_n_days(self, n: int, user: str = "user1", batch_size: int = PAGE_SIZE):
+        today = datetime.today().date()
+        end_date = today + timedelta(days=n)
+        return self.iter_all_events(user, batch_size, start_date=today.isoformat(), end_date=end_date.isoformat())
+
+    def search_events(self, keyword: str, user: str = "user1", limit: int = SEARCH_LIMIT) -> list:
+        terms = search_terms(keyword)
+        if not terms:
+            return []
+        with self._lock:
+            cal = self._calendar(user)
+            events = [ev for title, titled in cal.by_title.items() if title_matches(title, terms)
+                      for ev in titled.values()]
+            rules = [rule for rule in cal.rules.values() if title_matches(rule[1], terms)]
+        events.sort(key=lambda ev: (title_rank(ev), page_key(ev)))
+        del events[limit:]
+        rules.sort(key=lambda rule: (rule[2], rule[3] or ""))
+        events += [Event(f"R{rule_id}", user, title, start_date, start_time, end_time)
+                   for rule_id, title, start_date, start_time, end_time, *_ in rules]
+        return events[:limit]
+
+    # -------------------------------
+    # RECURRING EVENTS
+    # -------------------------------
+    def add_recurring_event(self, title: str, date: str, freq: str, every: int = 1, until: str = None,
+                            occurrences: int = None, start_time: str = None, end_time: str = None,
+                            user: str = "user1") -> dict:
+        if freq not in FREQUENCIES:
+            raise ValueError(f"freq must be one of {', '.join(FREQUENCIES)}")
+        date = canonical_date(date)
+        until = canonical_date(until) if until else None
+        with self._lock:
+            cal = self._calendar(user)
+            rule_id = next(self._rule_ids)
+            cal.rules[rule_id] = (rule_id, title, date, start_time, end_time, freq, int(every or 1),
+                                  until, occurrences)
+            cal.version += 1
+        return {"id": rule_id, "user": user, "title": title, "date": date, "start_time": start_time,
+                "end_time": end_time, "freq": freq, "every": int(every or 1), "until": until,
+                "occurrences": occurrences}
+
+    def add_recurrence_exception(self, rule_id: int, date: str, user: str = "user1") -> bool:
+        day = date_cls.fromisoformat(canonical_date(date))
+        with self._lock:
+            cal = self._calendar(user)
+            rule_id = _as_id(rule_id)
+            if rule_id not in cal.rules:
+                return False
+            skipped = cal.exceptions.setdefault(rule_id, set())
+            if day not in skipped:
+                skipped.add(day)
+                cal.version += 1
+        return True
+
+    def delete_recurring_event(self, rule_id: int, user: str = "user1") -> bool:
+        with self._lock:
+            cal = self._calendar(user)
+            rule_id = _as_id(rule_id)
+            if cal.rules.pop(rule_id, None) is None:
+                return False
+            cal.exceptions.pop(rule_id, None)
+            cal.version += 1
+            return True
+
+    def list_recurring_events(self, user: str = "user1") -> list:
+        with self._lock:
+            rules = sorted(self._calendar(user).rules.values(), key=lambda rule: (rule[2], rule[3] or ""))
+            exceptions = self._calendar(user).exceptions
+            return [{**recurrence_row(None, (rule[0], user, *rule[1:])),
+                     "exceptions": sorted(d.isoformat() for d in exceptions.get(rule[0], ()))}
+                    for rule in rules]
+
+    # -------------------------------
+    # BULK AND BATCH WRITES
+    # -------------------------------
+    def import_events(self, events, user: str = "user1", chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+        """Same contract as database.import_events; the sorted list is rebuilt once at the end."""
+        inserted = 0
+        conflicts = []
+        rows = enumerate(events, start=1)
+        with self._lock:
+            cal = self._calendar(user)
+            while True:
+                batch = list(itertools.islice(rows, chunk_size))
+                if not batch:
+                    break
+                chunk, skipped = [], []
+                for row_no, ev in batch:
+                    if ev.get("error"):         # a record event_io could not parse
+                        skipped.append({"row": row_no, "event": ev, "reason": ev["error"]})
+                        continue
+                    if not ev.get("title") or not ev.get("date"):
+                        skipped.append({"row": row_no, "event": ev, "reason": "missing title or date"})
+                        continue
+                    try:
+                        date = canonical_date(ev["date"])
+                    except ValueError:
+                        skipped.append({"row": row_no, "event": ev, "reason": "invalid date"})
+                        continue
+                    if ev.get("rrule"):
+                        reason = self._import_rule(cal, ev, date)
+                        if reason:
+                            skipped.append({"row": row_no, "event": ev, "reason": reason})
+                        else:
+                            inserted += 1
+                        continue
+                    chunk.append((row_no, ev, date))
+                for row_no, ev, date in chunk:
+                    start_time, end_time = ev.get("start_time") or None, ev.get("end_time") or None
+                    if cal.clashes_with(ev["title"], date, start_time):
+                        skipped.append({"row": row_no, "event": ev, "reason": "duplicate event"})
+                        continue
+                    self._last_event_id += 1
+                    new = Event(self._last_event_id, user, ev["title"], date, start_time, end_time)
+                    cal.index(new)
+                    cal.events.append(new)
+                    inserted += 1
+                # in input order, like database.import_events
+                conflicts.extend(sorted(skipped, key=itemgetter("row")))
+            if inserted:
+                cal.events.sort(key=page_key)
+                cal.version += inserted
+        return {"inserted": inserted, "conflicts": conflicts}
+
+    def _import_rule(self, cal: _Calendar, ev: dict, date: str) -> str:
+        try:
+            rule = parse_rrule(ev["rrule"])
+            exdates = {date_cls.fromisoformat(canonical_date(d)) for d in ev.get("exdates") or ()}
+        except ValueError:
+            return "invalid recurrence"
+        start_time, end_time = ev.get("start_time") or None, ev.get("end_time") or None
+        key = (ev["title"], date, start_time, rule["freq"], rule["every"], rule["until"], rule["occurrences"])
+        if any((r[1], r[2], r[3], r[5], r[6], r[7], r[8]) == key for r in cal.rules.values()):
+            return "duplicate event"
+        rule_id = next(self._rule_ids)
+        cal.rules[rule_id] = (rule_id, ev["title"], date, start_time, end_time, rule["freq"], rule["every"],
+                              rule["until"], rule["occurrences"])
+        if exdates:
+            cal.exceptions[rule_id] = exdates
+        return None
+
+    def _run_batch(self, user: str, items: list, apply, undo, atomic: bool) -> list:
+        """
+        database._run_batch semantics: `apply(cal, item)` returns the item's
+        result dict or raises ValueError; with atomic=True the first failure
+        undoes the applied items (`undo(cal, result)`, newest first) and the
+        remaining items are not attempted.
+        """
+        results = []
+        with self._lock:
+            cal = self._calendar(user)
+            version, last_event_id = cal.version, self._last_event_id
+            for item in items:
+                try:
+                    results.append({"success": True, **apply(cal, item)})
+                except ValueError as e:
+                    results.append({"success": False, "error": str(e)})
+                    if atomic:
+                        for result in reversed(results[:-1]):
+                            undo(cal, result)
+                        # a rolled-back transaction also rolls back sqlite_sequence
+                        cal.version, self._last_event_id = version, last_event_id
+                        break
+        if atomic and not all(r["success"] for r in results):
+            skipped = len(items) - len(results)
+            results = [r if not r["success"] else {"success": False, "error": "rolled back"} for r in results]
+            results += [{"success": False, "error": "not attempted"}] * skipped
+        return results
+
+    def add_events(self, events: list, user: str = "user1", atomic: bool = False) -> list:
+        def apply(cal, ev):
+            title, date = ev.get("title"), ev.get("date")
+            if not title or not date:
+                raise ValueError("missing title or date")
+            return {"event": self._add(cal, user, title, canonical_date(date), ev.get("start_time") or None,
+                                       ev.get("end_time") or None, ev.get("reject_on_conflict"))}
+
+        return self._run_batch(user, list(events), apply, lambda cal, r: cal.remove(r["event"]), atomic)
+
+    def delete_events(self, event_ids: list, user: str = "user1", atomic: bool = False) -> list:
+        def apply(cal, event_id):
+            ev = cal.by_id.get(_as_id(event_id))
+            if ev is None:
+                raise ValueError(f"Event {event_id} not found")
+            cal.remove(ev)
+            cal.version += 1
+            return {"event_id": event_id, "event": ev}
+
+        results = self._run_batch(user, list(event_ids), apply, lambda cal, r: cal.insert(r["event"]), atomic)
+        for r in results:
+            r.pop("event", None)
+        return results
+
+    # -------------------------------
+    # ADMIN
+    # -------------------------------
+    def list_users(self) -> list:
+        with self._lock:
+            return sorted(user for user, cal in self._calendars.items() if cal.by_id or cal.rules)
+
+    def iter_events_all_users(self, start_date: str = None, end_date: str = None, batch_size: int = PAGE_SIZE):
+        for user in self.list_users():
+            yield from self.iter_all_events(user, batch_size, start_date=start_date, end_date=end_date)
@@ -0,0 +1,149 @@
+# models.py
+"""
+Row types returned by the storage backends, and the ordering, cursor and
+title-matching rules every backend shares.
+
+An Event is an immutable named tuple: listings build one per row straight
+from sqlite3 (see event_row) instead of a dict per row, and callers read
+fields as attributes (ev.title). Use to_dict() where JSON is needed.
+"""
+import re
+import unicodedata
+from typing import NamedTuple, Optional, Union
+
+from db.timeutil import day_date, day_number, parse_time
+
+
+class Event(NamedTuple):
+    id: Union[int, str]          # "R<n>" for occurrences of recurring event n
+    user: str
+    title: str
+    date: str
+    start_time: Optional[str]
+    end_time: Optional[str]
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+def event_row(cursor, row) -> Event:
+    """sqlite3 row_factory for SELECT id, user, title, date, start_time, end_time."""
+    return Event._make(row)
+
+
+RECURRENCE_FIELDS = ("id", "user", "title", "date", "start_time", "end_time", "freq", "every", "until",
+                     "occurrences")
+
+
+def recurrence_row(cursor, row) -> dict:
+    """sqlite3 row_factory for SELECT <RECURRENCE_FIELDS> FROM recurrences: the rule as a dict."""
+    return dict(zip(RECURRENCE_FIELDS, row))
+
+
+# -------------------------------
+# ORDERING AND CURSORS
+# -------------------------------
+def start_minute(ev: Event) -> int:
+    """Start as minutes since midnight, -1 for all-day events (they sort first, like NULL start_min)."""
+    minute = parse_time(ev.start_time)
+    return -1 if minute is None else minute
+
+
+def event_sort_key(ev: Event) -> tuple:
+    """(day, start_min) order used by the listings, for merging in occurrences."""
+    return ev.date, start_minute(ev)
+
+
+def page_key(ev: Event) -> tuple:
+    """Total order of the merged listing: stored events before occurrences at the same time."""
+    if isinstance(ev.id, str):
+        return ev.date, start_minute(ev), 1, int(ev.id[1:])
+    return ev.date, start_minute(ev), 0, ev.id
+
+
+def event_position(ev: Event) -> tuple:
+    """(day, start_min, id) of an event whose date is ISO, as the listing columns would store it."""
+    return day_number(ev.date), parse_time(ev.start_time), ev.id
+
+
+def encode_cursor(day: int, start_min: Optional[int], event_id) -> str:
+    """Opaque keyset cursor pointing just after the stored (day, start_min, id) position."""
+    return f"{day}|{'' if start_min is None else start_min}|{event_id}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    (day, start_min, id); start_min is None for all-day events, id is an int
+    for stored events and "R<n>" for occurrences. Cursors issued with an ISO
+    date in place of the day number are still accepted.
+    """
+    try:
+        day, start_min, event_id = cursor.split("|")
+        day = int(day) if day.lstrip("-").isdigit() else day_number(day)
+        if day is None:
+            raise ValueError(cursor)
+        day_date(day)                    # in date range
+        if not event_id.startswith("R"):
+            event_id = int(event_id)
+        else:
+            int(event_id[1:])
+        return day, int(start_min) if start_min else None, event_id
+    except (OverflowError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+
+
+def cursor_key(day: int, start_min: int, event_id) -> tuple:
+    """page_key of the position a decoded cursor points at."""
+    date = day_date(day)
+    if isinstance(event_id, str):
+        return date, -1 if start_min is None else start_min, 1, int(event_id[1:])
+    return date, -1 if start_min is None else start_min, 0, event_id
+
+
+# -------------------------------
+# TITLE SEARCH
+# -------------------------------
+# Words as FTS5's unicode61 tokenizer (events_fts) splits them: runs of letters
+# and digits; underscores and other punctuation separate words.
+_SEARCH_TOKEN = re.compile(r"[^\W_]+")
+
+
+class _FoldTable(dict):
+    """str.translate table: Latin letters without their diacritics ("é" -> "e"), filled on first use."""
+
+    def __missing__(self, code: int) -> str:
+        ch = chr(code)
+        base, *marks = unicodedata.normalize("NFD", ch)
+        if marks and (base < "\u0250" or "\u1e00" <= base <= "\u1eff") \
+                and all(unicodedata.category(m) == "Mn" for m in marks):
+            ch = base
+        self[code] = ch
+        return ch
+
+
+_FOLD = _FoldTable()
+
+
+def fold(text: str) -> str:
+    """Lowercase and drop Latin diacritics, like unicode61 with remove_diacritics 2 ("Café" -> "cafe")."""
+    text = text.lower()
+    return text if text.isascii() else text.translate(_FOLD)
+
+
+def search_terms(keyword: str) -> list:
+    return _SEARCH_TOKEN.findall(fold(keyword))
+
+
+def title_matches(title: str, terms: list) -> bool:
+    """Every term is a prefix of some word of the title ("proj rev" ~ "Project review")."""
+    title = fold(title)
+    if not all(t in title for t in terms):     # cheap reject: a word prefix is a substring
+        return False
+    words = _SEARCH_TOKEN.findall(title)
+    return all(any(w.startswith(t) for w in words) for t in terms)
+
+
+def title_rank(ev: Event) -> tuple:
+    """Order of title matches without bm25: shorter titles first (what bm25 gives
+    when each term occurs once), then listing order."""
+    return len(_SEARCH_TOKEN.findall(ev.title)), ev.date, start_minute(ev)
@@ -0,0 +1,138 @@
+# recurrence.py
+"""
+Lazy expansion of recurrence rules (RRULE-style daily/weekly/monthly).
+
+A rule is stored once; occurrences are generated on demand and only for the
+queried window, jumping arithmetically to the window start instead of
+walking every repetition from the first one.
+"""
+import calendar
+import heapq
+from datetime import date, timedelta
+
+from db.models import Event, page_key
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+# Open-ended rules are expanded this far ahead when no window is given (list_all_events)
+RECURRENCE_HORIZON_DAYS = 365
+
+
+def _add_months(d: date, months: int):
+    """Same day-of-month `months` later, or None if that month is too short."""
+    month_index = d.month - 1 + months
+    year, month = d.year + month_index // 12, month_index % 12 + 1
+    if d.day > calendar.monthrange(year, month)[1]:
+        return None
+    return date(year, month, d.day)
+
+
+def expand_dates(start: date, freq: str, every: int = 1, until: date = None,
+                 occurrences: int = None, exceptions=(), first: date = None, last: date = None):
+    """
+    Yield occurrence dates of a rule within [first, last] (both optional), in order.
+    `occurrences` caps the number of generated instances (like RRULE COUNT);
+    excepted dates still count towards it, as with EXDATE.
+    Monthly rules skip months without the start day (e.g. the 31st).
+    An open-ended rule (no until/occurrences) needs `last`.
+    """
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {freq}")
+    every = max(int(every or 1), 1)
+    first = max(first or start, start)
+    stop = min(d for d in (until, last) if d is not None) if (until or last) else None
+    if stop is None and occurrences is None:
+        raise ValueError("Open-ended recurrence needs an end of window")
+    exceptions = set(exceptions)
+
+    if freq in ("daily", "weekly"):
+        step = every * (7 if freq == "weekly" else 1)
+        k = -(-(first - start).days // step)     # first index on/after `first`
+        while occurrences is None or k < occurrences:
+            d = start + timedelta(days=k * step)
+            if stop is not None and d > stop:
+                return
+            if d not in exceptions:
+                yield d
+            k += 1
+        return
+
+    # monthly: skipped short months produce no instance, so with a COUNT and a
+    # day > 28 the index can't be jumped to; walk from the start instead
+    if occurrences is not None and start.day > 28:
+        k = 0
+    else:
+        months_to_first = (first.year - start.year) * 12 + first.month - start.month
+        k = max(months_to_first // every, 0)
+    generated = k
+    while occurrences is None or generated < occurrences:
+        d = _add_months(start, k * every)
+        k += 1
+        if d is None:
+            continue
+        if stop is not None and d > stop:
+            return
+        generated += 1
+        if d >= first and d not in exceptions:
+            yield d
+
+
+def format_rrule(freq: str, every: int = 1, until: str = None, occurrences: int = None) -> str:
+    """iCalendar RRULE value of a rule, e.g. "FREQ=WEEKLY;INTERVAL=2;UNTIL=20261231"."""
+    parts = [f"FREQ={freq.upper()}"]
+    if int(every or 1) != 1:
+        parts.append(f"INTERVAL={int(every)}")
+    if until:
+        parts.append("UNTIL=" + until.replace("-", ""))
+    if occurrences:
+        parts.append(f"COUNT={int(occurrences)}")
+    return ";".join(parts)
+
+
+def parse_rrule(value: str) -> dict:
+    """
+    Inverse of format_rrule: {"freq", "every", "until", "occurrences"}.
+    Raises ValueError for malformed values and for parts rules cannot hold
+    (BYDAY, HOURLY, ...).
+    """
+    parts = {}
+    for part in value.strip().split(";"):
+        name, sep, part_value = part.partition("=")
+        if not sep:
+            raise ValueError(f"Malformed RRULE part: {part!r}")
+        parts[name.strip().upper()] = part_value.strip()
+    freq = parts.pop("FREQ", "").lower()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unsupported RRULE frequency: {freq.upper() or None}")
+    every = int(parts.pop("INTERVAL", 1))
+    until = parts.pop("UNTIL", None)
+    if until:
+        until = date(int(until[:4]), int(until[4:6]), int(until[6:8])).isoformat()
+    count = parts.pop("COUNT", None)
+    parts.pop("WKST", None)
+    if parts:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(parts))}")
+    return {"freq": freq, "every": every, "until": until, "occurrences": int(count) if count else None}
+
+
+def expand_rules(rules: list, user: str, first: str = None, last: str = None):
+    """
+    Lazily yield occurrence events of `rules` within [first, last], merged in
+    (date, start_time, rule id) order. Occurrences get ids like "R3".
+    `rules` are ((id, title, start_date, start_time, end_time, freq, every,
+    until, occurrences), exception dates) pairs.
+    """
+    first_d = date.fromisoformat(first) if first else None
+    last_d = date.fromisoformat(last) if last else None
+    horizon = date.today() + timedelta(days=RECURRENCE_HORIZON_DAYS)
+
+    def occurrences_of(rule, exceptions):
+        rule_id, title, start_date, start_time, end_time, freq, every, until, count = rule
+        stop = last_d
+        if stop is None and until is None and count is None:
+            stop = horizon
+        for d in expand_dates(date.fromisoformat(start_date), freq, every,
+                              date.fromisoformat(until) if until else None, count,
+                              exceptions, first_d, stop):
+            yield Event(f"R{rule_id}", user, title, d.isoformat(), start_time, end_time)
+
+    return heapq.merge(*(occurrences_of(r, exc) for r, exc in rules), key=page_key)
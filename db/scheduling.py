@@ -0,0 +1,120 @@
+# scheduling.py
+"""
+Interval structures used for conflict detection. Pure in-memory algorithms,
+no database access (see database.find_conflicts for the query side).
+"""
+from datetime import date, timedelta
+from typing import Any, List, Tuple
+
+from db.timeutil import day_number, format_minutes, parse_time
+
+
+class IntervalIndex:
+    """
+    Static interval tree over half-open [start, end) intervals.
+
+    Intervals are sorted by start and viewed as an implicit balanced BST
+    (the middle element of every range is the node); each node stores the
+    max end of its subtree. overlapping() prunes subtrees that end before
+    the query starts or begin after it ends: O(log n + k).
+    """
+
+    def __init__(self, intervals: List[Tuple[int, int, Any]]):
+        self._items = sorted(intervals, key=lambda iv: (iv[0], iv[1]))
+        self._max_end = [0] * len(self._items)
+        self._build(0, len(self._items))
+
+    def _build(self, lo: int, hi: int) -> int:
+        if lo >= hi:
+            return -1
+        mid = (lo + hi) // 2
+        self._max_end[mid] = max(self._items[mid][1], self._build(lo, mid), self._build(mid + 1, hi))
+        return self._max_end[mid]
+
+    def __len__(self):
+        return len(self._items)
+
+    def overlapping(self, start: int, end: int) -> list:
+        """Payloads of all intervals overlapping [start, end), ordered by start."""
+        out = []
+        self._query(0, len(self._items), start, end, out)
+        return out
+
+    def _query(self, lo: int, hi: int, start: int, end: int, out: list):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] <= start:
+            return                      # whole subtree ends before the query
+        self._query(lo, mid, start, end, out)
+        item_start, item_end, payload = self._items[mid]
+        if item_start >= end:
+            return                      # this node and its right subtree start too late
+        if item_end > start:
+            out.append(payload)
+        self._query(mid + 1, hi, start, end, out)
+
+
+def free_slots(busy: List[Tuple[int, int]], window_start: int, window_end: int,
+               min_duration: int) -> List[Tuple[int, int]]:
+    """
+    Gaps of at least `min_duration` inside [window_start, window_end) not covered
+    by any busy interval. `busy` must be sorted by start; overlapping intervals
+    are merged on the fly in a single sweep.
+    """
+    gaps = []
+    cursor = window_start
+    for start, end in busy:
+        if end <= cursor:
+            continue                    # already covered by an earlier interval
+        if start >= window_end:
+            break
+        if start - cursor >= min_duration:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            break
+    if window_end - cursor >= min_duration:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def slot_window(start_date: str, end_date: str, work_start: str, work_end: str, duration) -> tuple:
+    """
+    Validated free-slot search parameters:
+    (first day, last day, window start minute, window end minute, duration).
+    """
+    first = date.fromisoformat(start_date)
+    last = date.fromisoformat(end_date or start_date)
+    window_start, window_end = parse_time(work_start), parse_time(work_end)
+    if window_start is None or window_end is None or window_start >= window_end:
+        raise ValueError("Working hours must be a valid start < end")
+    duration = int(duration)
+    if duration <= 0:
+        raise ValueError("Duration must be positive")
+    return first, last, window_start, window_end, duration
+
+
+def free_slots_by_day(busy_by_day: dict, first: date, last: date, window_start: int, window_end: int,
+                      min_duration: int, limit: int = None) -> list:
+    """
+    [{"date", "start_time", "end_time", "minutes"}] for every day first..last,
+    at most `limit` items. `busy_by_day` maps day numbers (timeutil.day_number)
+    to that day's busy intervals, in any order.
+    """
+    slots = []
+    day, number = first, day_number(first.isoformat())
+    while day <= last:
+        busy = sorted(busy_by_day.get(number, ()))
+        for start, end in free_slots(busy, window_start, window_end, min_duration):
+            slots.append({
+                "date": day.isoformat(),
+                "start_time": format_minutes(start),
+                "end_time": format_minutes(end),
+                "minutes": end - start,
+            })
+            if limit and len(slots) >= limit:
+                return slots
+        day += timedelta(days=1)
+        number += 1
+    return slots
@@ -0,0 +1,109 @@
+# timeutil.py
+"""
+Helpers to turn the free-form time strings stored in events ("14:00", "5 pm",
+"5:30PM") into minutes since midnight for interval arithmetic, and ISO
+dates into day numbers; these are the integer columns events are sorted
+and range-filtered on.
+"""
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+_TIME_RE = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?(?::\d{2})?\s*([ap]\.?m\.?)?\s*$", re.I)
+
+# Events stored with a start but no end are treated as lasting this long
+DEFAULT_DURATION_MINUTES = 60
+MINUTES_PER_DAY = 24 * 60
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=4096)        # stored times repeat a lot ("09:00", "5 pm")
+def parse_time(value) -> int:
+    """
+    "14:00" -> 840, "5 pm" -> 1020, "12am" -> 0. Returns None when the value is
+    empty or not a recognisable time.
+    """
+    if not value:
+        return None
+    m = _TIME_RE.match(str(value))
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    meridiem = (m.group(3) or "").lower().replace(".", "")
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def day_number(value) -> int:
+    """ "1970-01-02" -> 1 (days since 1970-01-01). None when not an ISO date."""
+    try:
+        return date.fromisoformat(value).toordinal() - _EPOCH_ORDINAL
+    except (TypeError, ValueError):
+        return None
+
+
+def day_date(day: int) -> str:
+    """1 -> "1970-01-02"; inverse of day_number."""
+    return date.fromordinal(day + _EPOCH_ORDINAL).isoformat()
+
+
+# Unambiguous spellings found in rows written before dates were validated;
+# numeric day/month orders ("09/10/2025") are not guessed at
+_LEGACY_DATE_FORMATS = ("%Y/%m/%d", "%Y.%m.%d", "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y",
+                        "%B %d, %Y", "%b %d, %Y")
+
+
+def legacy_date(value) -> str:
+    """ "2025/09/22" or "22 Sep 2025" -> "2025-09-22"; None when the value is not a recognisable date."""
+    if day_number(value) is not None:
+        return canonical_date(value)
+    text = " ".join(str(value or "").split())
+    for fmt in _LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def canonical_date(value) -> str:
+    """ "2026-11-03" or "20261103" -> "2026-11-03"; ValueError when not an ISO date."""
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date {value!r}: expected YYYY-MM-DD") from None
+
+
+def time_columns(iso_date: str, start_time, end_time) -> tuple:
+    """(day, start_min, end_min) integer columns stored alongside an event's text fields."""
+    return day_number(iso_date), parse_time(start_time), parse_time(end_time)
+
+
+def format_minutes(minutes: int) -> str:
+    """840 -> "14:00" (1440 is rendered as "24:00")."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def event_interval(start_time, end_time) -> tuple:
+    """
+    Half-open [start, end) in minutes for an event, or None for all-day /
+    unparseable events. Missing end -> DEFAULT_DURATION_MINUTES; an end
+    before the start is taken to run until midnight.
+    """
+    return minutes_interval(parse_time(start_time), parse_time(end_time))
+
+
+def minutes_interval(start: int, end: int) -> tuple:
+    """event_interval for times already parsed to minutes (the start_min / end_min columns)."""
+    if start is None:
+        return None
+    if end is None:
+        end = min(start + DEFAULT_DURATION_MINUTES, MINUTES_PER_DAY)
+    elif end <= start:
+        end = MINUTES_PER_DAY if end < start else start + 1
+    return start, end
@@ -1,54 +1,269 @@
 # log_convo.py
+import atexit
 import json
+import os
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
-MEMORY_FILE = "memory.json"
+MEMORY_FILE = "memory.json"     # legacy format: one JSON list rewritten on every message
+LOG_FILE = "memory.jsonl"       # append-only JSON Lines log, one message per line
+TAIL_BLOCK_SIZE = 8192          # bytes read per step when scanning backwards in tail()
+RECENT_MESSAGES = int(os.getenv("LOG_RECENT_MESSAGES", "32"))   # last messages kept in memory for recent()
 
+# Durability mode: "sync" writes inside add_message, "batched" hands lines to a
+# background writer that flushes every LOG_BATCH_SIZE lines or LOG_FLUSH_INTERVAL seconds.
+LOG_DURABILITY = os.getenv("LOG_DURABILITY", "batched")
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "64"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
 
-def ensure_memory_exists():
-    """Create memory file if it doesn't exist or is empty"""
+_log_ready = False
+_init_lock = threading.Lock()
+# the last RECENT_MESSAGES messages, oldest first: seeded from the log once,
+# then appended by add_message, so recent() never touches the file
+_recent = deque(maxlen=RECENT_MESSAGES)
+_recent_lock = threading.Lock()
+
+
+def _append_lines(lines: list):
+    with open(LOG_FILE, "a") as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+class BatchedLogWriter:
+    """
+    Queue + flusher thread. add_message only enqueues; the thread appends
+    pending lines in batches. Pending lines are flushed on close() (at exit).
+    """
+
+    _STOP = object()
+    _FLUSH = object()       # ends the batch being collected, so flush() need not wait for the interval
+    _MARKERS = (_STOP, _FLUSH)
+
+    def __init__(self, batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, line: str):
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        self._queue.put(line)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            # keep collecting until the batch is full or the interval elapses
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size and batch[-1] not in self._MARKERS:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+            lines = [item for item in batch if item not in self._MARKERS]
+            stop = any(item is self._STOP for item in batch)
+            try:
+                if lines:
+                    _append_lines(lines)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every submitted line has been written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._FLUSH)
+            self._queue.join()
+
+    def close(self):
+        """Flush pending lines and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+
+_writer = BatchedLogWriter()
+atexit.register(_writer.close)
+
+
+def set_durability(mode: str):
+    """Switch between "sync" and "batched" logging at runtime."""
+    global LOG_DURABILITY
+    if mode not in ("sync", "batched"):
+        raise ValueError(f"Unknown durability mode: {mode}")
+    if mode == "sync":
+        _writer.flush()
+    LOG_DURABILITY = mode
+
+
+def flush():
+    """Write out any messages still queued in the background writer."""
+    _writer.flush()
+
+
+def _load_legacy_memory() -> list:
     try:
         with open(MEMORY_FILE, "r") as f:
             content = f.read().strip()
             if not content:
-                raise ValueError("Empty file")
+                return []
+            return json.loads(content)
     except (FileNotFoundError, ValueError):
-        with open(MEMORY_FILE, "w") as f:
-            json.dump([], f)
+        return []
+
+
+def migrate_legacy_memory():
+    """
+    One-time migration of memory.json into memory.jsonl.
+    Runs only when the JSON Lines log does not exist yet; memory.json is left untouched.
+    """
+    if os.path.exists(LOG_FILE) or not os.path.exists(MEMORY_FILE):
+        return
+    tmp_file = f"{LOG_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        for msg in _load_legacy_memory():
+            f.write(json.dumps(msg) + "\n")
+    os.replace(tmp_file, LOG_FILE)
+
+
+def ensure_memory_exists():
+    """Create the log file if it doesn't exist (migrating memory.json if present)"""
+    global _log_ready
+    with _init_lock:
+        migrate_legacy_memory()
+        if not os.path.exists(LOG_FILE):
+            open(LOG_FILE, "a").close()
+        if not _log_ready:
+            with _recent_lock:
+                _recent.clear()
+                _recent.extend(_read_tail(RECENT_MESSAGES))
+        _log_ready = True
+
+
+def _ensure_ready():
+    if not _log_ready:
+        ensure_memory_exists()
+
+
+def _parse_lines(lines) -> list:
+    messages = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            messages.append(json.loads(line))
+        except ValueError:
+            # torn write from a crashed process - skip it
+            continue
+    return messages
 
 
 def load_memory() -> list:
     """Load conversation memory from file"""
+    _ensure_ready()
+    flush()
     try:
-        with open(MEMORY_FILE, "r") as f:
-            content = f.read().strip()
-            if not content:   # handle empty file
-                return []
-            return json.loads(content)
+        with open(LOG_FILE, "r") as f:
+            return _parse_lines(f)
     except FileNotFoundError:
         return []
 
 
 def save_memory(memory: list):
-    """Save conversation memory to file"""
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=2)
+    """Replace the whole conversation log (atomic rewrite)"""
+    flush()
+    tmp_file = f"{LOG_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        for msg in memory:
+            f.write(json.dumps(msg) + "\n")
+    os.replace(tmp_file, LOG_FILE)
+    with _recent_lock:
+        _recent.clear()
+        _recent.extend(memory[-RECENT_MESSAGES:] if RECENT_MESSAGES > 0 else ())
 
 
 def add_message(role: str, message: str):
     """
     role: 'user' or 'assistant'
     message: text message
+    Appends a single line to the log, so each write is O(1) in the history size.
+    In "batched" mode the line is queued and written by the background writer.
     """
-    memory = load_memory()
-    memory.append({
+    _ensure_ready()
+    msg = {
         "timestamp": datetime.now().isoformat(),
         "role": role,
         "message": message
-    })
-    save_memory(memory)
+    }
+    line = json.dumps(msg)
+    with _recent_lock:
+        _recent.append(msg)
+    if LOG_DURABILITY == "sync":
+        _append_lines([line])
+    else:
+        _writer.submit(line)
 
 
 def get_history():
     """Return full conversation history"""
     return load_memory()
+
+
+def recent(n: int = 10) -> list:
+    """
+    Return the last `n` messages (at most RECENT_MESSAGES), oldest first,
+    from memory: no flush and no file read, for use on the request path.
+    """
+    _ensure_ready()
+    if n <= 0:
+        return []
+    with _recent_lock:
+        return list(_recent)[-n:]
+
+
+def tail(n: int = 10) -> list:
+    """
+    Return the last `n` messages, oldest first.
+    Reads the file backwards in blocks, so cost depends on n, not on the history size.
+    """
+    _ensure_ready()
+    flush()
+    return _read_tail(n)
+
+
+def _read_tail(n: int) -> list:
+    if n <= 0:
+        return []
+    try:
+        with open(LOG_FILE, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            data = b""
+            # n messages need n+1 newlines (the last line ends with one)
+            while pos > 0 and data.count(b"\n") <= n:
+                step = min(TAIL_BLOCK_SIZE, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+    except FileNotFoundError:
+        return []
+
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    if pos > 0:
+        lines = lines[1:]   # first line may be cut in half by the block boundary
+    return _parse_lines(lines)[-n:]
@@ -0,0 +1,129 @@
+# logger.py
+"""
+Structured, leveled logging for the app modules (stdlib logging underneath).
+
+    log = get_logger(__name__)
+    log.debug("tool called", extra=kv(tool="add_event_tool", user=user))
+
+Records are JSON lines on stderr: {"ts", "level", "logger", "msg", ...fields}.
+Handlers only enqueue (QueueHandler); a background QueueListener does the
+formatting and I/O, so logging never blocks a request on stderr.
+
+Configuration (env, read on first get_logger call):
+  LOG_LEVEL          default level for app loggers (WARNING: nothing on hot paths)
+  LOG_LEVELS         per-module overrides, e.g. "ai.tools=DEBUG,db.database=INFO"
+  LOG_SAMPLE_EVERY   keep 1 in N records logged with sampled=True (default 100)
+"""
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+ROOT = "calendar"       # all app loggers live under this name
+
+_configured = False
+_config_lock = threading.Lock()
+_listener = None
+
+
+def kv(sampled: bool = False, **fields) -> dict:
+    """`extra` for a structured record; sampled=True marks high-volume messages."""
+    return {"fields": fields, "sampled": sampled}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name[len(ROOT) + 1:] or record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        """Resolve the message in the caller's thread but keep the traceback separate."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SampleFilter(logging.Filter):
+    """Pass every record not marked sampled, and 1 in `every` of each (logger, msg) that is."""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(every, 1)
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False):
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = itertools.count()
+            n = next(counter)
+        if n % self.every:
+            return False
+        record.fields = {**(getattr(record, "fields", None) or {}), "sample_every": self.every}
+        return True
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            module, level = part.split("=", 1)
+            levels[module.strip()] = level.strip().upper()
+    return levels
+
+
+def _configure():
+    global _configured, _listener
+    with _config_lock:
+        if _configured:
+            return
+        root = logging.getLogger(ROOT)
+        root.setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
+        root.propagate = False
+        for module, level in _parse_levels(os.getenv("LOG_LEVELS", "")).items():
+            logging.getLogger(f"{ROOT}.{module}").setLevel(level)
+
+        records = queue.SimpleQueue()
+        queue_handler = _QueueHandler(records)
+        queue_handler.addFilter(SampleFilter(int(os.getenv("LOG_SAMPLE_EVERY", "100"))))
+        root.addHandler(queue_handler)
+
+        stream = logging.StreamHandler()
+        stream.setFormatter(JsonFormatter())
+        _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)     # drains queued records
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a module (pass __name__), under the app's root logger."""
+    if not _configured:
+        _configure()
+    return logging.getLogger(f"{ROOT}.{name}")
@@ -0,0 +1,190 @@
+# metrics.py
+"""
+In-process latency metrics: named span timers feeding fixed-bucket histograms.
+
+    with metrics.span("agent.llm"):
+        ...
+
+    @metrics.timed("tool.add_event_tool")
+    def add_event_tool(...): ...
+
+Disabled with METRICS_ENABLED=0: span() then returns a shared no-op context
+manager and timed() returns the function unchanged, so the cost is a
+function call at most. The flag is read once at import.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +Inf)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max,
+        }
+
+
+_histograms = {}
+_lock = threading.Lock()
+_stats_sources = {}     # name -> callable returning a dict of numbers
+
+
+def observe(name: str, ms: float):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(ms)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def span(name: str):
+    """Context manager timing its block into histogram `name`."""
+    return _Span(name) if ENABLED else _NOOP
+
+
+def timed(name: str):
+    """Decorator timing every call of the function into histogram `name`."""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+def register_stats(name: str, fn):
+    """Include fn()'s numbers (cache hit rates, counters...) in snapshot() and the export."""
+    _stats_sources[name] = fn
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def snapshot() -> dict:
+    """{"enabled", "spans": {name: summary}, "stats": {source: {...}}}"""
+    with _lock:
+        spans = {name: hist.summary() for name, hist in sorted(_histograms.items())}
+    return {
+        "enabled": ENABLED,
+        "spans": spans,
+        "stats": {name: fn() for name, fn in _stats_sources.items()},
+    }
+
+
+def _prom_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition: one histogram per span, gauges for numeric stats."""
+    lines = ["# TYPE span_duration_ms histogram"]
+    with _lock:
+        items = [(name, list(h.counts), h.count, h.total) for name, h in sorted(_histograms.items())]
+    for name, counts, count, total in items:
+        cumulative = 0
+        for bound, n in zip(BUCKETS_MS + ("+Inf",), counts):
+            cumulative += n
+            lines.append(f'span_duration_ms_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'span_duration_ms_sum{{span="{name}"}} {total}')
+        lines.append(f'span_duration_ms_count{{span="{name}"}} {count}')
+    for source, fn in _stats_sources.items():
+        for key, value in fn().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metric = _prom_name(f"{source}_{key}")
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def langchain_handler():
+    """LangChain callback timing each LLM round trip into the "agent.llm" histogram."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMTimingHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._starts = {}
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._starts[run_id] = time.perf_counter()
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._starts[run_id] = time.perf_counter()
+
+        def _finish(self, run_id):
+            start = self._starts.pop(run_id, None)
+            if start is not None:
+                observe("agent.llm", (time.perf_counter() - start) * 1000)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            self._finish(run_id)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._finish(run_id)
+
+    return LLMTimingHandler()
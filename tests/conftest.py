@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+os.environ.setdefault("GEMINI_API_KEY", "dummy")
+
+from db import database  # noqa: E402
+from db.backend import BACKENDS  # noqa: E402
+from logs import log_convo  # noqa: E402
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    """calendar.db in a temporary directory, with its own pool and an empty day cache."""
+    path = str(tmp_path / "calendar.db")
+    monkeypatch.setattr(database, "DB_NAME", path)
+    database.day_cache.clear()
+    yield path
+    database.close_pools()
+    database._initialized.discard(path)
+    database.day_cache.clear()
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request, db_file):
+    """A fresh instance of each storage backend in turn."""
+    backend = BACKENDS[request.param]()
+    backend.init()
+    return backend
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    """memory.jsonl in a temporary directory."""
+    monkeypatch.setattr(log_convo, "LOG_FILE", str(tmp_path / "memory.jsonl"))
+    monkeypatch.setattr(log_convo, "MEMORY_FILE", str(tmp_path / "memory.json"))
+    monkeypatch.setattr(log_convo, "_log_ready", False)
+    yield log_convo.LOG_FILE
+    log_convo.flush()
@@ -0,0 +1,21 @@
+"""LLM round trips made by the agent are timed into the "agent.llm" histogram."""
+import warnings
+
+import pytest
+
+from ai import agent_runner
+from logs import metrics
+
+fake = pytest.importorskip("langchain_community.llms.fake")
+
+
+@pytest.mark.skipif(not metrics.ENABLED, reason="METRICS_ENABLED=0")
+def test_llm_calls_are_timed(db_file, log_file, monkeypatch):
+    monkeypatch.setattr(agent_runner, "_llm", fake.FakeListLLM(responses=["Final Answer: nothing planned"]))
+    metrics.reset()
+    with warnings.catch_warnings():
+        # initialize_agent / Chain.run; langchain re-enables its own warnings on import
+        warnings.simplefilter("ignore", DeprecationWarning)
+        result = agent_runner._answer("what should I wear to the party", 0, ("test",))
+    assert result == "nothing planned"
+    assert metrics.snapshot()["spans"]["agent.llm"]["count"] == 1
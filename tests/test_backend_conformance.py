@@ -0,0 +1,175 @@
+"""Every storage backend in BACKENDS gives the same results and raises the same errors."""
+from datetime import date, timedelta
+
+from db.backend import BACKENDS
+
+
+def day(offset: int) -> str:
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+def _errors(fn):
+    """The ValueError message `fn` raises, or None."""
+    try:
+        fn()
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def test_add_and_list(backend):
+    a = backend.add_event("Team sync", day(1), "10:00", "11:00", user="u")
+    b = backend.add_event("Late review", day(1), "5 pm", user="u")
+    backend.add_event("Other user", day(1), "10:00", user="v")
+    # times are kept as written and ordered by their minute of the day
+    assert backend.list_events_on_date(day(1), "u") == [a, b]
+    assert b.start_time == "5 pm"
+    assert backend.list_events_by_title("Team sync", "u") == [a]
+    assert [e.title for e in backend.list_events_on_date(day(1), "v")] == ["Other user"]
+
+
+def test_write_errors(backend):
+    backend.add_event("Team sync", day(1), "10:00", "11:00", user="u")
+    assert _errors(lambda: backend.add_event("Team sync", day(1), "10:00", user="u")) == \
+        "Duplicate event: same title/date/start time already exists"
+    assert _errors(lambda: backend.add_event("Clash", day(1), "10:30", user="u",
+                                             reject_on_conflict=True)).startswith("Conflicts with: ")
+    assert _errors(lambda: backend.add_event("Bad", "25/09/2025", user="u")) == \
+        "Invalid date '25/09/2025': expected YYYY-MM-DD"
+    assert _errors(lambda: backend.add_recurring_event("X", day(0), "hourly", user="u")) == \
+        "freq must be one of daily, weekly, monthly"
+    assert _errors(lambda: backend.list_events_on_date("tomorrow", "u")) == \
+        "Invalid date 'tomorrow': expected YYYY-MM-DD"
+
+
+def test_update_and_delete(backend):
+    event = backend.add_event("Lunch", day(2), "12:00", user="u")
+    backend.add_event("Dinner", day(2), "19:00", user="u")
+    assert backend.update_event(event.id, start_time="1 pm", user="u")
+    assert backend.update_event(999, title="x", user="u") is False
+    assert _errors(lambda: backend.update_event(event.id, title="Dinner", start_time="19:00", user="u")) == \
+        "Duplicate event would be created with this update"
+    assert [(e.title, e.start_time) for e in backend.list_events_on_date(day(2), "u")] == \
+        [("Lunch", "1 pm"), ("Dinner", "19:00")]
+    assert backend.delete_event(event.id, "u") and not backend.delete_event(event.id, "u")
+    assert backend.delete_event_by_title("Dinner", "u") and not backend.delete_event_by_title("Dinner", "u")
+    assert backend.list_all_events("u") == []
+
+
+def test_recurring_events(backend):
+    rule = backend.add_recurring_event("Standup", day(0), "daily", occurrences=5, start_time="9 am",
+                                       end_time="9:15", user="u")
+    assert backend.add_recurrence_exception(rule["id"], day(2), user="u")
+    assert not backend.add_recurrence_exception(99, day(2), user="u")
+    dates = [e.date for e in backend.list_all_events("u")]
+    assert dates == [day(0), day(1), day(3), day(4)]
+    [listed] = backend.list_recurring_events("u")
+    assert listed["exceptions"] == [day(2)]
+    # deleting by title and clearing the calendar remove rules too
+    assert backend.delete_event_by_title("Standup", "u")
+    assert backend.list_recurring_events("u") == [] and backend.list_all_events("u") == []
+    backend.add_recurring_event("Review", day(0), "weekly", user="u")
+    assert backend.delete_all_events("u")
+    assert backend.list_recurring_events("u") == []
+
+
+def test_batches(backend):
+    results = backend.add_events([{"title": "B1", "date": day(4)},
+                                  {"title": "B2", "date": day(4), "start_time": "10:00"},
+                                  {"title": "B2", "date": day(4), "start_time": "10:00"}], user="u")
+    assert [r["success"] for r in results] == [True, True, False]
+    atomic = backend.add_events([{"title": "C1", "date": day(5)},
+                                 {"title": "C1", "date": day(5), "start_time": "9:00"},
+                                 {"title": "C1", "date": day(5), "start_time": "9:00"}], user="u", atomic=True)
+    assert not any(r["success"] for r in atomic)
+    assert backend.list_events_on_date(day(5), "u") == []
+    ids = [r["event"].id for r in results if r["success"]]
+    deleted = backend.delete_events(ids + [999], user="u")
+    assert [r["success"] for r in deleted] == [True, True, False]
+    assert deleted[2]["error"] == "Event 999 not found"
+
+
+def test_import(backend):
+    report = backend.import_events([
+        {"title": "I1", "date": day(3), "start_time": "1 pm"},
+        {"title": "I1", "date": day(3), "start_time": "1 pm"},
+        {"title": "", "date": day(3)},
+        {"title": "I2", "date": "03/09/2025"},
+        {"error": "malformed JSON: Expecting value"},
+        {"title": "Gym", "date": day(0), "rrule": "FREQ=WEEKLY;COUNT=3", "exdates": [day(7)]},
+        {"title": "Bad rule", "date": day(0), "rrule": "FREQ=HOURLY"},
+    ], user="u")
+    assert report["inserted"] == 2
+    assert [(c["row"], c["reason"]) for c in report["conflicts"]] == [
+        (2, "duplicate event"), (3, "missing title or date"), (4, "invalid date"),
+        (5, "malformed JSON: Expecting value"), (7, "invalid recurrence")]
+    [rule] = backend.list_recurring_events("u")
+    assert (rule["title"], rule["exceptions"]) == ("Gym", [day(7)])
+
+
+def test_scheduling(backend):
+    backend.add_event("Busy", day(1), "10:00", "11:00", user="u")
+    assert [e.title for e in backend.find_conflicts(day(1), "9:00", "10:30", user="u")] == ["Busy"]
+    assert _errors(lambda: backend.find_conflicts(day(1), "xx", user="u")) == "Unrecognised start time: 'xx'"
+    slots = backend.find_free_slots(day(1), None, 60, user="u")
+    assert [(s["start_time"], s["end_time"]) for s in slots] == [("09:00", "10:00"), ("11:00", "17:00")]
+
+
+def test_search_and_pages(backend):
+    for i in range(5):
+        backend.add_event(f"Projekt review {i}", day(i), "10:00", user="u")
+    backend.add_event("Café meetup", day(1), user="u")
+    assert len(backend.search_events("proj rev", "u")) == 5
+    assert [e.title for e in backend.search_events("cafe", "u")] == ["Café meetup"]
+    pages, after = [], None
+    while True:
+        page, after = backend.list_events_page("u", 4, after)
+        pages.append(len(page))
+        if not after:
+            break
+    assert pages == [4, 2]
+    assert _errors(lambda: backend.list_events_page("u", after="x|y")) is not None
+
+
+def _scenario(backend) -> list:
+    """One long run over the whole interface; the output is compared across backends."""
+    out = []
+
+    def call(name, fn):
+        try:
+            out.append((name, fn()))
+        except ValueError as e:
+            out.append((name, "ValueError", str(e)))
+
+    call("add", lambda: backend.add_event("Team sync", day(1), "10:00", "11:00", user="u"))
+    call("add", lambda: backend.add_event("Lunch", day(1), user="u"))
+    call("add", lambda: backend.add_event("Lunch", day(1), user="u"))
+    call("tbd", lambda: backend.add_event("Planning", day(2), "tbd", user="u"))
+    call("rule", lambda: backend.add_recurring_event("Standup", day(0), "daily", occurrences=5,
+                                                     start_time="9 am", user="u"))
+    call("rule", lambda: backend.add_recurring_event("Review", day(0), "weekly", user="u", start_time="16:00"))
+    call("all", lambda: backend.list_all_events("u"))
+    call("next", lambda: backend.list_events_next_n_days(3, "u"))
+    call("iter", lambda: list(backend.iter_all_events("u", batch_size=2))[:10])
+    call("free", lambda: backend.find_free_slots(day(0), day(3), 45, user="u"))
+    call("free", lambda: backend.find_free_slots(day(0), None, 30, "17:00", "09:00", user="u"))
+    call("update", lambda: backend.update_event(3, start_time="8 am", user="u"))
+    call("import", lambda: backend.import_events(
+        [{"title": "J%d" % (i % 3), "date": day(7), "start_time": "9:00"} if i % 4 else {"title": "", "date": day(7)}
+         for i in range(9)], user="u", chunk_size=2))
+    call("users", backend.list_users)
+    call("admin", lambda: list(backend.iter_events_all_users(day(0), day(7))))
+    call("delete_rule", lambda: backend.delete_recurring_event(2, "u"))
+    call("final", lambda: backend.list_all_events("u"))
+    return out
+
+
+def test_backends_agree(db_file):
+    results = {}
+    for name, cls in sorted(BACKENDS.items()):
+        backend = cls()
+        backend.init()
+        results[name] = _scenario(backend)
+    expected = results.pop("sqlite")
+    for name, result in results.items():
+        assert result == expected, name
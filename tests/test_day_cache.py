@@ -0,0 +1,171 @@
+"""Day listings served from the day cache always match a fresh read of the database."""
+import os
+import subprocess
+import sys
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from db import database
+from db.day_cache import day_cache
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAYS = 5
+
+
+def day(offset: int) -> str:
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+@pytest.fixture
+def calendar(db_file):
+    database.add_event("Standup", day(0), "09:00", "09:15", user="u")
+    database.add_event("Review", day(1), "14:00", user="u")
+    database.add_event("Lunch", day(1), "12:00", user="u")
+    database.add_event("Other", day(1), "12:00", user="v")
+    database.add_recurring_event("Gym", day(0), "daily", occurrences=4, start_time="07:00", user="u")
+    return db_file
+
+
+def _views(user="u") -> dict:
+    """Every day view of `user` (cached where possible) and the next-days listing."""
+    views = {d: database.list_events_on_date(day(d), user) for d in range(DAYS)}
+    views["next"] = database.list_events_next_n_days(DAYS - 1, user)
+    return views
+
+
+def _fresh(user="u") -> dict:
+    day_cache.clear()
+    return _views(user)
+
+
+def _check(user="u"):
+    """Cached views, warmed before the write under test, equal uncached ones."""
+    hits = day_cache.stats()["hits"]
+    cached = _views(user)
+    assert day_cache.stats()["hits"] > hits
+    assert cached == _fresh(user)
+
+
+@pytest.fixture
+def warm(calendar):
+    """Cache every day view of both users, then let the test write."""
+    _views("u")
+    _views("v")
+
+
+def test_update_in_place(warm):
+    [review] = database.list_events_by_title("Review", "u")
+    assert database.update_event(review.id, title="Design review", start_time="08:00", user="u")
+    _check()
+    assert [e.title for e in database.list_events_on_date(day(1), "u")] == ["Gym", "Design review", "Lunch"]
+
+
+def test_move_to_another_day(warm):
+    [lunch] = database.list_events_by_title("Lunch", "u")
+    assert database.update_event(lunch.id, date=day(3), user="u")
+    _check()
+    assert lunch.id not in [e.id for e in database.list_events_on_date(day(1), "u")]
+    assert lunch.id in [e.id for e in database.list_events_on_date(day(3), "u")]
+
+
+def test_batch_writes(warm):
+    results = database.add_events([{"title": "A", "date": day(2)},
+                                   {"title": "B", "date": day(4), "start_time": "10:00"}], user="u")
+    _check()
+    database.delete_events([r["event"].id for r in results] + [999], user="u")
+    _check()
+    report = database.import_events([{"title": f"I{i}", "date": day(i % DAYS)} for i in range(12)], user="u",
+                                    chunk_size=5)
+    assert report["inserted"] == 12
+    _check()
+
+
+def test_deletes_and_rules(warm):
+    assert database.delete_event_by_title("Lunch", "u")
+    _check()
+    assert database.add_recurrence_exception(1, day(2), user="u")
+    _check()
+    assert database.delete_recurring_event(1, "u")
+    _check()
+    database.add_recurring_event("Walk", day(1), "daily", occurrences=2, user="u")
+    _check()
+    assert database.delete_all_events("u")
+    _check()
+    assert all(not events for events in _views().values())
+
+
+def test_other_users_entries_survive(warm):
+    database.add_event("New", day(1), "16:00", user="u")
+    hits = day_cache.stats()["hits"]
+    assert [e.title for e in database.list_events_on_date(day(1), "v")] == ["Other"]
+    assert day_cache.stats()["hits"] == hits + 1
+
+
+def test_write_from_another_process(warm, calendar):
+    script = (
+        "from db import database\n"
+        f"database.DB_NAME = {calendar!r}\n"
+        f"database.add_event('Remote', {day(2)!r}, '11:00', user='u')\n"
+        "database.delete_event_by_title('Review', 'u')\n"
+        "[lunch] = database.list_events_by_title('Lunch', 'u')\n"
+        f"database.update_event(lunch.id, date={day(4)!r}, user='u')\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, check=True, timeout=60)
+    views = _views()
+    assert [e.title for e in views[1]] == ["Gym"]
+    assert [e.title for e in views[2] if e.title == "Remote"] == ["Remote"]
+    assert views == _fresh()
+
+
+def test_concurrent_writer_and_reader(warm):
+    """A writer checks each write is visible right away while another thread keeps the cache warm."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)          # interleave the threads as often as possible
+    done = threading.Event()
+    errors = []
+
+    def writer():
+        try:
+            for i in range(60):
+                d = i % DAYS
+                ev = database.add_event(f"W{i}", day(d), f"{8 + i % 10}:{i % 60:02d}", user="u")
+                assert ev.id in [e.id for e in database.list_events_on_date(day(d), "u")]
+                assert ev.id in [e.id for e in database.list_events_next_n_days(DAYS - 1, "u")]
+                if i % 3 == 2:
+                    assert database.update_event(ev.id, date=day((d + 1) % DAYS), user="u")
+                    assert ev.id in [e.id for e in database.list_events_on_date(day((d + 1) % DAYS), "u")]
+                    assert ev.id not in [e.id for e in database.list_events_on_date(day(d), "u")]
+                if i % 5 == 4:
+                    assert database.delete_event(ev.id, "u")
+                    assert ev.id not in [e.id for e in database.list_events_next_n_days(DAYS - 1, "u")]
+        except Exception as e:           # AssertionError included: reported from the main thread
+            errors.append(e)
+        finally:
+            done.set()
+
+    def reader():
+        try:
+            while not done.is_set():
+                for d, events in _views().items():
+                    assert d == "next" or all(e.date == day(d) for e in events)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=120)
+    finally:
+        sys.setswitchinterval(interval)
+    assert not errors, errors
+
+    # whatever is still served at the current version matches the database
+    path, version = database.db_path("u"), database.calendar_version("u")
+    cached = {d: day_cache.get(path, "u", database.day_number(day(d)), version) for d in range(DAYS)}
+    fresh = _fresh()
+    for d, events in cached.items():
+        assert events is None or list(events) == fresh[d]
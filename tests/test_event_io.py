@@ -0,0 +1,33 @@
+"""iCalendar export of the free-form times events are stored with."""
+import io
+
+from db import event_io
+from db.models import Event
+
+
+def _export(*events, rules=()):
+    f, dropped = io.StringIO(), []
+    event_io.write_events(list(events), f, "ics", rules, dropped)
+    return f.getvalue(), dropped
+
+
+def test_free_form_times_are_normalized():
+    ics, dropped = _export(Event(1, "u", "Party", "2025-09-22", "5 pm", "7:30PM"))
+    assert "DTSTART:20250922T170000\r\n" in ics and "DTEND:20250922T193000\r\n" in ics
+    assert dropped == []
+
+
+def test_unreadable_times_are_reported():
+    ics, dropped = _export(Event(1, "u", "Call", "2025-09-22", "tbd", None),
+                           Event(2, "u", "Lunch", "2025-09-23", "12:00", "later"))
+    assert "DTSTART;VALUE=DATE:20250922\r\n" in ics
+    assert "DTSTART:20250923T120000\r\n" in ics and "DTEND" not in ics
+    assert [(d["event"]["title"], d["times"]) for d in dropped] == [("Call", ["tbd"]), ("Lunch", ["later"])]
+
+
+def test_rule_exdates_use_the_normalized_start():
+    rule = {"id": 1, "user": "u", "title": "Gym", "date": "2025-09-22", "start_time": "7 am", "end_time": None,
+            "freq": "weekly", "every": 1, "until": None, "occurrences": 3, "exceptions": ["2025-09-29"]}
+    ics, _ = _export(rules=[rule])
+    assert "DTSTART:20250922T070000\r\n" in ics and "EXDATE:20250929T070000\r\n" in ics
+    assert list(event_io.read_ics(io.StringIO(ics)))[0]["exdates"] == ["2025-09-29"]
@@ -0,0 +1,32 @@
+"""Importing the tools and the web apps does not load LangChain, Gemini or dateparser."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("langchain", "langchain_core", "langchain_community", "langchain_google_genai", "google.generativeai",
+         "google.ai", "dateparser")
+
+
+def _loaded_after(module: str) -> list:
+    """Heavy modules in sys.modules after importing `module` in a fresh interpreter."""
+    script = (
+        "import json, sys\n"
+        f"import {module}\n"
+        f"heavy = {HEAVY!r}\n"
+        "print(json.dumps(sorted(n for n in sys.modules if n.split('.')[0] in heavy\n"
+        "                         or '.'.join(n.split('.')[:2]) in heavy)))\n"
+    )
+    # app and asgi_app initialise the backend on import: keep it off calendar.db
+    env = dict(os.environ, GEMINI_API_KEY="dummy", CALENDAR_BACKEND="memory")
+    out = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, env=env, check=True,
+                         capture_output=True, text=True, timeout=120).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ["ai.tools", "ai.agent_runner", "ai.parsing", "app", "asgi_app"])
+def test_import_is_light(module):
+    assert _loaded_after(module) == []
@@ -0,0 +1,87 @@
+"""The batched conversation log loses no messages and reads back in order."""
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from logs import log_convo
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def batched(log_file, monkeypatch):
+    """Batched mode with a fresh writer that flushes only on full batches or after a long interval."""
+    writer = log_convo.BatchedLogWriter(batch_size=16, flush_interval=5)
+    monkeypatch.setattr(log_convo, "_writer", writer)
+    monkeypatch.setattr(log_convo, "LOG_DURABILITY", "batched")
+    yield writer
+    writer.close()
+
+
+def _lines(path) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_concurrent_messages_are_all_written(batched, log_file):
+    def worker(n):
+        for i in range(200):
+            log_convo.add_message("user", f"{n}-{i}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log_convo.flush()
+
+    messages = [m["message"] for m in _lines(log_file)]
+    assert sorted(messages) == sorted(f"{n}-{i}" for n in range(8) for i in range(200))
+    # each thread's messages stay in the order it logged them
+    for n in range(8):
+        assert [m for m in messages if m.startswith(f"{n}-")] == [f"{n}-{i}" for i in range(200)]
+
+
+def test_reads_see_queued_messages(batched, log_file):
+    for i in range(5):
+        log_convo.add_message("user" if i % 2 == 0 else "assistant", f"m{i}")
+    # nothing reached a full batch or the interval yet; reads flush first
+    assert [m["message"] for m in log_convo.tail(3)] == ["m2", "m3", "m4"]
+    assert [m["message"] for m in log_convo.get_history()] == [f"m{i}" for i in range(5)]
+    assert [m["message"] for m in log_convo.recent(3)] == ["m2", "m3", "m4"]
+
+
+def test_tail_across_blocks(batched, log_file, monkeypatch):
+    monkeypatch.setattr(log_convo, "TAIL_BLOCK_SIZE", 64)
+    for i in range(100):
+        log_convo.add_message("user", f"message number {i} " + "x" * (i % 7))
+    assert [m["message"].split()[2] for m in log_convo.tail(10)] == [str(i) for i in range(90, 100)]
+    assert log_convo.tail(0) == []
+    assert len(log_convo.tail(1000)) == 100
+
+
+def test_recent_is_seeded_from_the_log(log_file, monkeypatch):
+    with open(log_file, "w") as f:
+        for i in range(5):
+            f.write(json.dumps({"timestamp": "", "role": "user", "message": f"old{i}"}) + "\n")
+    monkeypatch.setattr(log_convo, "LOG_DURABILITY", "sync")
+    log_convo.add_message("assistant", "new")
+    assert [m["message"] for m in log_convo.recent(3)] == ["old3", "old4", "new"]
+
+
+def test_pending_messages_are_flushed_at_exit(tmp_path):
+    log = tmp_path / "memory.jsonl"
+    script = (
+        "from logs import log_convo\n"
+        f"log_convo.LOG_FILE = {str(log)!r}\n"
+        f"log_convo.MEMORY_FILE = {str(tmp_path / 'memory.json')!r}\n"
+        "for i in range(1000):\n"
+        "    log_convo.add_message('user', str(i))\n"
+    )
+    env = dict(os.environ, LOG_DURABILITY="batched", LOG_BATCH_SIZE="100000", LOG_FLUSH_INTERVAL="60")
+    subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, env=env, check=True, timeout=60)
+    assert [m["message"] for m in _lines(log)] == [str(i) for i in range(1000)]
@@ -0,0 +1,63 @@
+"""A calendar.db from before date validation migrates to the current schema and pages through cleanly."""
+import sqlite3
+
+import pytest
+
+from db import database
+
+
+@pytest.fixture
+def legacy_db(db_file):
+    """An unmigrated calendar.db holding dates as users typed them."""
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.execute("""CREATE TABLE events (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            user TEXT NOT NULL,
+                            title TEXT NOT NULL,
+                            date TEXT NOT NULL,
+                            start_time TEXT,
+                            end_time TEXT,
+                            UNIQUE(user, title, date, start_time))""")
+        conn.executemany("INSERT INTO events (user, title, date, start_time, end_time) VALUES (?, ?, ?, ?, ?)", [
+            ("u", "Standup", "2025-09-22", "09:00", None),
+            ("u", "Dentist", "2025/09/22", "10:00", "10:30"),
+            ("u", "Call", "tomorrow", "11:00", None),
+            ("u", "Offsite", "23 Sep 2025", None, None),
+            ("u", "Standup", "2025/09/22", "09:00", None),
+            ("u", "Retro", "2025-09-23", "5 pm", None),
+        ])
+    conn.close()
+    return db_file
+
+
+def test_legacy_dates_normalized_or_set_aside(legacy_db, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(database.log, "warning", lambda msg, extra: warnings.append(extra["fields"]))
+    database.init_db()
+
+    events = database.list_all_events("u")
+    assert [(ev.title, ev.date) for ev in events] == [
+        ("Standup", "2025-09-22"), ("Dentist", "2025-09-22"), ("Offsite", "2025-09-23"), ("Retro", "2025-09-23")]
+    with sqlite3.connect(legacy_db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM events WHERE day IS NULL").fetchone() == (0,)
+        undated = conn.execute("SELECT id, date, reason FROM undated_events ORDER BY id").fetchall()
+    assert undated == [(3, "tomorrow", "unrecognised date"), (5, "2025/09/22", "duplicate of 2025-09-22")]
+    assert warnings == [{"count": 2, "ids": [3, 5]}]
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3])
+def test_paging_after_migration(legacy_db, batch_size):
+    database.init_db()
+    database.add_recurring_event("Gym", "2025-09-22", "daily", occurrences=2, user="u")
+    expected = database.list_all_events("u")
+    assert list(database.iter_all_events("u", batch_size=batch_size)) == expected
+
+
+def test_iso_date_cursor_still_accepted(legacy_db):
+    database.init_db()
+    events, cursor = database.list_events_page("u", limit=1)
+    assert cursor.split("|")[0] == str(database.day_number("2025-09-22"))
+    _, start_min, event_id = cursor.split("|")
+    assert database.list_events_page("u", 2, f"2025-09-22|{start_min}|{event_id}") == \
+        database.list_events_page("u", 2, cursor)
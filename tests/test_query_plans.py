@@ -0,0 +1,90 @@
+"""Every listing query is an index search with no sort step (EXPLAIN QUERY PLAN)."""
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from db import database
+
+
+def day(offset: int) -> str:
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+@pytest.fixture
+def statements(db_file, monkeypatch):
+    """SQL run by the database module, with the bound values filled in."""
+    seen = []
+    connect = database.ConnectionPool._connect
+
+    def traced(pool):
+        conn = connect(pool)
+        conn.set_trace_callback(seen.append)
+        return conn
+
+    monkeypatch.setattr(database.ConnectionPool, "_connect", traced)
+    for i in range(20):
+        database.add_event(f"Meeting {i % 4}", day(i % 5), f"{9 + i % 8}:00", user="u")
+    database.add_recurring_event("Standup", day(0), "daily", occurrences=10, start_time="09:15", user="u")
+    database.day_cache.clear()
+    seen.clear()
+    return seen
+
+
+def _plans(db_file, statements) -> list:
+    """Plan details of each SELECT on events that was run."""
+    conn = sqlite3.connect(db_file)
+    try:
+        return [[row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+                for sql in statements if sql.lstrip().startswith("SELECT") and "FROM events" in sql]
+    finally:
+        conn.close()
+
+
+def _pages():
+    _, cursor = database.list_events_page("u", 5)
+    return database.list_events_page("u", 5, after=cursor)
+
+
+def _next_days_partly_cached(statements):
+    # with half the days cached, the others are read one day each
+    database.list_events_on_date(day(0), "u")
+    database.list_events_on_date(day(1), "u")
+    statements.clear()
+    return database.list_events_next_n_days(3, "u")
+
+
+BY_USER = "SEARCH events USING COVERING INDEX idx_events_user_day (user=?)"
+BY_DAY = "SEARCH events USING COVERING INDEX idx_events_user_day (user=? AND day=?)"
+DAY_RANGE = "SEARCH events USING COVERING INDEX idx_events_user_day (user=? AND day>? AND day<?)"
+
+# (name, listing called with the statements list, expected plan of each query it runs)
+LISTINGS = [
+    ("all", lambda _: database.list_all_events("u"), [BY_USER]),
+    ("on_date", lambda _: database.list_events_on_date(day(1), "u"), [BY_DAY]),
+    ("by_title", lambda _: database.list_events_by_title("Meeting 1", "u"),
+     ["SEARCH events USING COVERING INDEX idx_events_user_title (user=? AND title=?)"]),
+    ("next_n_days", lambda _: database.list_events_next_n_days(3, "u"), [DAY_RANGE]),
+    ("next_n_days_uncached", lambda _: database.list_events_next_n_days(database.NEXT_DAYS_CACHE_SPAN, "u"),
+     [DAY_RANGE]),
+    ("next_n_days_by_day", _next_days_partly_cached, [BY_DAY, BY_DAY]),
+    ("pages", lambda _: _pages(),
+     [BY_USER, "SEARCH events USING COVERING INDEX idx_events_user_day (user=? AND day>?)"]),
+]
+
+
+@pytest.mark.parametrize("name, listing, expected", LISTINGS, ids=[name for name, _, _ in LISTINGS])
+def test_listing_uses_covering_index(db_file, statements, name, listing, expected):
+    listing(statements)
+    assert _plans(db_file, statements) == [[plan] for plan in expected]
+
+
+def test_search_drives_from_fts_index(db_file, statements, monkeypatch):
+    monkeypatch.setattr(database, "SEARCH_SCAN_THRESHOLD", 1)
+    assert database.search_events("meet", "u")
+    plans = _plans(db_file, [sql for sql in statements if "events_fts" in sql])
+    if not plans:
+        pytest.skip("SQLite built without FTS5")
+    [details] = plans
+    assert details[0].startswith("SCAN events_fts VIRTUAL TABLE INDEX")
+    assert details[1] == "SEARCH e USING INTEGER PRIMARY KEY (rowid=?)"
@@ -0,0 +1,50 @@
+"""Per-user shards: only inserts create a user's database file."""
+import os
+
+import pytest
+
+from db import database
+
+DATE = "2025-09-22"
+
+
+@pytest.fixture
+def shard_dir(db_file, tmp_path, monkeypatch):
+    path = str(tmp_path / "shards")
+    monkeypatch.setattr(database, "SHARD_DIR", path)
+    database.init_db()
+    yield path
+    database.close_pools()
+    database._initialized.difference_update(database.shard_paths())
+
+
+def _shard_files(path) -> list:
+    return sorted(name for name in os.listdir(path) if name.endswith(".db"))    # not -wal / -shm
+
+
+def test_updates_and_deletes_leave_unknown_users_alone(shard_dir):
+    database.add_event("Standup", DATE, "09:00", user="alice")
+    assert not database.delete_event(1, "carol")
+    assert database.delete_events([1, 2], user="carol") == [
+        {"success": False, "error": "Event 1 not found"}, {"success": False, "error": "Event 2 not found"}]
+    assert [r["error"] for r in database.delete_events([1, 2], user="carol", atomic=True)] == [
+        "Event 1 not found", "not attempted"]
+    assert not database.delete_event_by_title("Standup", "carol")
+    assert not database.update_event(1, title="Renamed", user="carol")
+    assert not database.add_recurrence_exception(1, DATE, user="carol")
+    assert not database.delete_recurring_event(1, "carol")
+    assert database.delete_all_events("carol")
+
+    assert _shard_files(shard_dir) == ["alice.db"]
+    assert database.list_users() == ["alice"]
+    assert database.list_all_events("carol") == []
+    assert [ev.title for ev in database.list_all_events("alice")] == ["Standup"]
+
+
+def test_insert_creates_the_shard(shard_dir):
+    assert database.list_all_events("carol") == []
+    assert _shard_files(shard_dir) == []
+    database.add_event("Dentist", DATE, "10:00", user="carol")
+    assert _shard_files(shard_dir) == ["carol.db"]
+    assert database.delete_event(1, "carol")
+    assert database.list_users() == []
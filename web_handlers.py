@@ -0,0 +1,120 @@
+# web_handlers.py
+"""
+Framework-independent request handling shared by the Flask app (app.py) and
+the ASGI app (asgi_app.py). Each handler takes plain values and returns
+(response dict, HTTP status); they are blocking and the ASGI app runs them
+in worker threads.
+"""
+import json
+import shlex
+
+from ai.tools import TOOL_MAPPING
+from db.backend import get_backend
+from db.database import PAGE_SIZE
+from logs import metrics
+from logs.logger import get_logger, kv
+
+log = get_logger(__name__)
+
+MAX_PAGE_SIZE = 500
+WEB_USER = "user_shreya"
+
+
+@metrics.timed("web.run_cli")
+def run_cli(data: dict):
+    cmd = (data or {}).get("command", "")
+    if not cmd:
+        return {"error": "No command provided"}, 400
+
+    parts = shlex.split(cmd)
+    tool_name = parts[0] + "_tool"
+    args = parts[1:]
+    if tool_name in TOOL_MAPPING:
+        kwargs = {}
+        for a in args:
+            if "=" in a:
+                k, v = a.split("=", 1)
+                kwargs[k] = v.strip("'\"")
+        result = TOOL_MAPPING[tool_name](**kwargs)
+        return {"response": result.get("message", str(result))}, 200
+    else:
+        return {"response": f"Tool '{tool_name}' not found"}, 200
+
+
+@metrics.timed("web.events")
+def list_events(args: dict):
+    """Paginated event listing; `args` are the query parameters."""
+    user = args.get("user", "user1")
+    after = args.get("after") or None
+    try:
+        limit = min(int(args.get("limit", PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        events, next_cursor = get_backend().list_events_page(
+            user=user,
+            limit=limit,
+            after=after,
+            start_date=args.get("start_date"),
+            end_date=args.get("end_date"),
+        )
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return {"events": [ev.to_dict() for ev in events], "next_cursor": next_cursor}, 200
+
+
+def parse_command_text(data: dict):
+    """The text to send to the agent, or an error response."""
+    text = (data or {}).get("text")
+    if not text:
+        return None, ({"error": "No command provided"}, 400)
+    return text, None
+
+
+def format_agent_result(result_str: str):
+    """Shape the agent's reply for the web UI."""
+    log.info("agent output", extra=kv(sampled=True, chars=len(result_str), preview=result_str[:200]))
+
+    # If agent fails, always return generic message
+    if "❌ Agent failed:" in result_str:
+        return {"error": "❌ Agent failed"}, 200
+
+    # Try JSON parse
+    try:
+        parsed_result = json.loads(result_str)
+        if isinstance(parsed_result, dict) and "events" in parsed_result:
+            event = parsed_result["events"][0] if parsed_result["events"] else {}
+            response = {
+                "title": event.get("title", ""),
+                "date": event.get("date", ""),
+                "start_time": event.get("start_time", ""),
+                "end_time": event.get("end_time", ""),
+                "message": event.get("message", "")
+            }
+        else:
+            response = {"message": str(parsed_result)}
+    except Exception:
+        # fallback to plain text, but only if it didn't fail
+        response = {"message": result_str}
+    return response, 200
+
+
+@metrics.timed("web.parse_command")
+def parse_command(data: dict):
+    text, error = parse_command_text(data)
+    if error:
+        return error
+
+    from ai.agent_runner import run_agent
+
+    try:
+        return format_agent_result(run_agent(text, user=WEB_USER))
+    except Exception:
+        # If anything goes wrong in the handler, return generic failure
+        return {"error": "❌ Agent failed"}, 500
+
+
+def metrics_export(fmt: str = None):
+    """Span histograms and stats: Prometheus text by default, a dict for fmt="json"."""
+    if fmt == "json":
+        return metrics.snapshot(), 200
+    return metrics.render_prometheus(), 200